@@ -1,19 +1,44 @@
 import os
-import re
+import sys
+import json
+import argparse
+import pathlib
+import codecs
+import hashlib
+import itertools
 import yaml
+from concurrent.futures import ProcessPoolExecutor
+from multi_pattern import construire_matcher
 from rich.console import Console
 from rich.table import Table
 from rich.prompt import Prompt
 
 console = Console()
 
-# Ce chemin peut etre changé 
-REPERTOIRE = "/path/to/code/AUDIT_CONF_GITLAB"
+# Ce chemin peut etre changé (par défaut, le répertoire du script)
+REPERTOIRE = os.path.dirname(os.path.abspath(__file__))
 REPERTOIRE_ANALYSE = f"{REPERTOIRE}/conf_file"
 ANALYSE_RESULTAT = f"{REPERTOIRE}/resultats_analyse.txt"
+# Résultats par fichier du dernier run, réutilisés si le contenu n'a pas changé
+CACHE_ANALYSE = f"{REPERTOIRE}/.cache_analyse.json"
+VERSION_CACHE = 2
+
+FICHIERS_YAML = ['Baseline.yml', 'pipeline_config.yml', 'project_config.yml']
+EXTENSIONS_CONFIG = ('.yaml', '.json', '.toml', '.gitlab-ci.yml')
 
 SENSITIVE_KEYWORDS = ['password', 'secret', 'key', 'token']
 UNSECURE_COMMANDS = ['curl --insecure', 'wget --no-check-certificate']
+# Nombre maximum de positions conservées par fichier dans les résultats
+MAX_CORRESPONDANCES = 50
+# Les fichiers sont lus par blocs : la mémoire utilisée ne dépend pas de leur taille
+TAILLE_BLOC = 1024 * 1024
+# Au-delà, le fichier n'est pas analysé (artefacts de build, dumps...) ; None pour désactiver
+TAILLE_MAX_FICHIER = 512 * 1024 * 1024
+# Un octet nul dans le début du fichier le fait considérer comme binaire
+TAILLE_SONDE_BINAIRE = 8192
+# Recouvrement entre deux blocs quand une ligne dépasse la taille d'un bloc :
+# plus long que la plus longue occurrence possible d'un motif
+CHEVAUCHEMENT = 256
 PROJECT_CONFIG_VULNERABILITIES = {
     "password": {
         "vuln": "Mot de passe en texte clair",
@@ -120,114 +145,554 @@ CONFIGURATION_ERRORS = {
     }
 }
 
-def analyser_yaml(fichier):
+# Mots-clés, commandes, signatures de secrets (clés AWS, tokens GitLab...) et TODO en un seul automate
+MATCHER = construire_matcher(SENSITIVE_KEYWORDS, UNSECURE_COMMANDS)
+
+# Chargeur YAML en C (libyaml) quand PyYAML a été compilé avec, sinon le chargeur Python
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# Au-delà, les exports sont lus projet par projet au lieu d'être chargés en entier
+SEUIL_YAML_STREAMING = 32 * 1024 * 1024
+
+def compiler_regles(vulnerabilites):
+    """Index clé de configuration -> (rang, clé, libellé), pour un seul accès par clé de projet."""
+    return {cle: (rang, cle, info["vuln"]) for rang, (cle, info) in enumerate(vulnerabilites.items())}
+
+REGLES_PROJET = compiler_regles(PROJECT_CONFIG_VULNERABILITIES)
+
+def failles_projet(nom, config):
+    """Failles d'un projet : liste de {"projet", "regle", "vuln"} dans l'ordre des règles."""
+    if not isinstance(config, dict):
+        return []
+    trouvees = sorted(REGLES_PROJET[cle] for cle, valeur in config.items() if not valeur and cle in REGLES_PROJET)
+    return [{"projet": nom, "regle": cle, "vuln": vuln} for rang, cle, vuln in trouvees]
+
+def formater_faille(faille):
+    """Lignes rich d'une faille, construites seulement à l'affichage."""
+    info = PROJECT_CONFIG_VULNERABILITIES[faille["regle"]]
+    return [f"[red]{info['vuln']}[/red] : {info['explanation']}",
+            f"[yellow]Recommandation[/yellow]: {info['recommendation']}"]
+
+def _composer_noeud(loader, ancres):
+    # Équivalent de Composer.compose_node à partir des seuls événements, que
+    # le chargeur en C expose aussi
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        return ancres[event.anchor]
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        noeud = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        noeud = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        while not loader.check_event(yaml.SequenceEndEvent):
+            noeud.value.append(_composer_noeud(loader, ancres))
+        noeud.end_mark = loader.get_event().end_mark
+    else:
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        noeud = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        while not loader.check_event(yaml.MappingEndEvent):
+            cle = _composer_noeud(loader, ancres)
+            noeud.value.append((cle, _composer_noeud(loader, ancres)))
+        noeud.end_mark = loader.get_event().end_mark
+    if event.anchor is not None:
+        ancres[event.anchor] = noeud
+    return noeud
+
+def iterer_projets(flux):
+    """Produit les projets de la séquence `projects` un par un, sans construire tout le document."""
+    loader = SafeLoader(flux)
     try:
-        with open(fichier, 'r', encoding='utf-8') as file:
-            content = yaml.safe_load(file)
-            failles = []
-
-            if 'projects' in content:
-                for project in content['projects']:
-                    if isinstance(project, dict):
-                        for project_name, config in project.items():
-                            for key, vuln_info in PROJECT_CONFIG_VULNERABILITIES.items():
-                                if key in config and not config[key]:
-                                    failles.append(f"[red]{vuln_info['vuln']}[/red] : {vuln_info['explanation']}")
-                                    failles.append(f"[yellow]Recommandation[/yellow]: {vuln_info['recommendation']}")
-
-            return failles
+        ancres = {}
+        loader.get_event()
+        if not loader.check_event(yaml.DocumentStartEvent):
+            return
+        loader.get_event()
+        if not loader.check_event(yaml.MappingStartEvent):
+            return
+        loader.get_event()
+        while not loader.check_event(yaml.MappingEndEvent):
+            cle = loader.construct_document(_composer_noeud(loader, ancres))
+            if cle == 'projects' and loader.check_event(yaml.SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    yield loader.construct_document(_composer_noeud(loader, ancres))
+                loader.get_event()
+            else:
+                # Les autres clés sont parcourues sans être construites
+                _composer_noeud(loader, ancres)
+    finally:
+        loader.dispose()
+
+def _projets(content):
+    return (content.get('projects') or []) if isinstance(content, dict) else []
+
+def analyser_projets(projets):
+    failles = []
+    for project in projets:
+        if isinstance(project, dict):
+            for project_name, config in project.items():
+                failles.extend(failles_projet(project_name, config))
+    return failles
+
+def analyser_yaml(fichier, contenu=None, streaming=None):
+    """Failles de configuration des projets d'un export YAML, en enregistrements structurés.
+
+    Sans contenu, le fichier est lu en flux si streaming est vrai ou, par
+    défaut, s'il dépasse SEUIL_YAML_STREAMING.
+    """
+    try:
+        if contenu is not None:
+            return analyser_projets(_projets(yaml.load(contenu, Loader=SafeLoader)))
+        if streaming is None:
+            streaming = os.path.getsize(fichier) > SEUIL_YAML_STREAMING
+        with open(fichier, 'rb') as file:
+            if streaming:
+                return analyser_projets(iterer_projets(file))
+            return analyser_projets(_projets(yaml.load(file, Loader=SafeLoader)))
     except Exception as e:
         console.print(f"[red]Erreur lors de l'analyse de {fichier}: {e}[/red]")
         return []
 
+def contient_secrets(contenu):
+    return bool(MATCHER.types_presents(contenu) & {"secret", "signature"})
+
+def contient_commandes_non_securisees(contenu):
+    return "commande" in MATCHER.types_presents(contenu)
+
 def verifier_secrets(fichier):
     with open(fichier, 'r', encoding='utf-8') as file:
-        contenu = file.read()
-        for keyword in SENSITIVE_KEYWORDS:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', contenu, re.IGNORECASE):
-                return True
-    return False
+        return contient_secrets(file.read())
 
 def verifier_commandes_non_securisees(fichier):
     with open(fichier, 'r', encoding='utf-8') as file:
-        contenu = file.read()
-        for command in UNSECURE_COMMANDS:
-            if command in contenu:
-                return True
-    return False
-
-def analyser_repertoire(repertoire):
-    nb_fichiers = 0
-    nb_fichiers_python = 0
-    nb_todos = 0
-    nb_secrets = 0
-    nb_commandes_non_securisees = 0
-    nb_configuration_errors = 0
-    fichiers_config = {}
+        return contient_commandes_non_securisees(file.read())
+
+def _nouveau_resultat():
+    return {"todos": 0, "types": set(), "correspondances": []}
+
+def _compter(etat, config, occurrences, decalage=0, ligne_depart=None):
+    for motif, ligne, colonne, debut, fin in occurrences:
+        if motif.type == "todo":
+            etat["todos"] += 1
+        elif config:
+            etat["types"].add(motif.type)
+            if len(etat["correspondances"]) < MAX_CORRESPONDANCES:
+                # Sur la ligne de départ d'un bloc, la colonne part de ce qui a déjà été lu
+                if ligne == ligne_depart:
+                    colonne += decalage
+                etat["correspondances"].append([motif.nom, ligne, colonne])
+
+def _finaliser(file, config, etat, failles_yaml):
+    resultat = {"todos": etat["todos"]}
+    if file in FICHIERS_YAML:
+        resultat["failles_yaml"] = failles_yaml()
+    if config:
+        resultat["secrets"] = bool(etat["types"] & {"secret", "signature"})
+        resultat["commandes_non_securisees"] = "commande" in etat["types"]
+        resultat["correspondances"] = etat["correspondances"]
+    return resultat
+
+def analyser_contenu(file, contenu):
+    """Passe le contenu d'un fichier, lu une seule fois, à tous les analyseurs."""
+    config = file.endswith(EXTENSIONS_CONFIG)
+    etat = _nouveau_resultat()
+    # Une seule passe de l'automate pour les TODO, secrets et commandes
+    _compter(etat, config, MATCHER.finditer(contenu))
+    return _finaliser(file, config, etat, lambda: analyser_yaml(file, contenu))
+
+def analyser_blocs(file, blocs, file_path=None):
+    """Analyse un fichier fourni par blocs d'octets ; retourne (empreinte, résultat).
+
+    Les blocs sont coupés après le dernier saut de ligne : aucun motif ne
+    s'étend sur deux lignes, donc aucune occurrence n'est coupée. Une ligne
+    plus longue qu'un bloc est coupée en gardant CHEVAUCHEMENT caractères,
+    relus avec le bloc suivant.
+    """
+    config = file.endswith(EXTENSIONS_CONFIG)
+    etat = _nouveau_resultat()
+    hachage = hashlib.sha256()
+    # Le décodeur incrémental recolle les caractères UTF-8 coupés entre deux blocs
+    decodeur = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    texte = ""
+    contexte = 0     # caractères déjà analysés gardés en tête pour les limites de mots
+    reprise = 0      # fin de la dernière occurrence retenue, dans texte
+    ligne = 1
+    decalage = 0     # caractères de la ligne courante déjà analysés
+    # Les exports YAML sont gardés pendant la passe pour le parseur YAML, tant
+    # qu'ils restent sous SEUIL_YAML_STREAMING ; au-delà, il les relit en flux
+    yaml_blocs = [] if file in FICHIERS_YAML else None
+    yaml_taille = 0
+    for bloc in itertools.chain(blocs, [b""]):
+        fin_fichier = not bloc
+        hachage.update(bloc)
+        if yaml_blocs is not None:
+            yaml_taille += len(bloc)
+            if yaml_taille <= SEUIL_YAML_STREAMING:
+                yaml_blocs.append(bloc)
+            else:
+                yaml_blocs = None
+        texte += decodeur.decode(bloc, final=fin_fichier)
+        if fin_fichier:
+            coupe = len(texte)
+        else:
+            coupe = texte.rfind("\n", contexte) + 1
+            if coupe == 0:
+                if len(texte) - contexte < TAILLE_BLOC:
+                    continue
+                coupe = len(texte) - CHEVAUCHEMENT
+
+        occurrences = [o for o in MATCHER.finditer(texte, contexte, coupe, ligne) if o[3] >= reprise]
+        _compter(etat, config, occurrences, decalage, ligne)
+        sauts = texte.count("\n", contexte, coupe)
+        if sauts:
+            decalage = coupe - texte.rfind("\n", contexte, coupe) - 1
+        else:
+            decalage += coupe - contexte
+        ligne += sauts
+        if fin_fichier:
+            break
+        # Une occurrence retenue peut déborder de la coupe : sa fin n'est pas réanalysée
+        reprise = max(occurrences[-1][4] - coupe + 1, 0) if occurrences else 0
+        texte = texte[coupe - 1:]
+        contexte = 1
+
+    if yaml_blocs is not None:
+        failles_yaml = lambda: analyser_yaml(file, b"".join(yaml_blocs))
+    else:
+        failles_yaml = lambda: analyser_yaml(file_path or file, streaming=True)
+    return hachage.hexdigest(), _finaliser(file, config, etat, failles_yaml)
+
+def _lire_blocs(f, premier, taille_bloc):
+    yield premier
+    yield from iter(lambda: f.read(taille_bloc), b"")
+
+def analyser_fichier(file_path, empreinte_connue=None, taille_max=TAILLE_MAX_FICHIER, taille_bloc=TAILLE_BLOC):
+    """Analyse un fichier par blocs et calcule son empreinte au passage.
+
+    Retourne (empreinte, résultat) ; résultat vaut None si l'empreinte est
+    celle du cache (le résultat en cache reste valable). Les fichiers binaires
+    et ceux qui dépassent taille_max sont ignorés sans être lus en entier.
+    """
+    try:
+        if taille_max is not None and os.path.getsize(file_path) > taille_max:
+            return None, {"ignore": "taille"}
+        with open(file_path, 'rb') as f:
+            premier = f.read(taille_bloc)
+            if b"\0" in premier[:TAILLE_SONDE_BINAIRE]:
+                return None, {"ignore": "binaire"}
+            if empreinte_connue is not None:
+                # Hachage seul d'abord : bien plus rapide que l'analyse
+                hachage = hashlib.sha256()
+                for bloc in _lire_blocs(f, premier, taille_bloc):
+                    hachage.update(bloc)
+                if hachage.hexdigest() == empreinte_connue:
+                    return empreinte_connue, None
+                f.seek(0)
+                premier = f.read(taille_bloc)
+            return analyser_blocs(os.path.basename(file_path), _lire_blocs(f, premier, taille_bloc), file_path)
+    except Exception as e:
+        return None, {"erreur": str(e)}
+
+def charger_cache(chemin):
+    try:
+        with open(chemin, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Un cache écrit avec un autre format de résultats est ignoré
+    if not isinstance(cache, dict) or cache.get("version") != VERSION_CACHE:
+        return {}
+    return cache.get("fichiers", {})
+
+def sauver_cache(chemin, cache):
+    try:
+        with open(chemin + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({"version": VERSION_CACHE, "fichiers": cache}, f)
+        os.replace(chemin + ".tmp", chemin)
+    except OSError as e:
+        console.print(f"[red]Impossible d'enregistrer le cache {chemin}: {e}[/red]")
+
+def _persistant(resultat):
+    """Un résultat ne va en cache que s'il ne dépend pas du run : ni erreur de
+    lecture, ni fichier ignoré pour sa taille (la limite peut changer d'un run à l'autre)."""
+    return "erreur" not in resultat and resultat.get("ignore") != "taille"
+
+def scanner_repertoires(repertoires, jobs=None, cache_path=None, taille_max=TAILLE_MAX_FICHIER):
+    """Analyse tous les fichiers des répertoires sur un même pool de processus.
+
+    Les fichiers dont la taille et la date n'ont pas changé ne sont pas relus ;
+    ceux dont le contenu a la même empreinte que lors du dernier run ne sont pas
+    réanalysés. Retourne la liste (répertoire, chemin, résultat) dans l'ordre du parcours.
+    """
+    cache = charger_cache(cache_path) if cache_path else {}
+    nouveau_cache = {}
+    fichiers = []
+    a_analyser = []
+    for repertoire in repertoires:
+        for root, dirs, files in os.walk(repertoire):
+            for file in files:
+                file_path = os.path.join(root, file)
+                fichiers.append((repertoire, file_path))
+                try:
+                    st = os.stat(file_path)
+                except OSError as e:
+                    nouveau_cache[file_path] = {"resultat": {"erreur": str(e)}}
+                    continue
+                entree = cache.get(file_path)
+                if entree and not _persistant(entree["resultat"]):
+                    entree = None
+                if entree and entree.get("taille") == st.st_size and entree.get("mtime") == st.st_mtime_ns:
+                    nouveau_cache[file_path] = entree
+                else:
+                    a_analyser.append((file_path, st, entree))
+
+    if a_analyser:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(analyser_fichier, file_path, (entree or {}).get("empreinte"), taille_max)
+                       for file_path, st, entree in a_analyser]
+            for (file_path, st, entree), future in zip(a_analyser, futures):
+                empreinte, resultat = future.result()
+                if resultat is None:
+                    resultat = entree["resultat"]
+                nouveau_cache[file_path] = {"taille": st.st_size, "mtime": st.st_mtime_ns,
+                                            "empreinte": empreinte, "resultat": resultat}
+
+    if cache_path:
+        # Les entrées des fichiers hors de ce run sont conservées
+        cache.update(nouveau_cache)
+        sauver_cache(cache_path, {p: e for p, e in cache.items() if _persistant(e["resultat"])})
+    return [(repertoire, file_path, nouveau_cache[file_path]["resultat"]) for repertoire, file_path in fichiers]
+
+def scanner_repertoire(repertoire, jobs=None, cache_path=None, taille_max=TAILLE_MAX_FICHIER):
+    """Comme scanner_repertoires pour un seul répertoire : liste (chemin, résultat)."""
+    return [(file_path, resultat) for _, file_path, resultat
+            in scanner_repertoires([repertoire], jobs=jobs, cache_path=cache_path, taille_max=taille_max)]
+
+RECOMMANDATION_SECRETS = "Retirer ou chiffrer les secrets. Utiliser un gestionnaire de secrets (par exemple, HashiCorp Vault) pour éviter l'exposition des informations sensibles."
+RECOMMANDATION_COMMANDES = "Utiliser des commandes sécurisées sans '--insecure'. Ne jamais désactiver la vérification de certificat SSL/TLS. Les commandes comme 'curl..."
+
+def resumer(fichiers):
+    """Compteurs du rapport à partir des entrées {"chemin", "resultat"}."""
+    resume = {
+        "nb_fichiers": 0,
+        "nb_fichiers_python": 0,
+        "nb_fichiers_ignores": 0,
+        "nb_erreurs": 0,
+        "nb_todos": 0,
+        "nb_secrets": 0,
+        "nb_commandes_non_securisees": 0,
+        "nb_configuration_errors": 0,
+        "nb_failles_projets": 0,
+    }
+    for fichier in fichiers:
+        resultat = fichier["resultat"]
+        resume["nb_fichiers"] += 1
+        if fichier["chemin"].endswith(".py"):
+            resume["nb_fichiers_python"] += 1
+        if "erreur" in resultat:
+            resume["nb_erreurs"] += 1
+            continue
+        if "ignore" in resultat:
+            resume["nb_fichiers_ignores"] += 1
+            continue
+        resume["nb_todos"] += resultat["todos"]
+        resume["nb_failles_projets"] += len(resultat.get("failles_yaml") or [])
+        if resultat.get("secrets"):
+            resume["nb_secrets"] += 1
+        if resultat.get("commandes_non_securisees"):
+            resume["nb_commandes_non_securisees"] += 1
+    return resume
+
+def auditer(repertoires, jobs=None, cache_path=None, taille_max=TAILLE_MAX_FICHIER):
+    """API : audite les répertoires et retourne le rapport, sans rien afficher ni demander.
+
+    Le rapport est un dict sérialisable en JSON :
+    {"repertoires": [...], "fichiers": [{"repertoire", "chemin", "resultat"}], "resume": {...}}
+    """
+    repertoires = [repertoires] if isinstance(repertoires, str) else list(repertoires)
+    fichiers = [{"repertoire": repertoire, "chemin": chemin, "resultat": resultat}
+                for repertoire, chemin, resultat
+                in scanner_repertoires(repertoires, jobs=jobs, cache_path=cache_path, taille_max=taille_max)]
+    return {"repertoires": repertoires, "fichiers": fichiers, "resume": resumer(fichiers)}
+
+def afficher_rapport(rapport, resultats_path=None):
+    """Sortie texte historique : tableau rich à l'écran et fichier de résultats."""
+    resultats_path = resultats_path or ANALYSE_RESULTAT
+    resume = rapport["resume"]
     recommandations = {}
+    correspondances = {}
 
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Nom du fichier", style="dim", width=40)
     table.add_column("Taille (octets)", justify="right")
     table.add_column("Recommandations", justify="left")
 
-    for root, dirs, files in os.walk(repertoire):
-        for file in files:
-            file_path = os.path.join(root, file)
-            nb_fichiers += 1
-
-            if file.endswith(".py"):
-                nb_fichiers_python += 1
+    for fichier in rapport["fichiers"]:
+        file_path = fichier["chemin"]
+        resultat = fichier["resultat"]
+        file = os.path.basename(file_path)
 
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    file_content = f.read()
-                    nb_todos += len(re.findall(r"\bTODO\b", file_content))
+        if "erreur" in resultat:
+            console.print(f"[red]Erreur lors de l'analyse de {file_path}: {resultat['erreur']}[/red]")
+            continue
+        if "ignore" in resultat:
+            continue
 
-                    if file in ['Baseline.yml', 'pipeline_config.yml', 'project_config.yml']:
-                        failles_yaml = analyser_yaml(file_path)
-                        if failles_yaml:
-                            console.print("\n[bold red]Vulnérabilités détectées et recommandations:[/bold red]")
-                            for faille in failles_yaml:
-                                console.print(faille)
+        failles_yaml = resultat.get("failles_yaml")
+        if failles_yaml:
+            console.print("\n[bold red]Vulnérabilités détectées et recommandations:[/bold red]")
+            for faille in failles_yaml:
+                for ligne in formater_faille(faille):
+                    console.print(ligne)
 
-                    if file.endswith(('.yaml', '.json', '.toml', '.gitlab-ci.yml')):
-                        if verifier_secrets(file_path):
-                            nb_secrets += 1
-                            recommandations[file_path] = "[red]Retirer ou chiffrer les secrets. Utiliser un gestionnaire de secrets (par exemple, HashiCorp Vault) pour éviter l'exposition des informations sensibles.[/red]"
+        if file.endswith(EXTENSIONS_CONFIG):
+            if resultat.get("correspondances"):
+                correspondances[file_path] = resultat["correspondances"]
 
-                        if verifier_commandes_non_securisees(file_path):
-                            nb_commandes_non_securisees += 1
-                            recommandations[file_path] = "[red]Utiliser des commandes sécurisées sans '--insecure'. Ne jamais désactiver la vérification de certificat SSL/TLS. Les commandes comme 'curl...[/red]"
+            if resultat["secrets"]:
+                recommandations[file_path] = f"[red]{RECOMMANDATION_SECRETS}[/red]"
 
-                        table.add_row(file, str(os.path.getsize(file_path)), recommandations.get(file, "Consulter fichier résultats."))
+            if resultat["commandes_non_securisees"]:
+                recommandations[file_path] = f"[red]{RECOMMANDATION_COMMANDES}[/red]"
 
-            except Exception as e:
-                console.print(f"[red]Erreur lors de l'analyse de {file_path}: {e}[/red]")
+            table.add_row(file, str(os.path.getsize(file_path)), recommandations.get(file_path, "Consulter fichier résultats."))
 
     console.print(f"\n\n[bold]Résumé de l'analyse[/bold]")
-    console.print(f"Nombre total de fichiers analysés : {nb_fichiers}")
-    console.print(f"Nombre de fichiers Python (.py) : {nb_fichiers_python}")
-    console.print(f"Nombre de mentions 'TODO' dans le code : {nb_todos}")
-    console.print(f"Nombre de fichiers contenant des secrets en texte clair : {nb_secrets}")
-    console.print(f"Nombre de fichiers contenant des commandes non sécurisées : {nb_commandes_non_securisees}")
-    console.print(f"Nombre d'erreurs de configuration : {nb_configuration_errors}")
+    console.print(f"Nombre total de fichiers analysés : {resume['nb_fichiers']}")
+    console.print(f"Nombre de fichiers Python (.py) : {resume['nb_fichiers_python']}")
+    console.print(f"Nombre de fichiers ignorés (binaires ou trop volumineux) : {resume['nb_fichiers_ignores']}")
+    console.print(f"Nombre de mentions 'TODO' dans le code : {resume['nb_todos']}")
+    console.print(f"Nombre de fichiers contenant des secrets en texte clair : {resume['nb_secrets']}")
+    console.print(f"Nombre de fichiers contenant des commandes non sécurisées : {resume['nb_commandes_non_securisees']}")
+    console.print(f"Nombre d'erreurs de configuration : {resume['nb_configuration_errors']}")
 
     console.print("\n[bold]Fichiers de configuration détectés[/bold]")
     console.print(table)
 
-    with open(ANALYSE_RESULTAT, 'w', encoding='utf-8') as f:
-        f.write(f"Nombre total de fichiers analysés : {nb_fichiers}\n")
-        f.write(f"Nombre de fichiers Python (.py) : {nb_fichiers_python}\n")
-        f.write(f"Nombre de mentions 'TODO' dans le code : {nb_todos}\n")
-        f.write(f"Nombre de fichiers contenant des secrets en texte clair : {nb_secrets}\n")
-        f.write(f"Nombre de fichiers contenant des commandes non sécurisées : {nb_commandes_non_securisees}\n")
-        f.write(f"Nombre d'erreurs de configuration : {nb_configuration_errors}\n")
+    with open(resultats_path, 'w', encoding='utf-8') as f:
+        f.write(f"Nombre total de fichiers analysés : {resume['nb_fichiers']}\n")
+        f.write(f"Nombre de fichiers Python (.py) : {resume['nb_fichiers_python']}\n")
+        f.write(f"Nombre de fichiers ignorés (binaires ou trop volumineux) : {resume['nb_fichiers_ignores']}\n")
+        f.write(f"Nombre de mentions 'TODO' dans le code : {resume['nb_todos']}\n")
+        f.write(f"Nombre de fichiers contenant des secrets en texte clair : {resume['nb_secrets']}\n")
+        f.write(f"Nombre de fichiers contenant des commandes non sécurisées : {resume['nb_commandes_non_securisees']}\n")
+        f.write(f"Nombre d'erreurs de configuration : {resume['nb_configuration_errors']}\n")
         f.write(f"Recommandations pour les failles détectées :\n")
         for file, recommandation in recommandations.items():
             f.write(f"{file}: {recommandation}\n")
+        f.write(f"Positions des éléments sensibles (motif, ligne, colonne) :\n")
+        for file, liste in correspondances.items():
+            for nom, ligne, colonne in liste:
+                f.write(f"{file}:{ligne}:{colonne}: {nom}\n")
+
+    console.print(f"[green]Analyse terminée et résultats sauvegardés dans '{resultats_path}'[/green]")
+
+def analyser_repertoire(repertoire, jobs=None, taille_max=TAILLE_MAX_FICHIER):
+    afficher_rapport(auditer([repertoire], jobs=jobs, cache_path=CACHE_ANALYSE, taille_max=taille_max))
+
+# Règles SARIF : un identifiant par type de motif et par règle de configuration de projet
+_TYPES_MOTIFS = {motif.nom: motif.type for motif in MATCHER.motifs}
+_REGLES_SARIF = {
+    "secret": ("gitlab/secret", "error", "Mot-clé sensible en texte clair", RECOMMANDATION_SECRETS),
+    "signature": ("gitlab/signature-secret", "error", "Secret reconnu par sa signature", RECOMMANDATION_SECRETS),
+    "commande": ("gitlab/commande-non-securisee", "warning", "Commande sans vérification TLS", RECOMMANDATION_COMMANDES),
+}
+
+def rapport_sarif(rapport):
+    """Rapport au format SARIF 2.1.0 (une exécution, un résultat par occurrence ou faille de projet)."""
+    regles = [{"id": regle_id, "shortDescription": {"text": texte}, "help": {"text": aide},
+               "defaultConfiguration": {"level": niveau}}
+              for regle_id, niveau, texte, aide in _REGLES_SARIF.values()]
+    regles += [{"id": f"gitlab/projet/{cle}", "shortDescription": {"text": info["vuln"]},
+                "fullDescription": {"text": info["explanation"]}, "help": {"text": info["recommendation"].strip()},
+                "defaultConfiguration": {"level": "warning"}}
+               for cle, info in PROJECT_CONFIG_VULNERABILITIES.items()]
+
+    resultats = []
+    for fichier in rapport["fichiers"]:
+        resultat = fichier["resultat"]
+        uri = pathlib.Path(fichier["chemin"]).resolve().as_uri()
+        for nom, ligne, colonne in resultat.get("correspondances") or []:
+            regle_id, niveau, texte, aide = _REGLES_SARIF[_TYPES_MOTIFS.get(nom, "secret")]
+            resultats.append({
+                "ruleId": regle_id,
+                "level": niveau,
+                "message": {"text": f"{texte} : {nom}"},
+                "locations": [{"physicalLocation": {"artifactLocation": {"uri": uri},
+                                                    "region": {"startLine": ligne, "startColumn": colonne}}}],
+            })
+        for faille in resultat.get("failles_yaml") or []:
+            resultats.append({
+                "ruleId": f"gitlab/projet/{faille['regle']}",
+                "level": "warning",
+                "message": {"text": f"{faille['projet']} : {faille['vuln']}"},
+                "locations": [{"physicalLocation": {"artifactLocation": {"uri": uri}}}],
+            })
+
+    return {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {"name": "gitlab_extract", "rules": regles}},
+            "results": resultats,
+        }],
+    }
+
+def ecrire_rapport(rapport, format, out):
+    """Écrit le rapport au format json, jsonl (une ligne par fichier puis le résumé) ou sarif."""
+    if format == "json":
+        json.dump(rapport, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+    elif format == "jsonl":
+        for fichier in rapport["fichiers"]:
+            out.write(json.dumps(fichier, ensure_ascii=False) + "\n")
+        out.write(json.dumps({"resume": rapport["resume"]}, ensure_ascii=False) + "\n")
+    elif format == "sarif":
+        json.dump(rapport_sarif(rapport), out, ensure_ascii=False, indent=2)
+        out.write("\n")
+    else:
+        raise ValueError(f"Format inconnu : {format}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit des exports de configuration GitLab")
+    parser.add_argument("repertoires", nargs="*", help="répertoires à analyser")
+    parser.add_argument("-f", "--format", choices=["text", "json", "jsonl", "sarif"], default="text",
+                        help="format de sortie (défaut : text)")
+    parser.add_argument("-o", "--output", help="fichier de sortie (défaut : sortie standard, ou "
+                                               "le fichier de résultats habituel en format text)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="nombre de processus (défaut : nombre de CPU)")
+    parser.add_argument("--cache", default=CACHE_ANALYSE, help=f"fichier de cache des résultats (défaut : {CACHE_ANALYSE})")
+    parser.add_argument("--no-cache", action="store_true", help="ne pas lire ni écrire le cache")
+    parser.add_argument("--max-size", type=int, default=TAILLE_MAX_FICHIER // (1024 * 1024),
+                        help="taille maximale d'un fichier analysé en Mo, 0 pour aucune limite")
+    args = parser.parse_args(argv)
+
+    if not args.repertoires:
+        # Sans argument, en terminal : ancien mode interactif
+        if argv is None and len(sys.argv) == 1 and sys.stdin.isatty():
+            repertoire_analyse = Prompt.ask("Sélectionnez un répertoire à analyser", default=REPERTOIRE_ANALYSE)
+            analyser_repertoire(repertoire_analyse)
+            return
+        parser.error("indiquer au moins un répertoire à analyser")
+
+    rapport = auditer(args.repertoires, jobs=args.jobs, cache_path=None if args.no_cache else args.cache,
+                      taille_max=args.max_size * 1024 * 1024 or None)
 
-    console.print(f"[green]Analyse terminée et résultats sauvegardés dans '{ANALYSE_RESULTAT}'[/green]")
+    if args.format == "text":
+        afficher_rapport(rapport, args.output)
+    else:
+        out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            ecrire_rapport(rapport, args.format, out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
 
-repertoire_analyse = Prompt.ask("Sélectionnez un répertoire à analyser", default=REPERTOIRE_ANALYSE)
-analyser_repertoire(repertoire_analyse)
+if __name__ == "__main__":
+    main()
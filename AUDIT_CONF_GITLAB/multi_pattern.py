@@ -0,0 +1,137 @@
+import re
+import time
+import random
+import string
+
+# Recherche multi-motifs en une seule passe : tous les mots-clés, commandes et
+# signatures de secrets sont rangés dans un trie, compilé en une seule
+# expression régulière. À chaque position du texte, le moteur de re descend
+# le trie au lieu d'essayer chaque motif l'un après l'autre, donc le coût
+# dépend de la longueur des motifs et presque pas de leur nombre.
+
+class Motif:
+    """Un motif recherché.
+
+    litteral : préfixe littéral indexé dans le trie
+    suite    : expression régulière optionnelle qui doit suivre le préfixe
+               (ex. les 16 caractères d'une clé AWS après "AKIA")
+    mot      : le motif doit être un mot entier (équivalent de \\b...\\b)
+    casse    : False pour ignorer la casse
+    """
+
+    def __init__(self, nom, litteral, type, suite=None, mot=False, casse=True):
+        self.nom = nom
+        self.litteral = litteral
+        self.type = type
+        self.suite = suite
+        self.mot = mot
+        self.casse = casse
+
+    def __repr__(self):
+        return f"Motif({self.nom!r}, {self.type!r})"
+
+class _Noeud:
+    __slots__ = ("enfants", "fins")
+
+    def __init__(self):
+        self.enfants = {}
+        self.fins = []
+
+def _trie_en_regex(noeud):
+    alternatives = []
+    # Les suites les plus longues d'abord : à position égale, le motif le plus long gagne
+    for caractere in sorted(noeud.enfants):
+        alternatives.append(re.escape(caractere) + _trie_en_regex(noeud.enfants[caractere]))
+    for index, suite in noeud.fins:
+        # Groupe vide servant de marqueur : lastgroup donne le motif reconnu
+        alternatives.append(f"(?P<m{index}>)" + (f"(?:{suite})" if suite else ""))
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+class MultiMatcher:
+    def __init__(self, motifs):
+        self.motifs = list(motifs)
+        familles = {}
+        for index, motif in enumerate(self.motifs):
+            racine = familles.setdefault((motif.mot, motif.casse), _Noeud())
+            noeud = racine
+            for caractere in motif.litteral if motif.casse else motif.litteral.lower():
+                noeud = noeud.enfants.setdefault(caractere, _Noeud())
+            noeud.fins.append((index, motif.suite))
+
+        branches = []
+        for (mot, casse), racine in familles.items():
+            branche = _trie_en_regex(racine)
+            if mot:
+                branche = rf"(?<!\w)(?:{branche})(?!\w)"
+            if not casse:
+                branche = f"(?i:{branche})"
+            branches.append(branche)
+        self.regex = re.compile("|".join(branches)) if branches else None
+
+    def finditer(self, texte, debut=0, fin=None, ligne=1):
+        """Produit (motif, ligne, colonne, début, fin) pour chaque occurrence, sans chevauchement.
+
+        La recherche commence à debut (les caractères avant servent de contexte
+        pour les limites de mots) et ignore les occurrences qui commencent à
+        fin ou après. ligne est le numéro de la ligne qui contient debut.
+        """
+        if self.regex is None:
+            return
+        debut_ligne = debut
+        position = debut
+        for match in self.regex.finditer(texte, debut):
+            depart = match.start()
+            if fin is not None and depart >= fin:
+                break
+            sauts = texte.count("\n", position, depart)
+            if sauts:
+                ligne += sauts
+                debut_ligne = texte.rfind("\n", position, depart) + 1
+            position = depart
+            motif = self.motifs[int(match.lastgroup[1:])]
+            yield motif, ligne, depart - debut_ligne + 1, depart, match.end()
+
+    def types_presents(self, texte):
+        return {motif.type for motif, *_ in self.finditer(texte)}
+
+# Signatures de secrets connues : préfixe littéral + suite attendue
+SECRET_SIGNATURES = [
+    Motif("aws_access_key_id", "AKIA", "signature", suite=r"[0-9A-Z]{16}"),
+    Motif("aws_temporary_key_id", "ASIA", "signature", suite=r"[0-9A-Z]{16}"),
+    Motif("gitlab_pat", "glpat-", "signature", suite=r"[0-9A-Za-z_\-]{20}"),
+    Motif("gitlab_runner_token", "glrt-", "signature", suite=r"[0-9A-Za-z_\-]{20}"),
+    Motif("gitlab_deploy_token", "gldt-", "signature", suite=r"[0-9A-Za-z_\-]{20}"),
+    Motif("private_key", "-----BEGIN ", "signature", suite=r"(?:RSA |EC |DSA |OPENSSH )?PRIVATE KEY-----"),
+]
+
+def construire_matcher(mots_cles, commandes, signatures=SECRET_SIGNATURES, todo=True):
+    motifs = [Motif(mot, mot, "secret", mot=True, casse=False) for mot in mots_cles]
+    motifs += [Motif(commande, commande, "commande") for commande in commandes]
+    motifs += list(signatures)
+    if todo:
+        motifs.append(Motif("TODO", "TODO", "todo", mot=True))
+    return MultiMatcher(motifs)
+
+def benchmark(tailles=(4, 50, 200, 500), taille_texte=2_000_000):
+    """Compare le matcher à une boucle d'expressions par mot-clé quand la liste grandit."""
+    rng = random.Random(0)
+    mots = string.ascii_lowercase + "   \n"
+    texte = "".join(rng.choice(mots) for _ in range(taille_texte))
+    print(f"Texte de {len(texte) / 1e6:.1f} Mo")
+    print(f"{'motifs':>8} {'matcher (s)':>12} {'boucle re (s)':>14}")
+    for taille in tailles:
+        mots_cles = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12))) for _ in range(taille)]
+        matcher = construire_matcher(mots_cles, [])
+        debut = time.perf_counter()
+        trouve = sum(1 for _ in matcher.finditer(texte))
+        temps_matcher = time.perf_counter() - debut
+        debut = time.perf_counter()
+        for mot in mots_cles:
+            re.findall(r'\b' + re.escape(mot) + r'\b', texte, re.IGNORECASE)
+        temps_boucle = time.perf_counter() - debut
+        print(f"{taille:>8} {temps_matcher:>12.3f} {temps_boucle:>14.3f}   ({trouve} occurrences)")
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,163 +1,544 @@
-import os
-import re
-import json
-import subprocess
-import requests
-from datetime import datetime
-
-def check_wp_version(wp_path):
-    version_file = os.path.join(wp_path, 'wp-includes', 'version.php')
-    if os.path.exists(version_file):
-        with open(version_file, 'r') as f:
-            content = f.read()
-            version = re.search(r"\$wp_version\s*=\s*'(.+?)'\s*;", content)
-            return version.group(1) if version else "Version non détectée"
-    return "Fichier version.php non trouvé"
-
-def check_php_version():
-    try:
-        result = subprocess.run(['php', '-v'], capture_output=True, text=True)
-        version = re.search(r"PHP (\d+\.\d+\.\d+)", result.stdout)
-        return version.group(1) if version else "Version non détectée"
-    except:
-        return "PHP non trouvé"
-
-def check_plugin_vulnerabilities(plugins_dir):
-    vulnerabilities = []
-    for plugin in os.listdir(plugins_dir):
-        plugin_file = os.path.join(plugins_dir, plugin, f"{plugin}.php")
-        if os.path.exists(plugin_file):
-            with open(plugin_file, 'r') as f:
-                content = f.read()
-                version = re.search(r"Version:\s*(.+)", content)
-                if version:
-                    version = version.group(1)
-                    # Simuler une vérification de vulnérabilité (à remplacer par une API réelle)
-                    if plugin == "plugin vulnerable":
-                        vulnerabilities.append(f"Plugin {plugin} version {version} a des vulnérabilités connues")
-    return vulnerabilities
-
-def check_user_accounts(wp_path):
-    users_file = os.path.join(wp_path, 'wp-content', 'uploads', 'users.csv')
-    if os.path.exists(users_file):
-        with open(users_file, 'r') as f:
-            users = f.read().splitlines()
-        return users[1:] if len(users) > 1 else []
-    return []
-
-def check_file_permissions(wp_path):
-    critical_files = {
-        'wp-config.php': '600',
-        '.htaccess': '644',
-        'index.php': '644',
-        'wp-includes': '755',
-        'wp-admin': '755'
-    }
-    issues = []
-    for file, expected_perm in critical_files.items():
-        full_path = os.path.join(wp_path, file)
-        if os.path.exists(full_path):
-            actual_perm = oct(os.stat(full_path).st_mode)[-3:]
-            if actual_perm != expected_perm:
-                issues.append(f"Permissions incorrectes pour {file}: {actual_perm} (devrait être {expected_perm})")
-    return issues
-
-def check_wp_config(wp_path):
-    config_file = os.path.join(wp_path, 'wp-config.php')
-    issues = []
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            content = f.read()
-            if "define( 'WP_DEBUG', true );" in content:
-                issues.append("WP_DEBUG est activé en production")
-            if not re.search(r"define\(\s*'AUTH_KEY'", content):
-                issues.append("Clés de sécurité WordPress manquantes")
-    return issues
-
-def generate_client_report(vulnerabilities):
-    report = f"""
-Rapport d'Audit de Sécurité WordPress
-
-Date de l'audit : {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-1. Résumé Exécutif
-==================
-Nous avons effectué un audit de sécurité complet de votre installation WordPress. 
-Cet audit a couvert la vérification des versions, l'analyse des vulnérabilités des plugins, 
-l'examen des comptes utilisateurs, les permissions de fichiers et la configuration WordPress.
-
-2. Résultats Clés
-=================
-Nombre total de problèmes détectés : {len(vulnerabilities)}
-
-3. Détails des Vulnérabilités
-=============================
-"""
-    for vuln in vulnerabilities:
-        report += f"- {vuln}\n"
-
-    report += """
-4. Recommandations
-==================
-1. Mettez à jour WordPress, tous les plugins et thèmes vers leurs dernières versions.
-2. Corrigez les permissions de fichiers incorrectes.
-3. Désactivez WP_DEBUG en production.
-4. Assurez-vous que toutes les clés de sécurité WordPress sont définies.
-5. Renforcez la sécurité des comptes utilisateurs.
-6. Effectuez des sauvegardes régulières.
-7. Mettez en place une authentification à deux facteurs.
-
-5. Conclusion
-=============
-Cet audit a identifié plusieurs domaines nécessitant votre attention. 
-En appliquant les recommandations ci-dessus, vous améliorerez significativement 
-la sécurité de votre site WordPress. Nous recommandons d'effectuer des audits 
-réguliers pour maintenir un niveau de sécurité optimal.
-
-Pour toute assistance dans la mise en œuvre de ces recommandations, 
-n'hésitez pas à nous contacter.
-"""
-    return report
-
-def main():
-    wp_path = input("Entrez le chemin de l'installation WordPress : ")
-    
-    vulnerabilities = []
-    
-    # Vérification de la version WordPress
-    wp_version = check_wp_version(wp_path)
-    vulnerabilities.append(f"Version WordPress : {wp_version}")
-    
-    # Vérification de la version PHP
-    php_version = check_php_version()
-    vulnerabilities.append(f"Version PHP : {php_version}")
-    
-    # Vérification des vulnérabilités des plugins
-    plugins_dir = os.path.join(wp_path, 'wp-content', 'plugins')
-    plugin_vulns = check_plugin_vulnerabilities(plugins_dir)
-    vulnerabilities.extend(plugin_vulns)
-    
-    # Vérification des comptes utilisateurs
-    users = check_user_accounts(wp_path)
-    if len(users) > 5:
-        vulnerabilities.append(f"Nombre élevé de comptes utilisateurs : {len(users)}")
-    
-    # Vérification des permissions de fichiers
-    perm_issues = check_file_permissions(wp_path)
-    vulnerabilities.extend(perm_issues)
-    
-    # Vérification de wp-config.php
-    config_issues = check_wp_config(wp_path)
-    vulnerabilities.extend(config_issues)
-    
-    # Génération du rapport client
-    client_report = generate_client_report(vulnerabilities)
-    
-    # Sauvegarde du rapport
-    with open('wordpress_security_audit_report.txt', 'w') as f:
-        f.write(client_report)
-    
-    print("Audit de sécurité terminé. Le rapport a été sauvegardé dans 'wordpress_security_audit_report.txt'")
-
-if __name__ == "__main__":
-    main()
+import os
+import re
+import sys
+import stat
+import json
+import argparse
+import subprocess
+import requests
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from advisory_db import open_default, ECOSYSTEM_WP_CORE, ECOSYSTEM_WP_PLUGIN, ECOSYSTEM_WP_THEME
+
+def check_wp_version(wp_path):
+    version_file = os.path.join(wp_path, 'wp-includes', 'version.php')
+    if os.path.exists(version_file):
+        with open(version_file, 'r') as f:
+            content = f.read()
+            version = re.search(r"\$wp_version\s*=\s*'(.+?)'\s*;", content)
+            return version.group(1) if version else "Version non détectée"
+    return "Fichier version.php non trouvé"
+
+def check_php_version():
+    try:
+        result = subprocess.run(['php', '-v'], capture_output=True, text=True)
+        version = re.search(r"PHP (\d+\.\d+\.\d+)", result.stdout)
+        return version.group(1) if version else "Version non détectée"
+    except:
+        return "PHP non trouvé"
+
+# WordPress ne lit les en-têtes de plugin et de thème que dans les 8 premiers Ko du fichier
+HEADER_BYTES = 8192
+HEADER_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "wp_audit_headers.json")
+
+_HEADER_RE = {
+    "plugin": re.compile(r"^[ \t/*#@]*Plugin Name:(.*)$", re.IGNORECASE | re.MULTILINE),
+    "theme": re.compile(r"^[ \t/*#@]*Theme Name:(.*)$", re.IGNORECASE | re.MULTILINE),
+}
+_VERSION_HEADER_RE = re.compile(r"^[ \t/*#@]*Version:(.*)$", re.IGNORECASE | re.MULTILINE)
+
+# chemin -> [mtime_ns, taille, en-têtes] ; entrées lues ou mises à jour pendant ce run
+_header_cache = None
+_header_cache_updates = {}
+
+def read_file_header(path, kind):
+    """En-têtes {"name", "version"} d'un fichier de plugin ou de thème, None si ce n'en est pas un."""
+    with open(path, 'rb') as f:
+        head = f.read(HEADER_BYTES).decode('utf-8', 'replace').replace('\r', '\n')
+    name = _HEADER_RE[kind].search(head)
+    if not name:
+        return None
+    version = _VERSION_HEADER_RE.search(head)
+    return {"name": name.group(1).strip(), "version": version.group(1).strip() if version else None}
+
+def load_header_cache(cache_path=HEADER_CACHE):
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_header_cache(updates, cache_path=HEADER_CACHE):
+    """Fusionne les entrées mises à jour dans le cache disque."""
+    if not updates:
+        return
+    cache = load_header_cache(cache_path)
+    cache.update(updates)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path + ".tmp", 'w') as f:
+            json.dump(cache, f)
+        os.replace(cache_path + ".tmp", cache_path)
+    except OSError as e:
+        print(f"Impossible d'enregistrer le cache {cache_path} : {e}")
+
+def pop_header_cache_updates():
+    """Entrées du cache modifiées depuis le dernier appel (à renvoyer au processus principal)."""
+    global _header_cache_updates
+    updates, _header_cache_updates = _header_cache_updates, {}
+    return updates
+
+def _cached_header(entry, kind):
+    global _header_cache
+    if _header_cache is None:
+        _header_cache = load_header_cache()
+    st = entry.stat()
+    cached = _header_cache.get(entry.path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    header = read_file_header(entry.path, kind)
+    _header_cache[entry.path] = _header_cache_updates[entry.path] = [st.st_mtime_ns, st.st_size, header]
+    return header
+
+def scan_plugins(plugins_dir):
+    """Inventaire des plugins : liste de {"type", "slug", "name", "version", "file"}.
+
+    Comme WordPress, tous les fichiers .php au premier niveau du dossier d'un
+    plugin sont candidats, pas seulement <plugin>.php ; les plugins d'un seul
+    fichier posés directement dans plugins/ sont aussi reconnus.
+    """
+    inventory = []
+    try:
+        entries = sorted(os.scandir(plugins_dir), key=lambda e: e.name)
+    except OSError:
+        return inventory
+    for entry in entries:
+        if entry.is_dir():
+            try:
+                candidates = sorted((e for e in os.scandir(entry.path) if e.name.endswith('.php') and e.is_file()),
+                                    key=lambda e: e.name != f"{entry.name}.php")
+            except OSError:
+                continue
+            slug = entry.name
+        elif entry.name.endswith('.php') and entry.is_file():
+            candidates = [entry]
+            slug = entry.name[:-4]
+        else:
+            continue
+        for candidate in candidates:
+            header = _cached_header(candidate, "plugin")
+            if header:
+                inventory.append({"type": "plugin", "slug": slug, "file": candidate.path, **header})
+                break
+    return inventory
+
+def scan_themes(themes_dir):
+    """Inventaire des thèmes, lu dans le style.css de chaque dossier de thème."""
+    inventory = []
+    try:
+        entries = sorted(os.scandir(themes_dir), key=lambda e: e.name)
+    except OSError:
+        return inventory
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        try:
+            style = next((e for e in os.scandir(entry.path) if e.name == 'style.css' and e.is_file()), None)
+        except OSError:
+            continue
+        header = _cached_header(style, "theme") if style else None
+        if header:
+            inventory.append({"type": "theme", "slug": entry.name, "file": style.path, **header})
+    return inventory
+
+# Écosystème de la base d'avis (advisory_db.py) et libellé de chaque type de composant
+_ECOSYSTEMS = {"core": ECOSYSTEM_WP_CORE, "plugin": ECOSYSTEM_WP_PLUGIN, "theme": ECOSYSTEM_WP_THEME}
+_LABELS = {"core": "WordPress", "plugin": "Plugin", "theme": "Thème"}
+
+# Connexion à la base d'avis, ouverte une fois par processus (None si la base n'existe pas)
+_advisory_db = {}
+
+NOTICE_NO_ADVISORY_DB = ("Base d'avis absente : vulnérabilités du coeur, des plugins et des thèmes non vérifiées "
+                         "(lancer `python advisory_db.py build <flux>`)")
+
+def get_advisory_db(db_path=None):
+    if db_path not in _advisory_db:
+        _advisory_db[db_path] = open_default(db_path)
+    return _advisory_db[db_path]
+
+def close_advisory_db():
+    """Ferme les connexions du processus : une connexion SQLite ne survit pas à un fork,
+    chaque worker doit ouvrir la sienne."""
+    for db in _advisory_db.values():
+        if db is not None:
+            db.close()
+    _advisory_db.clear()
+
+def advisory_db_available(db_path=None):
+    """Vérifie que la base d'avis existe sans garder de connexion ouverte."""
+    db = open_default(db_path)
+    if db is None:
+        return False
+    db.close()
+    return True
+
+def check_component_vulnerabilities(components, db_path=None):
+    """Constats pour des composants {"type", "slug", "version"}, en une seule requête à la base d'avis."""
+    if not components:
+        return []
+    db = get_advisory_db(db_path)
+    if db is None:
+        # Sans base, aucune version ne peut être vérifiée : le rapport doit le dire
+        return [NOTICE_NO_ADVISORY_DB]
+    matches = db.lookup_many([(_ECOSYSTEMS[c["type"]], c["slug"], c.get("version")) for c in components])
+    vulnerabilities = []
+    for component, advisories in zip(components, matches):
+        name = _LABELS[component["type"]]
+        if component["type"] != "core":
+            name += f" {component['slug']}"
+        for advisory in advisories:
+            details = " : ".join(filter(None, (advisory["advisory_id"], advisory["title"])))
+            vulnerabilities.append(f"{name} version {component['version']} a des vulnérabilités connues"
+                                   + (f" ({details})" if details else ""))
+    return vulnerabilities
+
+def check_plugin_vulnerabilities(plugins_dir, db_path=None):
+    return check_component_vulnerabilities(scan_plugins(plugins_dir), db_path)
+
+def check_theme_vulnerabilities(themes_dir, db_path=None):
+    return check_component_vulnerabilities(scan_themes(themes_dir), db_path)
+
+def check_user_accounts(wp_path):
+    users_file = os.path.join(wp_path, 'wp-content', 'uploads', 'users.csv')
+    if os.path.exists(users_file):
+        with open(users_file, 'r') as f:
+            users = f.read().splitlines()
+        return users[1:] if len(users) > 1 else []
+    return []
+
+def check_file_permissions(wp_path):
+    critical_files = {
+        'wp-config.php': '600',
+        '.htaccess': '644',
+        'index.php': '644',
+        'wp-includes': '755',
+        'wp-admin': '755'
+    }
+    issues = []
+    for file, expected_perm in critical_files.items():
+        full_path = os.path.join(wp_path, file)
+        if os.path.exists(full_path):
+            actual_perm = oct(os.stat(full_path).st_mode)[-3:]
+            if actual_perm != expected_perm:
+                issues.append(f"Permissions incorrectes pour {file}: {actual_perm} (devrait être {expected_perm})")
+    return issues
+
+# Règles appliquées à toute l'arborescence, en plus des fichiers critiques de
+# check_file_permissions : (nom, motif, type, contrainte, description)
+#   motif      : glob relatif à l'installation ; ** traverse les dossiers, * et ? non
+#   type       : "f" fichiers, "d" dossiers, None les deux
+#   contrainte : "max 644" (aucun bit en plus de 644), "exact 600" ou "deny 002" (bits interdits)
+# Les règles "max" sont des règles d'hygiène : elles ne portent que sur le code
+# (racine, coeur, plugins, thèmes) et ne signalent pas un chemin déjà signalé
+# par une autre règle.
+SENSITIVE_DIRS = ("wp-admin", "wp-includes", "wp-content/plugins", "wp-content/themes")
+
+PERMISSION_RULES = [
+    ("world-writable", "**", None, "deny 002", "Fichiers ou dossiers modifiables par tous"),
+    ("uploads-php-executable", "wp-content/uploads/**/*.php", "f", "deny 111", "Fichiers PHP exécutables dans uploads"),
+    ("files-644", "*", "f", "max 644", "Fichiers plus permissifs que 644"),
+    ("dirs-755", "*", "d", "max 755", "Dossiers plus permissifs que 755"),
+] + [
+    (name, f"{directory}/**", kind, constraint, description)
+    for directory in SENSITIVE_DIRS
+    for name, kind, constraint, description in (
+        ("files-644", "f", "max 644", "Fichiers plus permissifs que 644"),
+        ("dirs-755", "d", "max 755", "Dossiers plus permissifs que 755"),
+    )
+]
+
+def compile_glob(pattern):
+    """(préfixe littéral, regex) d'un motif glob ; regex vaut None pour ** (tout chemin)."""
+    if pattern == "**":
+        return "", None
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    prefix = re.split(r"[*?]", pattern, maxsplit=1)[0]
+    return prefix, re.compile("".join(regex) + r"\Z")
+
+def compile_permission_rules(rules=PERMISSION_RULES):
+    """Règles prêtes à l'emploi : (nom, préfixe, regex, type, masque, valeur attendue, description, hygiène).
+
+    Un chemin enfreint la règle si (mode & masque) != valeur attendue. Une règle
+    d'hygiène ("max") ignore un chemin déjà signalé par une règle précédente.
+    """
+    compiled = []
+    for name, pattern, kind, constraint, description in rules:
+        operator, mode = constraint.split()
+        mode = int(mode, 8)
+        if operator == "exact":
+            mask, value = 0o7777, mode
+        elif operator == "max":
+            mask, value = 0o7777 & ~mode, 0
+        elif operator == "deny":
+            mask, value = mode, 0
+        else:
+            raise ValueError(f"Contrainte inconnue pour {name} : {constraint}")
+        prefix, regex = compile_glob(pattern)
+        compiled.append((name, prefix, regex, kind, mask, value, description, operator == "max"))
+    return compiled
+
+def _rules_for_dir(rules, rel_dir):
+    # Seules les règles dont le préfixe littéral peut concerner ce dossier sont évaluées
+    base = rel_dir + "/" if rel_dir else ""
+    return [rule for rule in rules if base.startswith(rule[1]) or rule[1].startswith(base)]
+
+def _scan_permissions(path, rel_dir, rules):
+    # Retourne (sous-dossiers, infractions) ; un seul appel scandir, un lstat par entrée
+    subdirs = []
+    violations = []
+    rules = _rules_for_dir(rules, rel_dir)
+    base = rel_dir + "/" if rel_dir else ""
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_symlink():
+                        continue
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    mode = entry.stat(follow_symlinks=False).st_mode
+                except OSError:
+                    continue
+                rel = base + entry.name
+                if is_dir:
+                    subdirs.append((entry.path, rel))
+                kind = "d" if is_dir else "f"
+                reported = set()
+                for name, prefix, regex, rule_kind, mask, value, _, hygiene in rules:
+                    if hygiene and reported:
+                        continue
+                    if name not in reported and (mode & mask) != value and (rule_kind is None or rule_kind == kind) \
+                            and rel.startswith(prefix) and (regex is None or regex.match(rel)):
+                        reported.add(name)
+                        violations.append((name, rel, oct(stat.S_IMODE(mode))[2:]))
+    except OSError:
+        pass
+    return subdirs, violations
+
+def audit_permissions(wp_path, rules=PERMISSION_RULES, workers=16):
+    """Parcourt toute l'installation en parallèle et regroupe les chemins fautifs par règle.
+
+    Retourne {nom de règle: [(chemin relatif, mode octal), ...]} pour les règles enfreintes.
+    """
+    compiled = compile_permission_rules(rules)
+    report = {}
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {pool.submit(_scan_permissions, wp_path, "", compiled)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirs, violations = future.result()
+                for name, rel, mode in violations:
+                    report.setdefault(name, []).append((rel, mode))
+                for path, rel in subdirs:
+                    pending.add(pool.submit(_scan_permissions, path, rel, compiled))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return {rule[0]: sorted(report[rule[0]]) for rule in compiled if rule[0] in report}
+
+def check_tree_permissions(wp_path, rules=PERMISSION_RULES, examples=5):
+    """Constats résumés par règle pour toute l'arborescence de l'installation."""
+    descriptions = {name: description for name, _, _, _, description in rules}
+    issues = []
+    for name, paths in audit_permissions(wp_path, rules).items():
+        sample = ", ".join(f"{rel} ({mode})" for rel, mode in paths[:examples])
+        more = f", ... (+{len(paths) - examples})" if len(paths) > examples else ""
+        issues.append(f"{descriptions[name]} : {len(paths)} chemin(s) : {sample}{more}")
+    return issues
+
+def check_wp_config(wp_path):
+    config_file = os.path.join(wp_path, 'wp-config.php')
+    issues = []
+    if os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            content = f.read()
+            if "define( 'WP_DEBUG', true );" in content:
+                issues.append("WP_DEBUG est activé en production")
+            if not re.search(r"define\(\s*'AUTH_KEY'", content):
+                issues.append("Clés de sécurité WordPress manquantes")
+    return issues
+
+def generate_client_report(vulnerabilities):
+    report = f"""
+Rapport d'Audit de Sécurité WordPress
+
+Date de l'audit : {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+
+1. Résumé Exécutif
+==================
+Nous avons effectué un audit de sécurité complet de votre installation WordPress. 
+Cet audit a couvert la vérification des versions, l'analyse des vulnérabilités des plugins, 
+l'examen des comptes utilisateurs, les permissions de fichiers et la configuration WordPress.
+
+2. Résultats Clés
+=================
+Nombre total de problèmes détectés : {len(vulnerabilities)}
+
+3. Détails des Vulnérabilités
+=============================
+"""
+    for vuln in vulnerabilities:
+        report += f"- {vuln}\n"
+
+    report += """
+4. Recommandations
+==================
+1. Mettez à jour WordPress, tous les plugins et thèmes vers leurs dernières versions.
+2. Corrigez les permissions de fichiers incorrectes.
+3. Désactivez WP_DEBUG en production.
+4. Assurez-vous que toutes les clés de sécurité WordPress sont définies.
+5. Renforcez la sécurité des comptes utilisateurs.
+6. Effectuez des sauvegardes régulières.
+7. Mettez en place une authentification à deux facteurs.
+
+5. Conclusion
+=============
+Cet audit a identifié plusieurs domaines nécessitant votre attention. 
+En appliquant les recommandations ci-dessus, vous améliorerez significativement 
+la sécurité de votre site WordPress. Nous recommandons d'effectuer des audits 
+réguliers pour maintenir un niveau de sécurité optimal.
+
+Pour toute assistance dans la mise en œuvre de ces recommandations, 
+n'hésitez pas à nous contacter.
+"""
+    return report
+
+def audit_site(wp_path, php_version=None, wp_version=None):
+    """Liste des constats pour une installation. php_version évite de relancer `php -v` par site."""
+    vulnerabilities = []
+    
+    # Vérification de la version WordPress
+    if wp_version is None:
+        wp_version = check_wp_version(wp_path)
+    vulnerabilities.append(f"Version WordPress : {wp_version}")
+    
+    # Vérification de la version PHP
+    if php_version is None:
+        php_version = check_php_version()
+    vulnerabilities.append(f"Version PHP : {php_version}")
+    
+    # Vérification des vulnérabilités du coeur, des plugins et des thèmes, en une seule recherche
+    components = []
+    if re.match(r"\d", wp_version):
+        components.append({"type": "core", "slug": "wordpress", "version": wp_version})
+    components += scan_plugins(os.path.join(wp_path, 'wp-content', 'plugins'))
+    components += scan_themes(os.path.join(wp_path, 'wp-content', 'themes'))
+    vulnerabilities.extend(check_component_vulnerabilities(components))
+    
+    # Vérification des comptes utilisateurs
+    users = check_user_accounts(wp_path)
+    if len(users) > 5:
+        vulnerabilities.append(f"Nombre élevé de comptes utilisateurs : {len(users)}")
+    
+    # Vérification des permissions de fichiers
+    perm_issues = check_file_permissions(wp_path)
+    vulnerabilities.extend(perm_issues)
+    vulnerabilities.extend(check_tree_permissions(wp_path))
+    
+    # Vérification de wp-config.php
+    config_issues = check_wp_config(wp_path)
+    vulnerabilities.extend(config_issues)
+
+    return vulnerabilities
+
+# Répertoires jamais parcourus à la recherche d'installations : coeur WordPress,
+# contenus (plugins, uploads) et dépendances
+PRUNED_DIRS = {'wp-admin', 'wp-includes', 'wp-content', 'node_modules', 'vendor', '.git'}
+
+def find_wordpress_installs(root):
+    """Chemins des installations WordPress sous root (un répertoire avec wp-includes/version.php)."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        if 'wp-includes' in dirnames and os.path.isfile(os.path.join(dirpath, 'wp-includes', 'version.php')):
+            yield dirpath
+        dirnames[:] = [d for d in dirnames if d not in PRUNED_DIRS]
+
+def host_facts():
+    """Faits communs à tous les sites de la machine, calculés une seule fois."""
+    return {"php_version": check_php_version()}
+
+def _audit_site_entry(wp_path, php_version):
+    try:
+        wp_version = check_wp_version(wp_path)
+        return {"path": wp_path, "wp_version": wp_version,
+                "findings": audit_site(wp_path, php_version, wp_version)}, pop_header_cache_updates()
+    except Exception as e:
+        return {"path": wp_path, "error": str(e)}, pop_header_cache_updates()
+
+def audit_sites(paths, jobs=None):
+    """Audite les installations sur un pool de processus ; retourne le rapport consolidé."""
+    paths = list(paths)
+    facts = host_facts()
+    close_advisory_db()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(_audit_site_entry, paths, [facts["php_version"]] * len(paths),
+                                chunksize=max(1, len(paths) // 64)))
+    # Les workers renvoient leurs entrées de cache : un seul processus écrit le fichier
+    updates = {}
+    for _, site_updates in results:
+        updates.update(site_updates)
+    save_header_cache(updates)
+    sites = [site for site, _ in results]
+    return {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "host": facts,
+        "sites": sites,
+        "summary": {
+            "sites": len(sites),
+            "errors": sum(1 for site in sites if "error" in site),
+            # Les deux premiers constats sont les versions WordPress et PHP
+            "issues": sum(len(site.get("findings", [])[2:]) for site in sites),
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit de sécurité WordPress")
+    parser.add_argument("roots", nargs="*", help="répertoires où rechercher les installations WordPress (mode batch)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="nombre de processus (défaut : nombre de CPU)")
+    parser.add_argument("-o", "--output", default="wordpress_security_audit_report.json",
+                        help="rapport JSON consolidé du mode batch")
+    args = parser.parse_args()
+
+    if args.roots:
+        paths = [path for root in args.roots for path in find_wordpress_installs(root)]
+        if not advisory_db_available():
+            print(NOTICE_NO_ADVISORY_DB, file=sys.stderr)
+        report = audit_sites(paths, jobs=args.jobs)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"{len(paths)} installations auditées. Le rapport a été sauvegardé dans '{args.output}'", file=sys.stderr)
+        return
+
+    wp_path = input("Entrez le chemin de l'installation WordPress : ")
+    
+    vulnerabilities = audit_site(wp_path)
+    save_header_cache(pop_header_cache_updates())
+    
+    # Génération du rapport client
+    client_report = generate_client_report(vulnerabilities)
+    
+    # Sauvegarde du rapport
+    with open('wordpress_security_audit_report.txt', 'w') as f:
+        f.write(client_report)
+    
+    print("Audit de sécurité terminé. Le rapport a été sauvegardé dans 'wordpress_security_audit_report.txt'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import json
+import asyncio
+
+# Client minimal de l'API Docker Engine sur la socket unix, sans passer par le CLI.
+# DOCKER_HOST=unix:///chemin/vers/socket permet de viser une autre socket
+# (par exemple un faux serveur local pour tester sans démon Docker).
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+
+class DockerAPIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+def socket_path_from_env():
+    host = os.environ.get("DOCKER_HOST", "")
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    return DEFAULT_SOCKET
+
+class DockerClient:
+    """Client HTTP/1.1 asynchrone avec un pool de connexions keep-alive."""
+
+    def __init__(self, socket_path=None, pool_size=8, timeout=10):
+        self.socket_path = socket_path or socket_path_from_env()
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            writer.close()
+
+    async def _send(self, conn, method, path):
+        reader, writer = conn
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: docker\r\nAccept: application/json\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connexion fermée par le serveur")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                body += await reader.readexactly(size)
+                await reader.readline()
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+        keep_alive = headers.get("connection", "").lower() != "close" and (
+            "content-length" in headers or "transfer-encoding" in headers)
+        return status, bytes(body), keep_alive
+
+    async def request(self, method, path):
+        """Envoie une requête et retourne le corps JSON décodé."""
+        async with self._slots:
+            # Une connexion keep-alive peut avoir été fermée entre-temps : un seul nouvel essai
+            for attempt in range(2):
+                fresh = not self._idle
+                conn = self._idle.pop() if self._idle else await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.socket_path), self.timeout)
+                try:
+                    status, body, keep_alive = await asyncio.wait_for(self._send(conn, method, path), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                    conn[1].close()
+                    if fresh or attempt:
+                        raise
+                    continue
+                except BaseException:
+                    # Délai dépassé, annulation... : la réponse a pu être lue à moitié,
+                    # la connexion n'est plus utilisable et ne retourne pas au pool
+                    conn[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                break
+        data = json.loads(body) if body else None
+        if status >= 400:
+            message = data.get("message", "") if isinstance(data, dict) else body.decode(errors="replace")
+            raise DockerAPIError(status, message)
+        return data
+
+    async def containers(self, all=True):
+        return await self.request("GET", "/containers/json?all=1" if all else "/containers/json")
+
+    async def inspect(self, container_id):
+        return await self.request("GET", f"/containers/{container_id}/json")
+
+    async def inspect_all(self):
+        containers = await self.containers()
+        results = await asyncio.gather(*(self.inspect(c["Id"]) for c in containers), return_exceptions=True)
+        inspected = []
+        for result in results:
+            # Un conteneur supprimé pendant le run renvoie 404 : on l'ignore
+            if isinstance(result, DockerAPIError) and result.status == 404:
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            inspected.append(result)
+        return inspected
+
+    async def info(self):
+        return await self.request("GET", "/info")
+
+    async def version(self):
+        return await self.request("GET", "/version")
+
+async def _collect(socket_path):
+    async with DockerClient(socket_path) as client:
+        containers, info, version = await asyncio.gather(client.inspect_all(), client.info(), client.version())
+    return {"containers": containers, "info": info, "version": version}
+
+_state = None
+
+def engine_state(socket_path=None, refresh=False):
+    """Conteneurs inspectés, `docker info` et `docker version` récupérés en parallèle,
+    une seule fois par run. Retourne None si la socket n'est pas joignable."""
+    global _state
+    if _state is not None and not refresh:
+        return _state
+    path = socket_path or socket_path_from_env()
+    if not os.path.exists(path):
+        return None
+    try:
+        _state = asyncio.run(_collect(path))
+    except (OSError, asyncio.TimeoutError, DockerAPIError, ValueError) as e:
+        print(f"API Docker indisponible sur {path} ({e}), utilisation du CLI.")
+        return None
+    return _state
@@ -1,41 +1,152 @@
+import json
+import time
 import subprocess
 
+from docker_api import engine_state
+from package_inventory import installed_version, version_at_least
+
+DOCKER_SOCKET = "/var/run/docker.sock"
+
+# Versions minimales des paquets du dépôt Docker : runc corrigé pour
+# CVE-2024-21626 (« Leaky Vessels ») à partir de ces versions
+PACKAGE_MINIMUMS = {"docker-ce": "25.0.2", "containerd.io": "1.6.28"}
+
+# Au-delà, la liste d'IDs est découpée pour rester sous la limite d'arguments du shell
+INSPECT_BATCH_SIZE = 1000
+
+# Instantané de `docker inspect` partagé par toutes les vérifications du run
+_snapshot = None
+
+# Coût de chaque vérification en millisecondes (sans l'attente de l'instantané),
+# rempli au fil du run et ajouté au rapport par main.py
+CHECK_COSTS = {}
+
+def timed_check(func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            CHECK_COSTS[func.__name__] = (time.perf_counter() - start) * 1000
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
 def get_container_ids():
     try:
-        result = subprocess.run("docker ps -aq", shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        result = subprocess.run(["docker", "ps", "-aq", "--no-trunc"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         if result.returncode == 0:
-            return result.stdout.decode().strip().split('\n')
+            return result.stdout.decode().split()
         else:
             return []
     except Exception as e:
         print(f"An error occurred while getting container IDs: {e}")
         return []
 
+def get_containers_snapshot(refresh=False):
+    """JSON `docker inspect` de tous les conteneurs, récupéré en un seul appel et mis en cache pour le run."""
+    global _snapshot
+    if _snapshot is not None and not refresh:
+        return _snapshot
+    start = time.perf_counter()
+    # L'API sur la socket évite de lancer le CLI ; le CLI reste le repli
+    state = engine_state(refresh=refresh)
+    if state is not None:
+        CHECK_COSTS["snapshot"] = (time.perf_counter() - start) * 1000
+        _snapshot = state["containers"]
+        return _snapshot
+    containers = []
+    ids = get_container_ids()
+    for i in range(0, len(ids), INSPECT_BATCH_SIZE):
+        try:
+            result = subprocess.run(["docker", "inspect", *ids[i:i + INSPECT_BATCH_SIZE]], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            # Un conteneur supprimé entre ps et inspect fait échouer la commande mais
+            # la sortie contient quand même les autres conteneurs
+            if result.stdout.strip():
+                containers.extend(json.loads(result.stdout))
+        except (OSError, ValueError) as e:
+            print(f"An error occurred while running docker inspect: {e}")
+    CHECK_COSTS["snapshot"] = (time.perf_counter() - start) * 1000
+    _snapshot = containers
+    return _snapshot
+
+def _name(container):
+    return container.get("Name", "").lstrip("/")
+
+def _running(container):
+    return (container.get("State") or {}).get("Running", False)
+
+@timed_check
 def does_root_have_containers():
-    try:
-        result = subprocess.run("docker inspect $(docker ps -q) --format '{{.Config.User}} {{.Name}}'", shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if result.returncode == 0:
-            output = result.stdout.decode().strip().split('\n')
-            return [line.split() for line in output]
-        else:
-            return []
-    except Exception as e:
-        print(f"An error occurred while running docker inspect: {e}")
-        return []
+    """Conteneurs en cours d'exécution sans utilisateur dédié (donc root) : liste de [user, nom]."""
+    rootful = []
+    for container in get_containers_snapshot():
+        if not _running(container):
+            continue
+        user = (container.get("Config") or {}).get("User") or ""
+        if user.split(":")[0] in ("", "root", "0"):
+            rootful.append([user or "root", _name(container)])
+    return rootful
+
+@timed_check
+def does_containers_mount_socket():
+    for container in get_containers_snapshot():
+        binds = (container.get("HostConfig") or {}).get("Binds") or []
+        mounts = [mount.get("Source", "") for mount in container.get("Mounts") or []]
+        if any(DOCKER_SOCKET in bind for bind in binds) or DOCKER_SOCKET in mounts:
+            return True
+    return False
+
+@timed_check
+def privileged_containers():
+    return [_name(c) for c in get_containers_snapshot() if (c.get("HostConfig") or {}).get("Privileged")]
+
+@timed_check
+def containers_with_added_capabilities():
+    """Conteneurs avec des capabilities ajoutées : liste de [nom, capabilities]."""
+    result = []
+    for container in get_containers_snapshot():
+        caps = (container.get("HostConfig") or {}).get("CapAdd") or []
+        if caps:
+            result.append([_name(container), caps])
+    return result
+
+@timed_check
+def host_network_containers():
+    return [_name(c) for c in get_containers_snapshot() if (c.get("HostConfig") or {}).get("NetworkMode") == "host"]
+
+def outdated_packages(minimums=PACKAGE_MINIMUMS):
+    """Paquets installés sous leur version minimale : liste de [paquet, version, minimum].
+
+    Un paquet absent n'est pas signalé ; None si l'inventaire des paquets est inconnu.
+    """
+    outdated = []
+    for name, minimum in minimums.items():
+        up_to_date = version_at_least(name, minimum)
+        if up_to_date is None:
+            return None
+        version = installed_version(name)
+        if version is not None and not up_to_date:
+            outdated.append([name, version, minimum])
+    return outdated
+
+def check_package_versions():
+    """True si docker-ce et containerd.io sont au moins aux versions minimales, None si inconnu."""
+    outdated = outdated_packages()
+    if outdated is None:
+        print("Inventaire des paquets indisponible : versions de docker-ce et containerd.io non vérifiées.")
+        return None
+    for name, version, minimum in outdated:
+        print(f"{name} {version} est antérieur à la version minimale {minimum}.")
+    return not outdated
 
 def is_rootless():
+    state = engine_state()
+    if state is not None:
+        return any("rootless" in option for option in state["info"].get("SecurityOptions") or [])
     result = subprocess.run('docker info -f "{{println .SecurityOptions}}" | grep rootless', shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     return True if result.stdout else False
 
 def is_tcp_socket():
     result = subprocess.check_output(["netstat", "-tunlp"], stderr=subprocess.STDOUT, text=True)
     return True if ":2375" in result else False
-
-def does_containers_mount_socket():
-    containers = get_container_ids()
-    for container in containers:
-        print(container)
-        result = subprocess.check_output(["docker", "inspect", "-format='{{.HostConfig.Binds}}'", container], stderr=subprocess.STDOUT, text=True)
-        if "/var/run/docker.sock" in result:
-            return True
-    return False
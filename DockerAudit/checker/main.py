@@ -1,42 +1,105 @@
+import sys
+import json
+import argparse
+
 from version_checker import *
 from docker_checker import *
 from package_checker import *
+from docker_api import engine_state
+from scheduler import Scheduler, STATUS_OK
 from prettytable import PrettyTable
 from rich.console import Console
 from rich.syntax import Syntax
 
+# Libellé affiché -> nom de la vérification dans le résultat JSON
+LABELS = {
+    "docker_up_to_date": "Docker engine à jour? ",
+    "no_root_containers": "Conteneurs exécutés sans augmentation de privilège ?",
+    "rootless": "Docker en mode rootless ?",
+    "local_socket_only": "Socket seulement en local ?",
+    "auditd_installed": "Auditd installé ?",
+    "packages_up_to_date": "docker-ce et containerd.io aux versions minimales ?",
+    "socket_not_mounted": "Aucun socket monté dans un container ?",
+    "no_privileged_containers": "Aucun conteneur privilégié ?",
+    "no_cap_add": "Aucune capability ajoutée ?",
+    "no_host_network": "Aucun conteneur en réseau host ?",
+}
+
+def build_scheduler(timeout):
+    scheduler = Scheduler(default_timeout=timeout)
 
-    
+    # Données partagées, calculées une seule fois
+    scheduler.add("engine", engine_state, report=False)
+    scheduler.add("latest_version", get_latest_docker_version, report=False)
+    scheduler.add("local_version", lambda engine: get_local_docker_version(), deps=["engine"], report=False)
+    scheduler.add("containers", lambda engine: get_containers_snapshot(), deps=["engine"], report=False)
+
+    # Vérifications
+    scheduler.add("docker_up_to_date", lambda latest, local: latest is not None and latest == local,
+                  deps=["latest_version", "local_version"])
+    scheduler.add("no_root_containers", lambda containers: not does_root_have_containers(), deps=["containers"])
+    scheduler.add("rootless", lambda engine: is_rootless(), deps=["engine"])
+    scheduler.add("local_socket_only", lambda: not is_tcp_socket())
+    scheduler.add("auditd_installed", check_auditd_installed)
+    scheduler.add("packages_up_to_date", check_package_versions)
+    scheduler.add("socket_not_mounted", lambda containers: not does_containers_mount_socket(), deps=["containers"])
+    scheduler.add("no_privileged_containers", lambda containers: not privileged_containers(), deps=["containers"])
+    scheduler.add("no_cap_add", lambda containers: not containers_with_added_capabilities(), deps=["containers"])
+    scheduler.add("no_host_network", lambda containers: not host_network_containers(), deps=["containers"])
+    return scheduler
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Audit de la configuration Docker")
+    parser.add_argument("--json", action="store_true", help="affiche le résultat et la trace d'exécution en JSON")
+    parser.add_argument("--timeout", type=float, default=30, help="délai maximum par vérification (secondes)")
+    args = parser.parse_args()
+
+    report = build_scheduler(args.timeout).run()
+    # Coût propre de chaque vérification par conteneur, instantané compris
+    report["check_costs_ms"] = {name: round(ms, 1) for name, ms in sorted(CHECK_COSTS.items())}
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False, default=str)
+        print()
+        sys.exit(0)
+
     console = Console()
+    results = report["results"]
 
 # Commande à afficher
     command = "sudo apt update && apt upgrade docker-ce docker-ce-cli containerd.io docker-buildx-plugin docker-compose-plugin"
     syntax = Syntax(command, "bash", theme="monokai", line_numbers=True)
 
 # Vérification de la version Docker
-    if get_latest_docker_version() != get_local_docker_version():
+    if results["docker_up_to_date"]["status"] == STATUS_OK and not results["docker_up_to_date"]["value"]:
         # Affichage du message suivi de la commande en syntaxe colorée
         print("Docker n'est pas à jour, il est recommandé de le mettre à jour via :")
         console.print(syntax)
-    
-    results = {
-        "Docker engine à jour? ":  "✓" if get_latest_docker_version() == get_local_docker_version() else "X",
-        "Conteneurs exécutés sans augmentation de privilège ?":  "✓" if not does_root_have_containers() else "X",
-        "Docker en mode rootless ?": "✓" if is_rootless() else "X",
-        "Socket seulement en local ?": "✓" if not is_tcp_socket() else "X",
-        "Auditd installé ?": "✓" if check_auditd_installed() else "X",
-        "Socket monté dans un container ?": "✓" if does_containers_mount_socket() else "X",
-    }
 
     # Display results in a clean table format
 
     table = PrettyTable()
     table.field_names = ["Check", "Result"]
-    for key, value in results.items():
-        table.add_row([key, value])
+    for name, label in LABELS.items():
+        result = results[name]
+        if result["status"] != STATUS_OK:
+            table.add_row([label, result["status"]])
+        else:
+            # None : la vérification n'a pas pu conclure (inventaire inconnu...)
+            table.add_row([label, "?" if result["value"] is None else "✓" if result["value"] else "X"])
 
     print(table)
 
-    
+    # Trace d'exécution : les vérifications indépendantes se chevauchent
+    trace = PrettyTable()
+    trace.field_names = ["Tâche", "Début (ms)", "Fin (ms)"]
+    for entry in report["trace"]:
+        trace.add_row([entry["name"], entry["start_ms"], entry["end_ms"]])
+    print(trace)
+
+    costs = PrettyTable()
+    costs.field_names = ["Vérification", "Coût (ms)"]
+    for name, ms in report["check_costs_ms"].items():
+        costs.add_row([name, ms])
+    print(costs)
+    print(f"Durée totale : {report['total_ms']} ms")
@@ -1,19 +1,22 @@
-import subprocess
 from rich.console import Console
 from rich.text import Text
+from package_inventory import is_installed
 
 # Créer une instance de Console pour afficher des messages stylisés
 console = Console()
 
 def check_auditd_installed():
     try:
-        # Exécute la commande pour vérifier si auditd est installé
-        result = subprocess.run(['dpkg', '-l'], capture_output=True, text=True)
-        
-        # Vérifie si auditd est dans la sortie
-        if 'auditd' in result.stdout:
+        # Recherche exacte dans l'inventaire dpkg/rpm (auditd-plugins ne compte pas)
+        installed = [is_installed('auditd'), is_installed('audit')]
+        if None in installed:
+            # Aucune base de paquets lisible : ni présent ni absent
+            console.print("[bold yellow]Inventaire des paquets indisponible : impossible de vérifier auditd.[/bold yellow]")
+            return None
+        if any(installed):
             # Affiche un message stylisé en vert si auditd est installé
             console.print("[bold green]auditd est installé.[/bold green]")
+            return True
         else:
             # Affiche un message d'erreur stylisé en rouge avec plus de détails
             console.print("[bold red]Erreur : auditd n'est pas installé sur cette machine.[/bold red]")
@@ -28,7 +31,9 @@ def check_auditd_installed():
             
             console.print("\n[bold cyan]- Étape 3 : Redémarrer le service auditd[/bold cyan]")
             console.print("  [italic]systemctl restart auditd[/italic]  # Redémarre le service auditd pour appliquer les modifications\n")
+            return False
     
     except Exception as e:
         # En cas d'erreur dans l'exécution, affiche le message en rouge
         console.print(f"[bold red]Erreur lors de la vérification : {e}[/bold red]")
+        return False
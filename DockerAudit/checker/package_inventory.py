@@ -0,0 +1,194 @@
+import os
+import re
+import struct
+import sqlite3
+import subprocess
+
+# Inventaire des paquets installés lu directement dans la base dpkg (ou rpm),
+# sans lancer `dpkg -l`. L'index nom -> version est gardé en mémoire tant que
+# le fichier de base n'a pas été modifié. Les bases rpm Berkeley DB (RHEL 7/8)
+# et ndb (SUSE) ne sont pas lues directement : elles passent par `rpm -qa`.
+# Si aucune base n'est lisible, l'inventaire est inconnu (None), pas vide.
+
+DPKG_STATUS = "/var/lib/dpkg/status"
+RPM_DB = "/var/lib/rpm/rpmdb.sqlite"
+RPM_NDB = "/var/lib/rpm/Packages.db"
+RPM_BDB = "/var/lib/rpm/Packages"
+RPM_QUERYFORMAT = "%{NAME}\\t%|EPOCH?{%{EPOCH}:}|%{VERSION}-%{RELEASE}\\n"
+RPM_TIMEOUT = 60
+
+# Tags des en-têtes RPM utiles ici
+RPMTAG_NAME = 1000
+RPMTAG_VERSION = 1001
+RPMTAG_RELEASE = 1002
+RPMTAG_EPOCH = 1003
+
+# chemin -> (mtime, index)
+_cache = {}
+
+def parse_dpkg_status(path=DPKG_STATUS):
+    """Index nom -> version des paquets installés, lu paragraphe par paragraphe."""
+    index = {}
+    name = version = status = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line == "\n":
+                if name and version and status and status.endswith(" installed"):
+                    index[name] = version
+                name = version = status = None
+            elif line.startswith("Package:"):
+                name = line[8:].strip()
+            elif line.startswith("Version:"):
+                version = line[8:].strip()
+            elif line.startswith("Status:"):
+                status = line[7:].strip()
+    if name and version and status and status.endswith(" installed"):
+        index[name] = version
+    return index
+
+def _rpm_header_fields(blob, wanted):
+    # En-tête RPM : nombre d'entrées, taille des données, entrées (tag, type, offset, count), données
+    count, data_size = struct.unpack(">II", blob[:8])
+    data_start = 8 + count * 16
+    fields = {}
+    for i in range(count):
+        tag, kind, offset, n = struct.unpack(">IIII", blob[8 + i * 16:24 + i * 16])
+        if tag not in wanted:
+            continue
+        position = data_start + offset
+        if kind == 6:  # STRING
+            fields[tag] = blob[position:blob.index(b"\0", position)].decode("utf-8", "replace")
+        elif kind == 4:  # INT32
+            fields[tag] = struct.unpack(">I", blob[position:position + 4])[0]
+    return fields
+
+def parse_rpmdb(path=RPM_DB):
+    """Index nom -> version depuis la base rpm au format sqlite (RHEL 9, Fedora 33+)."""
+    index = {}
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for (blob,) in connection.execute("SELECT blob FROM Packages"):
+            fields = _rpm_header_fields(bytes(blob), (RPMTAG_NAME, RPMTAG_VERSION, RPMTAG_RELEASE, RPMTAG_EPOCH))
+            if RPMTAG_NAME not in fields:
+                continue
+            version = fields.get(RPMTAG_VERSION, "")
+            if RPMTAG_RELEASE in fields:
+                version += "-" + fields[RPMTAG_RELEASE]
+            if fields.get(RPMTAG_EPOCH):
+                version = f"{fields[RPMTAG_EPOCH]}:{version}"
+            index[fields[RPMTAG_NAME]] = version
+    finally:
+        connection.close()
+    return index
+
+def query_rpm(path):
+    """Index nom -> version via `rpm -qa` sur la base de path, None si rpm est indisponible."""
+    command = ["rpm", "-qa", "--dbpath", os.path.dirname(path), "--queryformat", RPM_QUERYFORMAT]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=RPM_TIMEOUT, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    index = {}
+    for line in output.splitlines():
+        name, _, version = line.partition("\t")
+        if name:
+            index[name] = version
+    return index
+
+def _parse_rpmdb_or_query(path):
+    # Base sqlite verrouillée ou d'un schéma inattendu : rpm sait la lire
+    try:
+        return parse_rpmdb(path)
+    except sqlite3.DatabaseError:
+        return query_rpm(path)
+
+def installed_packages():
+    """Index nom -> version des paquets installés (dpkg, sinon rpm), mis en cache par mtime.
+
+    None si l'inventaire est inconnu : aucune base trouvée, ou base rpm
+    illisible sans la commande rpm.
+    """
+    for path, parser in ((DPKG_STATUS, parse_dpkg_status), (RPM_DB, _parse_rpmdb_or_query),
+                         (RPM_NDB, query_rpm), (RPM_BDB, query_rpm)):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        index = parser(path)
+        if index is not None:
+            _cache[path] = (mtime, index)
+        return index
+    return None
+
+def installed_version(name):
+    packages = installed_packages()
+    return None if packages is None else packages.get(name)
+
+def is_installed(name):
+    """True ou False, None si l'inventaire des paquets est inconnu."""
+    packages = installed_packages()
+    return None if packages is None else name in packages
+
+_VERSION_RE = re.compile(r"^(?:(\d+):)?(.*?)(?:-([^-]*))?$")
+
+def _order(c):
+    # Ordre dpkg : '~' avant tout, puis la fin de chaîne, puis les lettres, puis le reste
+    if c == "~":
+        return -1
+    if c.isalpha():
+        return ord(c)
+    return ord(c) + 256
+
+def _compare_part(a, b):
+    while a or b:
+        # Partie non numérique
+        i = j = 0
+        while i < len(a) and not a[i].isdigit():
+            i += 1
+        while j < len(b) and not b[j].isdigit():
+            j += 1
+        sa, sb = a[:i], b[:j]
+        for k in range(max(len(sa), len(sb))):
+            ca = _order(sa[k]) if k < len(sa) else 0
+            cb = _order(sb[k]) if k < len(sb) else 0
+            if ca != cb:
+                return -1 if ca < cb else 1
+        a, b = a[i:], b[j:]
+        # Partie numérique
+        i = j = 0
+        while i < len(a) and a[i].isdigit():
+            i += 1
+        while j < len(b) and b[j].isdigit():
+            j += 1
+        na, nb = int(a[:i] or 0), int(b[:j] or 0)
+        if na != nb:
+            return -1 if na < nb else 1
+        a, b = a[i:], b[j:]
+    return 0
+
+def compare_versions(a, b):
+    """Compare deux versions à la manière de dpkg : -1, 0 ou 1."""
+    epoch_a, upstream_a, revision_a = _VERSION_RE.match(a).groups()
+    epoch_b, upstream_b, revision_b = _VERSION_RE.match(b).groups()
+    if int(epoch_a or 0) != int(epoch_b or 0):
+        return -1 if int(epoch_a or 0) < int(epoch_b or 0) else 1
+    return _compare_part(upstream_a, upstream_b) or _compare_part(revision_a or "", revision_b or "")
+
+def version_at_least(name, minimum):
+    """True si le paquet est installé dans une version >= minimum, None si l'inventaire est inconnu.
+
+    Un minimum sans époque désigne la version amont : l'époque du paquet
+    installé est alors ignorée (docker-ce porte l'époque 5 sous Debian, 3 sous RHEL).
+    """
+    packages = installed_packages()
+    if packages is None:
+        return None
+    version = packages.get(name)
+    if version is None:
+        return False
+    if ":" not in minimum:
+        version = version.split(":", 1)[-1]
+    return compare_versions(version, minimum) >= 0
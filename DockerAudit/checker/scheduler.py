@@ -0,0 +1,108 @@
+import time
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+# Petit ordonnanceur de vérifications : chaque tâche déclare les données dont
+# elle dépend, les tâches indépendantes tournent en parallèle et chaque donnée
+# partagée (version distante, instantané des conteneurs...) n'est calculée
+# qu'une seule fois.
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+
+class Scheduler:
+    def __init__(self, default_timeout=30):
+        self.default_timeout = default_timeout
+        self.tasks = {}
+
+    def add(self, name, func, deps=(), timeout=None, report=True):
+        """Déclare une tâche. func reçoit les résultats de deps dans l'ordre.
+
+        report=False pour une donnée partagée qui n'apparaît pas dans le résultat.
+        """
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Dépendance inconnue pour {name} : {dep}")
+        self.tasks[name] = (func, tuple(deps), timeout or self.default_timeout, report)
+
+    def run(self):
+        """Exécute toutes les tâches et retourne {"results": ..., "trace": ...}.
+
+        Le délai d'une tâche court à partir de son propre démarrage, une fois
+        ses dépendances prêtes, et non depuis le début de l'exécution.
+        """
+        t0 = time.perf_counter()
+        trace = {}
+        futures = {name: Future() for name in self.tasks}
+        started = {name: threading.Event() for name in self.tasks}
+        start_times = {}
+
+        def execute(name):
+            func, deps, timeout, report = self.tasks[name]
+            try:
+                args = [futures[dep].result() for dep in deps]
+            except BaseException as e:
+                # Dépendance en erreur : la tâche ne démarre pas, mais son attente se termine
+                futures[name].set_exception(e)
+                started[name].set()
+                return
+            start = time.perf_counter()
+            start_times[name] = start
+            started[name].set()
+            try:
+                futures[name].set_result(func(*args))
+            except BaseException as e:
+                futures[name].set_exception(e)
+            finally:
+                trace[name] = (start - t0, time.perf_counter() - t0)
+
+        # Un thread par tâche : une tâche qui attend ses dépendances n'en prive
+        # aucune autre. Threads démons : une tâche en dépassement est abandonnée
+        # et n'empêche pas le processus de se terminer.
+        for name in self.tasks:
+            threading.Thread(target=execute, args=(name,), name=f"check-{name}", daemon=True).start()
+
+        outcomes = {}
+
+        def outcome(name):
+            if name in outcomes:
+                return outcomes[name]
+            func, deps, timeout, report = self.tasks[name]
+            for dep in deps:
+                if outcome(dep)["status"] == STATUS_TIMEOUT:
+                    # La dépendance ne finira peut-être jamais : inutile d'attendre cette tâche
+                    outcomes[name] = {"status": STATUS_TIMEOUT, "value": None, "error": f"dépendance {dep} en dépassement"}
+                    return outcomes[name]
+            try:
+                if not started[name].wait(timeout) or name not in start_times:
+                    # Démarrage impossible dans le délai, ou dépendance en erreur (le résultat est déjà là)
+                    value = futures[name].result(timeout=0)
+                else:
+                    remaining = start_times[name] + timeout - time.perf_counter()
+                    value = futures[name].result(timeout=max(remaining, 0))
+                outcomes[name] = {"status": STATUS_OK, "value": value}
+            except FutureTimeout:
+                outcomes[name] = {"status": STATUS_TIMEOUT, "value": None}
+            except Exception as e:
+                outcomes[name] = {"status": STATUS_ERROR, "value": None, "error": str(e)}
+            return outcomes[name]
+
+        results = {name: outcome(name) for name, task in self.tasks.items() if task[3]}
+
+        total = time.perf_counter() - t0
+        finished = dict(trace)
+        return {
+            "results": results,
+            "trace": [
+                {
+                    "name": name,
+                    "shared": not self.tasks[name][3],
+                    "deps": list(self.tasks[name][1]),
+                    "start_ms": round(start * 1000, 1),
+                    "end_ms": round(end * 1000, 1),
+                }
+                for name, (start, end) in sorted(finished.items(), key=lambda item: item[1][0])
+            ],
+            "total_ms": round(total * 1000, 1),
+        }
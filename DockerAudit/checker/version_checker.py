@@ -1,10 +1,12 @@
 import subprocess
-import shutil
-import os
-import requests
-from bs4 import BeautifulSoup
+
+from docker_api import engine_state
+from version_feed import latest_docker_version
 
 def get_local_docker_version():
+    state = engine_state()
+    if state is not None:
+        return state["version"].get("Version")
     try:
         result = subprocess.run("docker --version", shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         if result.returncode == 0:
@@ -17,22 +19,5 @@ def get_local_docker_version():
         return None
 
 def get_latest_docker_version():
-    try:
-        url = "https://docs.docker.com/engine/release-notes/"
-        response = requests.get(url)
-        response.raise_for_status()  # Vérifie si la requête est réussie
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Recherche de la version en fonction de la structure actuelle de la page
-        # Ici, on suppose que la première entrée de version est dans un <h2> avec un format comme "Version X.Y.Z"
-        version_heading = soup.find("h3")
-        if version_heading:
-            version = version_heading.get_text(strip=True).split(" ")[-1]
-            return version
-        else:
-            print("Impossible de trouver la version sur la page.")
-            return None
-    except requests.exceptions.RequestException as e:
-        print(f"Erreur lors de la récupération de la version : {e}")
-        return None
-
+    # Cache disque, revalidation conditionnelle et bundle hors ligne : voir version_feed.py
+    return latest_docker_version()
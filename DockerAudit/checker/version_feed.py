@@ -0,0 +1,125 @@
+import os
+import re
+import json
+import time
+import html
+import requests
+
+# Source de la dernière version Docker Engine : cache disque avec TTL,
+# revalidation conditionnelle (ETag / Last-Modified) et bundle hors ligne
+# pour les machines d'audit sans accès Internet.
+
+RELEASE_NOTES_URL = "https://docs.docker.com/engine/release-notes/"
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "docker_audit_versions.json")
+DEFAULT_TTL = 6 * 3600
+
+# Fichier hors ligne : JSON {"docker": "27.3.1"} ou page des release notes enregistrée
+BUNDLE_ENV = "DOCKER_AUDIT_VERSION_BUNDLE"
+
+_H3_RE = re.compile(r"<h3\b[^>]*>(.*?)</h3>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+def parse_version_heading(text):
+    """Version du premier titre <h3> de la page des release notes, None si absent."""
+    match = _H3_RE.search(text)
+    if not match:
+        return None
+    heading = html.unescape(_TAG_RE.sub("", match.group(1))).strip()
+    return heading.split(" ")[-1] if heading else None
+
+def read_bundle(path):
+    """Version lue dans le bundle hors ligne, None si le fichier est illisible."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Impossible de lire le bundle {path} : {e}")
+        return None
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return parse_version_heading(content)
+    # JSON valide mais pas de la forme {"docker": "x.y.z"} : bundle inutilisable
+    version = data.get("docker") if isinstance(data, dict) else None
+    if not isinstance(version, str) or not version:
+        print(f"Bundle {path} invalide : clé \"docker\" absente")
+        return None
+    return version
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache_path, entry):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Impossible d'enregistrer le cache {cache_path} : {e}")
+
+def _fetch(url, cached, timeout):
+    # Retourne (version, etag, last_modified) ou None si le cache est toujours valide (304)
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        # Seul le début de la page est lu : on s'arrête au premier </h3>. Seule la
+        # fin du flux est examinée à chaque morceau, la page est analysée une fois.
+        chunks = []
+        tail = ""
+        for chunk in response.iter_content(chunk_size=16384, decode_unicode=True):
+            chunk = chunk if isinstance(chunk, str) else chunk.decode("utf-8", "replace")
+            chunks.append(chunk)
+            window = (tail + chunk).lower()
+            if "</h3" in window:
+                break
+            tail = window[-4:]
+        version = parse_version_heading("".join(chunks))
+        return version, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+_memo = {}
+
+def latest_docker_version(url=RELEASE_NOTES_URL, cache_path=DEFAULT_CACHE, ttl=DEFAULT_TTL, bundle=None, timeout=10):
+    """Dernière version Docker Engine publiée, en interrogeant le réseau le moins possible."""
+    bundle = bundle or os.environ.get(BUNDLE_ENV)
+    if bundle:
+        return read_bundle(bundle)
+    if url in _memo:
+        return _memo[url]
+
+    cache = _load_cache(cache_path) if cache_path else {}
+    cached = cache if cache.get("url") == url else {}
+    if cached.get("version") and time.time() - cached.get("fetched_at", 0) < ttl:
+        _memo[url] = cached["version"]
+        return cached["version"]
+
+    try:
+        fetched = _fetch(url, cached, timeout)
+    except requests.exceptions.RequestException as e:
+        print(f"Erreur lors de la récupération de la version : {e}")
+        # Une version périmée vaut mieux que pas de version du tout
+        return cached.get("version")
+
+    if fetched is None:
+        entry = dict(cached, fetched_at=time.time())
+    else:
+        version, etag, last_modified = fetched
+        if not version:
+            print("Impossible de trouver la version sur la page.")
+            return cached.get("version")
+        entry = {"url": url, "version": version, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}
+    if cache_path:
+        _save_cache(cache_path, entry)
+    _memo[url] = entry["version"]
+    return entry["version"]
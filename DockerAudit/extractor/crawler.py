@@ -0,0 +1,139 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Dossiers ignorés par défaut : pseudo-systèmes de fichiers et couches d'images
+DEFAULT_PRUNE = (
+    "/proc",
+    "/sys",
+    "/dev",
+    "/run",
+    "/var/lib/docker/overlay2",
+    "/var/lib/containerd",
+)
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "docker_audit_index.json")
+
+def load_index(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_index(cache_path, index):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Impossible d'enregistrer l'index {cache_path} : {e}")
+
+def _scan_dir(path, names, root_dev, cached):
+    # Retourne (mtime, sous-dossiers, fichiers trouvés) ou None si le dossier est ignoré
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if root_dev is not None and st.st_dev != root_dev:
+        return None
+    if cached is not None and cached[0] == st.st_mtime_ns:
+        # Dossier inchangé depuis le dernier parcours : pas de scandir
+        return cached
+    subdirs = []
+    matches = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.name in names:
+                        matches.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return [st.st_mtime_ns, subdirs, matches]
+
+def _drop_removed(dirs, new_dirs):
+    """Retire de l'index les dossiers disparus depuis le dernier parcours.
+
+    Un dossier est disparu si un de ses ancêtres a été lu pendant ce parcours
+    et ne le liste plus ; les dossiers non atteints (prune, max_depth, autre
+    système de fichiers) gardent leur entrée.
+    """
+    removed = {}
+
+    def is_removed(path):
+        if path not in removed:
+            parent = os.path.dirname(path)
+            if parent == path:
+                removed[path] = False
+            elif parent in new_dirs:
+                removed[path] = os.path.basename(path) not in new_dirs[parent][1]
+            else:
+                removed[path] = is_removed(parent)
+        return removed[path]
+
+    for path in [path for path in dirs if path not in new_dirs]:
+        if is_removed(path):
+            del dirs[path]
+
+def crawl(root="/", names=("daemon.json", "config.toml"), prune=DEFAULT_PRUNE, max_depth=None,
+          same_filesystem=False, workers=16, cache_path=DEFAULT_CACHE):
+    """Parcourt root en parallèle et produit les chemins des fichiers recherchés dès qu'ils sont trouvés.
+
+    Les dossiers de prune ne sont pas parcourus, max_depth limite la profondeur
+    depuis root et same_filesystem (désactivé par défaut : /var/lib/docker ou
+    /etc sont souvent sur un autre montage) empêche de traverser les points de montage.
+    L'index des dossiers (mtime, sous-dossiers, fichiers trouvés) est enregistré
+    dans cache_path et réutilisé au parcours suivant pour les dossiers dont le
+    mtime n'a pas changé. cache_path=None désactive le cache.
+    """
+    root = os.path.abspath(root)
+    names = frozenset(names)
+    prune = {os.path.abspath(p) for p in prune}
+    old_index = load_index(cache_path) if cache_path else {}
+    # Un index construit pour d'autres fichiers recherchés n'est pas réutilisable
+    if old_index.get("names") != sorted(names):
+        old_index = {}
+    old_dirs = old_index.get("dirs", {})
+    new_dirs = {}
+    try:
+        root_dev = os.lstat(root).st_dev if same_filesystem else None
+    except OSError:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    completed = False
+    try:
+        pending = {pool.submit(_scan_dir, root, names, root_dev, old_dirs.get(root)): (root, 0)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, depth = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    continue
+                new_dirs[path] = result
+                mtime, subdirs, matches = result
+                for name in matches:
+                    yield os.path.join(path, name)
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                for name in subdirs:
+                    sub = os.path.join(path, name)
+                    if sub in prune:
+                        continue
+                    pending[pool.submit(_scan_dir, sub, names, root_dev, old_dirs.get(sub))] = (sub, depth + 1)
+        completed = True
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if completed and cache_path:
+            # On garde les entrées des autres racines déjà indexées
+            _drop_removed(old_dirs, new_dirs)
+            old_dirs.update(new_dirs)
+            save_index(cache_path, {"names": sorted(names), "dirs": old_dirs})
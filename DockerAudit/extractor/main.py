@@ -1,6 +1,8 @@
 import subprocess
+import argparse
 import shutil
 import os
+from crawler import crawl
     
 def extract_configuration(source_path, destination_path):
     try:
@@ -23,21 +25,22 @@ def iptables_exist(destination_path):
         print(f"An error occurred while checking iptables: {e}")
         return False
 
-def find_files(root="/"):
-    paths = []
-    file_list = ["daemon.json", "config.toml"]
-    for dirpath, dirnames, filenames in os.walk(root):
-        for file in file_list:
-            if file in filenames:
-                paths.append(os.path.join(dirpath, file))
-    return paths
+def find_files(root="/", **options):
+    # Voir crawler.crawl pour les options (prune, max_depth, same_filesystem, workers, cache_path)
+    return list(crawl(root, ["daemon.json", "config.toml"], **options))
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extraction des fichiers de configuration Docker")
+    parser.add_argument("root", nargs="?", default="/", help="dossier de départ du parcours (défaut : /)")
+    parser.add_argument("--same-filesystem", action="store_true",
+                        help="ne pas traverser les points de montage (par défaut tous les systèmes de fichiers sont parcourus)")
+    args = parser.parse_args()
+
     file_dst = "/tmp/audit"
-    files_conf = find_files()
     os.mkdir(file_dst) if not os.path.exists(file_dst) else print(f"dossier {file_dst} déja créer")
-    for current_file in files_conf:
+    # Les fichiers sont copiés au fur et à mesure qu'ils sont trouvés
+    for current_file in crawl(args.root, ["daemon.json", "config.toml"], same_filesystem=args.same_filesystem):
         extract_configuration(current_file, f"{file_dst}/{current_file.split('/')[-2]}_{current_file.split('/')[-1]}")
     iptables_exist("/tmp/audit/iptables.conf")
     print("copie terminée !")
@@ -0,0 +1,321 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+# Base locale d'avis de sécurité partagée par les auditeurs (plugins et thèmes
+# WordPress, images des pods Kubernetes). Elle est construite une fois à partir
+# d'un export hors ligne et interrogée en lot.
+#
+#   python advisory_db.py build flux.jsonl [osv/*.json ...]
+#   python advisory_db.py lookup wordpress-plugin contact-form-7 5.3.1
+#   python advisory_db.py benchmark
+#
+# Chaque intervalle de versions affectées est stocké avec des clés de version
+# triables comme du texte : l'index (ecosystem, package, lo_key) ramène une
+# recherche à une descente de B-tree puis au parcours des seuls intervalles du
+# paquet qui commencent avant la version cherchée.
+
+DB_ENV = "AUDIT_ADVISORY_DB"
+DEFAULT_DB = os.path.join(os.path.expanduser("~"), ".cache", "audit_advisories.sqlite")
+
+ECOSYSTEM_WP_CORE = "wordpress-core"
+ECOSYSTEM_WP_PLUGIN = "wordpress-plugin"
+ECOSYSTEM_WP_THEME = "wordpress-theme"
+ECOSYSTEM_IMAGE = "container-image"
+
+# Clé de version : une suite de composants qui se compare octet par octet
+#   nombre      -> "N" + nombre de chiffres sur 2 positions + chiffres
+#   pré-version (dev < alpha < beta < rc) -> "A" + rang
+#   fin         -> "B"
+#   post-version (pl, p, patch, post) -> "C"
+# donc 1.0-dev < 1.0-beta < 1.0 < 1.0-pl1 < 1.0.1, comme version_compare() de PHP.
+# Tout autre mot est une variante (1.25.3-alpine, 8.2-bookworm) : il est ignoré
+# avec ce qui le suit, la variante vaut la version de base.
+_PRERELEASES = {"dev": "0", "alpha": "1", "a": "1", "beta": "2", "b": "2", "rc": "3", "c": "3", "pre": "3"}
+_POSTRELEASES = {"pl", "p", "patch", "post"}
+_COMPONENT_RE = re.compile(r"\d+|[a-zA-Z]+")
+KEY_MIN = ""
+KEY_MAX = "Z"
+
+def version_key(version):
+    """Clé texte triable d'une version ("v1.2.3", "5.3-beta1", "1.25.3-alpine"...)."""
+    version = version.strip()
+    if version[:1] in ("v", "V") and version[1:2].isdigit():
+        version = version[1:]
+    parts = []
+    for component in _COMPONENT_RE.findall(version):
+        if component.isdigit():
+            digits = component.lstrip("0") or "0"
+            parts.append(f"N{len(digits):02d}{digits}")
+        else:
+            word = component.lower()
+            if word in _POSTRELEASES:
+                parts.append("C")
+            elif word in _PRERELEASES:
+                parts.append("A" + _PRERELEASES[word])
+            else:
+                break
+    parts.append("B")
+    return "".join(parts)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS advisories (
+    id INTEGER PRIMARY KEY,
+    ecosystem TEXT NOT NULL,
+    package TEXT NOT NULL,
+    lo_key TEXT NOT NULL,
+    hi_key TEXT NOT NULL,
+    hi_inclusive INTEGER NOT NULL,
+    advisory_id TEXT,
+    title TEXT,
+    severity TEXT,
+    introduced TEXT,
+    fixed TEXT
+);
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS advisories_range ON advisories (ecosystem, package, lo_key)"
+
+_COLUMNS = ("advisory_id", "title", "severity", "introduced", "fixed")
+
+def _ranges_from_osv(record):
+    # Format OSV : affected[].package + ranges[].events (introduced, fixed / last_affected)
+    for affected in record.get("affected") or []:
+        package = affected.get("package") or {}
+        for version_range in affected.get("ranges") or []:
+            introduced = None
+            for event in version_range.get("events") or []:
+                if "introduced" in event:
+                    introduced = None if event["introduced"] == "0" else event["introduced"]
+                elif "fixed" in event or "last_affected" in event:
+                    yield {
+                        "id": record.get("id"),
+                        "ecosystem": package.get("ecosystem", "").lower(),
+                        "package": package.get("name"),
+                        "introduced": introduced,
+                        "fixed": event.get("fixed"),
+                        "last_affected": event.get("last_affected"),
+                        "title": record.get("summary"),
+                        "severity": (record.get("database_specific") or {}).get("severity"),
+                    }
+                    introduced = None
+            if introduced is not None:
+                # Intervalle ouvert : toutes les versions depuis introduced
+                yield {"id": record.get("id"), "ecosystem": package.get("ecosystem", "").lower(),
+                       "package": package.get("name"), "introduced": introduced,
+                       "title": record.get("summary")}
+
+def iter_feed(path):
+    """Avis d'un export hors ligne : JSON Lines (un intervalle par ligne) ou fichier OSV."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    for record in data if isinstance(data, list) else [data]:
+        if "affected" in record:
+            yield from _ranges_from_osv(record)
+        else:
+            yield record
+
+def _row(advisory):
+    if advisory.get("fixed"):
+        hi_key, inclusive = version_key(advisory["fixed"]), 0
+    elif advisory.get("last_affected"):
+        hi_key, inclusive = version_key(advisory["last_affected"]), 1
+    else:
+        hi_key, inclusive = KEY_MAX, 1
+    lo_key = version_key(advisory["introduced"]) if advisory.get("introduced") else KEY_MIN
+    return (advisory["ecosystem"], advisory["package"], lo_key, hi_key, inclusive,
+            advisory.get("id"), advisory.get("title"), advisory.get("severity"),
+            advisory.get("introduced"), advisory.get("fixed") or advisory.get("last_affected"))
+
+def build(db_path, advisories):
+    """(Re)construit la base à partir d'un itérable d'avis ; retourne le nombre d'intervalles."""
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(_SCHEMA)
+        count = 0
+        batch = []
+        for advisory in advisories:
+            if not advisory.get("ecosystem") or not advisory.get("package"):
+                continue
+            batch.append(_row(advisory))
+            if len(batch) >= 10000:
+                connection.executemany("INSERT INTO advisories VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+        connection.executemany("INSERT INTO advisories VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        count += len(batch)
+        # L'index est créé après l'insertion : un seul tri au lieu de 100k insertions dans le B-tree
+        connection.execute(_INDEX)
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, db_path)
+    return count
+
+class AdvisoryDB:
+    """Accès en lecture à la base d'avis."""
+
+    def __init__(self, db_path=None):
+        self.path = db_path or os.environ.get(DB_ENV) or DEFAULT_DB
+        self.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, ecosystem, package, version):
+        """Avis dont l'intervalle contient version (liste de dicts)."""
+        key = version_key(version)
+        rows = self.connection.execute(
+            "SELECT advisory_id, title, severity, introduced, fixed FROM advisories "
+            "WHERE ecosystem = ? AND package = ? AND lo_key <= ? "
+            "AND (hi_key > ? OR (hi_inclusive AND hi_key = ?))",
+            (ecosystem, package, key, key, key),
+        )
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def lookup_many(self, queries):
+        """Recherche en lot : queries est une liste de (ecosystem, package, version).
+
+        Retourne une liste alignée sur queries. Les requêtes passent par une
+        table temporaire jointe à l'index en une seule instruction SQL.
+        """
+        results = [[] for _ in queries]
+        rows = [(i, ecosystem, package, version_key(version))
+                for i, (ecosystem, package, version) in enumerate(queries) if version]
+        if not rows:
+            return results
+        cursor = self.connection.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS queries (idx INTEGER, ecosystem TEXT, package TEXT, vkey TEXT)")
+        cursor.execute("DELETE FROM queries")
+        cursor.executemany("INSERT INTO queries VALUES (?, ?, ?, ?)", rows)
+        for idx, *row in cursor.execute(
+                "SELECT q.idx, a.advisory_id, a.title, a.severity, a.introduced, a.fixed "
+                "FROM queries q JOIN advisories a "
+                "ON a.ecosystem = q.ecosystem AND a.package = q.package AND a.lo_key <= q.vkey "
+                "WHERE a.hi_key > q.vkey OR (a.hi_inclusive AND a.hi_key = q.vkey)"):
+            results[idx].append(dict(zip(_COLUMNS, row)))
+        return results
+
+def open_default(db_path=None):
+    """AdvisoryDB sur la base configurée, None si elle n'a pas encore été construite.
+
+    Un fichier sans table advisories (construction interrompue, autre base)
+    est traité comme une base absente.
+    """
+    try:
+        db = AdvisoryDB(db_path)
+    except sqlite3.OperationalError:
+        return None
+    try:
+        found = db.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'advisories'").fetchone()
+    except sqlite3.DatabaseError:
+        found = None
+    if found is None:
+        db.close()
+        return None
+    return db
+
+_IMAGE_DIGEST_RE = re.compile(r"@sha256:[0-9a-f]+$")
+
+def parse_image(image):
+    """(package, version) d'une référence d'image ; version None sans tag (latest, digest seul)."""
+    image = _IMAGE_DIGEST_RE.sub("", image.strip())
+    name, version = image, None
+    slash = image.rfind("/")
+    colon = image.rfind(":")
+    if colon > slash:
+        name, version = image[:colon], image[colon + 1:]
+    for prefix in ("docker.io/", "index.docker.io/"):
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    if name.startswith("library/"):
+        name = name[len("library/"):]
+    if version == "latest":
+        version = None
+    return name, version
+
+def benchmark(advisories=100_000, lookups=10_000, packages=10_000):
+    """Construit une base synthétique puis mesure les recherches unitaires et en lot."""
+    rng = random.Random(0)
+
+    def random_version():
+        return f"{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 30)}"
+
+    def synthetic():
+        for i in range(advisories):
+            low, high = sorted((random_version(), random_version()), key=version_key)
+            yield {"id": f"ADV-{i}", "ecosystem": ECOSYSTEM_WP_PLUGIN, "package": f"plugin-{rng.randrange(packages)}",
+                   "introduced": low, "fixed": high, "title": "synthetic"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        start = time.perf_counter()
+        count = build(db_path, synthetic())
+        print(f"Construction : {count} intervalles en {time.perf_counter() - start:.2f} s "
+              f"({os.path.getsize(db_path) / 1e6:.1f} Mo)")
+
+        queries = [(ECOSYSTEM_WP_PLUGIN, f"plugin-{rng.randrange(packages)}", random_version()) for _ in range(lookups)]
+        with AdvisoryDB(db_path) as db:
+            start = time.perf_counter()
+            single = [db.lookup(*query) for query in queries]
+            elapsed_single = time.perf_counter() - start
+            start = time.perf_counter()
+            many = db.lookup_many(queries)
+            elapsed_many = time.perf_counter() - start
+        found = sum(1 for result in many if result)
+        assert [len(r) for r in single] == [len(r) for r in many]
+        print(f"{lookups} recherches unitaires : {elapsed_single * 1000:.0f} ms "
+              f"({elapsed_single / lookups * 1e6:.0f} µs/recherche)")
+        print(f"{lookups} recherches en lot : {elapsed_many * 1000:.0f} ms, {found} versions vulnérables")
+
+def main():
+    parser = argparse.ArgumentParser(description="Base locale d'avis de sécurité")
+    parser.add_argument("--db", default=None, help=f"chemin de la base (défaut : ${DB_ENV} ou {DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="construire la base à partir d'exports hors ligne")
+    build_parser.add_argument("feeds", nargs="+", help="fichiers JSON Lines ou OSV (JSON)")
+    lookup_parser = sub.add_parser("lookup", help="avis pour une version d'un paquet")
+    lookup_parser.add_argument("ecosystem")
+    lookup_parser.add_argument("package")
+    lookup_parser.add_argument("version")
+    sub.add_parser("benchmark", help="100k avis synthétiques, 10k recherches")
+    args = parser.parse_args()
+
+    db_path = args.db or os.environ.get(DB_ENV) or DEFAULT_DB
+    if args.command == "build":
+        start = time.perf_counter()
+        count = build(db_path, (advisory for feed in args.feeds for advisory in iter_feed(feed)))
+        print(f"{count} intervalles enregistrés dans {db_path} en {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    elif args.command == "lookup":
+        with AdvisoryDB(db_path) as db:
+            for advisory in db.lookup(args.ecosystem, args.package, args.version):
+                print(json.dumps(advisory, ensure_ascii=False))
+    else:
+        benchmark()
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import os
-import re
 from rich.console import Console
 from rich.table import Table
+from conf_engine import compile_rules, audit_file, STATUS_OK, STATUS_BAD
 
 console = Console()
 
@@ -23,13 +23,14 @@ RECOMMENDATIONS = {
     "KeepAliveTimeout": (r"^\s*KeepAliveTimeout\s+(\d+)", lambda val: int(val) == 5, "Limitez le délai KeepAlive", "KeepAliveTimeout 5")
 }
 
+RULES = compile_rules(RECOMMENDATIONS)
+
 def check_apache_config():
     if not os.path.exists(APACHE_CONFIG_PATH):
         console.print(f"[bold red]Le fichier {APACHE_CONFIG_PATH} n'existe pas.[/bold red]")
         return
 
-    with open(APACHE_CONFIG_PATH, 'r') as file:
-        apache_config = file.readlines()
+    report = audit_file(APACHE_CONFIG_PATH, RULES)
 
     table = Table(title="État de la Configuration Apache", show_header=True, header_style="bold magenta")
     table.add_column("Nom de la règle", style="dim", width=20)
@@ -37,28 +38,18 @@ def check_apache_config():
     table.add_column("Message", width=45)
     table.add_column("Ligne à ajouter / modifier")
 
-    secure_count = 0
-
-    for directive, (pattern, condition, message, action) in RECOMMENDATIONS.items():
-        found = False
-        for line in apache_config:
-            match = re.match(pattern, line)
-            if match:
-                value = match.group(1)
-                if condition(value):
-                    table.add_row(directive, "[bold green]Correcte[/bold green]", "", "")
-                else:
-                    table.add_row(directive, "[bold yellow]Mal configurée[/bold yellow]", message, action)
-                    secure_count += 0.5
-                found = True
-                break
-        if not found:
+    for directive, status, value, message, action in report["results"]:
+        if status == STATUS_OK:
+            table.add_row(directive, "[bold green]Correcte[/bold green]", "", "")
+        elif status == STATUS_BAD:
+            table.add_row(directive, "[bold yellow]Mal configurée[/bold yellow]", message, action)
+        else:
             table.add_row(directive, "[bold red]Manquante[/bold red]", message, action)
-            secure_count += 1
 
     console.print(table)
 
-    console.print(f"\n[bold blue]Note finale : {len(RECOMMENDATIONS) - secure_count}/{len(RECOMMENDATIONS)}[/bold blue]")
+    console.print(f"\n[bold blue]Note finale : {report['score']}/{report['max']}[/bold blue]")
+    console.print(f"[dim]Parsing : {report['parse_ms']:.2f} ms, évaluation : {report['eval_ms']:.2f} ms[/dim]")
 
 if __name__ == "__main__":
     check_apache_config()
@@ -1,13 +1,24 @@
 import os
 import re
-from rich.console import Console
-from rich.table import Table
-import os
+import json
+import argparse
+import ipaddress
 import subprocess
 import shutil
 import datetime
-import psycopg2
-from psycopg2 import sql
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from rich.table import Table
+# psycopg2 n'est nécessaire que pour interroger des instances (PgFleet) :
+# l'audit Apache et l'analyse d'un pg_hba.conf fonctionnent sans
+try:
+    import psycopg2
+    from psycopg2 import sql, pool
+except ImportError:
+    psycopg2 = None
+
+from conf_engine import STATUS_OK, STATUS_BAD, STATUS_MISSING
 
 def run_command(command):
     return subprocess.check_output(command, shell=True).decode().strip()
@@ -72,5 +83,329 @@ def check_apache_config():
 
     console.print(f"\n[bold blue]Note finale : {len(RECOMMENDATIONS) - secure_count}/{len(RECOMMENDATIONS)}[/bold blue]")
 
+# Audit PostgreSQL : tous les paramètres utiles sont lus en une seule requête
+# sur pg_settings (au lieu d'un SHOW par paramètre) et les règles pg_hba.conf
+# sont lues dans la vue pg_hba_file_rules, ou parsées depuis le fichier. Les
+# instances d'une flotte sont auditées en parallèle, chacune avec son pool de
+# connexions et ses délais.
+
+PG_RECOMMENDATIONS = {
+    "ssl": (lambda val: val == "on", "Activer TLS pour les connexions clientes", "ssl = on"),
+    "ssl_min_protocol_version": (lambda val: val in ("TLSv1.2", "TLSv1.3"), "Refuser les versions de TLS antérieures à 1.2", "ssl_min_protocol_version = 'TLSv1.2'"),
+    "password_encryption": (lambda val: val == "scram-sha-256", "Stocker les mots de passe en SCRAM plutôt qu'en MD5", "password_encryption = 'scram-sha-256'"),
+    "listen_addresses": (lambda val: val not in ("*", "0.0.0.0", "::"), "N'écouter que sur les interfaces nécessaires", "listen_addresses = 'localhost'"),
+    "logging_collector": (lambda val: val == "on", "Conserver les journaux du serveur", "logging_collector = on"),
+    "log_connections": (lambda val: val == "on", "Journaliser les connexions", "log_connections = on"),
+    "log_disconnections": (lambda val: val == "on", "Journaliser les déconnexions", "log_disconnections = on"),
+    "log_statement": (lambda val: val in ("ddl", "mod", "all"), "Journaliser au moins les modifications de schéma", "log_statement = 'ddl'"),
+    "log_line_prefix": (lambda val: "%u" in val and "%d" in val, "Inclure l'utilisateur et la base dans les journaux", "log_line_prefix = '%m [%p] %u@%d '"),
+    "row_security": (lambda val: val == "on", "Ne pas désactiver la sécurité au niveau des lignes", "row_security = on"),
+    "data_checksums": (lambda val: val == "on", "Détecter la corruption des pages de données", "initdb --data-checksums"),
+}
+
+PG_SETTINGS_QUERY = "SELECT name, setting FROM pg_settings WHERE name = ANY(%s)"
+PG_HBA_QUERY = ("SELECT line_number, type, database, user_name, address, netmask, auth_method, error "
+                "FROM pg_hba_file_rules ORDER BY line_number")
+
+CONNECT_TIMEOUT = 5        # secondes, par hôte
+STATEMENT_TIMEOUT = 5000   # millisecondes, par requête
+
+def get_pg_settings(cursor, settings=PG_RECOMMENDATIONS):
+    """Valeurs de plusieurs paramètres en un seul aller-retour ; les absents ne sont pas dans le dict."""
+    cursor.execute(PG_SETTINGS_QUERY, (list(settings),))
+    return dict(cursor.fetchall())
+
+def evaluate_pg_settings(settings):
+    """Évalue les paramètres lus ; retourne (résultats, points perdus) comme conf_engine.evaluate."""
+    results = []
+    penalty = 0
+    for name, (condition, message, action) in PG_RECOMMENDATIONS.items():
+        value = settings.get(name)
+        if value is None:
+            status = STATUS_MISSING
+            penalty += 1
+        elif condition(value):
+            status = STATUS_OK
+        else:
+            status = STATUS_BAD
+            penalty += 0.5
+        results.append((name, status, value, message, action))
+    return results, penalty
+
+def _hba_rule(line, type, database, user, address=None, netmask=None, method="", error=None):
+    return {"line": line, "type": type, "database": database or [], "user": user or [],
+            "address": address, "netmask": netmask, "method": method, "error": error}
+
+def get_pg_hba_rules(cursor):
+    cursor.execute(PG_HBA_QUERY)
+    return [_hba_rule(*row) for row in cursor.fetchall()]
+
+HBA_TYPES = {"local", "host", "hostssl", "hostnossl", "hostgssenc", "hostnogssenc"}
+
+def _hba_lines(lines):
+    """Produit (numéro, ligne logique) en recollant les lignes terminées par une barre oblique inverse."""
+    start, parts = None, []
+    for number, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].rstrip()
+        if start is None:
+            start = number
+        if line.endswith("\\"):
+            parts.append(line[:-1])
+            continue
+        parts.append(line)
+        yield start, " ".join(parts)
+        start, parts = None, []
+    if parts:
+        yield start, " ".join(parts)
+
+def parse_pg_hba(lines):
+    """Règles d'un pg_hba.conf, sous la même forme que la vue pg_hba_file_rules.
+
+    Une ligne invalide donne une règle dont "error" décrit le problème, comme
+    la colonne error de la vue.
+    """
+    rules = []
+    for number, line in _hba_lines(lines):
+        fields = line.split()
+        if not fields or fields[0] == "include" or fields[0].startswith("include_"):
+            continue
+        type = fields[0]
+        if type not in HBA_TYPES:
+            rules.append(_hba_rule(number, type, [], [], error=f"type de connexion inconnu « {type} »"))
+            continue
+        if len(fields) < (4 if type == "local" else 5):
+            rules.append(_hba_rule(number, type, [], [], error="ligne incomplète"))
+            continue
+        database, user, rest = fields[1].split(","), fields[2].split(","), fields[3:]
+        address = netmask = None
+        if type != "local":
+            address, rest = rest[0], rest[1:]
+            # Forme « adresse masque » : le champ suivant est un masque IP, pas une méthode
+            if "/" not in address and len(rest) > 1 and re.match(r"^[0-9a-fA-F.:]+$", rest[0]):
+                netmask, rest = rest[0], rest[1:]
+        rules.append(_hba_rule(number, type, database, user, address, netmask, rest[0]))
+    return rules
+
+def _network(rule):
+    """Réseau d'une règle host*, ou None pour un nom d'hôte ou un mot-clé (samehost, samenet)."""
+    address = rule["address"]
+    if address == "all":
+        return ipaddress.ip_network("0.0.0.0/0")
+    try:
+        if "/" not in address and rule["netmask"]:
+            address = f"{address}/{rule['netmask']}"
+        return ipaddress.ip_network(address, strict=False)
+    except ValueError:
+        return None
+
+def evaluate_pg_hba(rules):
+    """Constats (ligne, statut, message) sur les règles d'authentification."""
+    findings = []
+    for rule in rules:
+        if rule.get("error"):
+            findings.append((rule["line"], STATUS_BAD, f"Ligne invalide : {rule['error']}"))
+            continue
+        method = rule["method"]
+        if method == "reject":
+            continue
+        if method == "trust":
+            findings.append((rule["line"], STATUS_BAD, "Méthode trust : connexion sans mot de passe"))
+        elif method == "password":
+            findings.append((rule["line"], STATUS_BAD, "Méthode password : mot de passe envoyé en clair"))
+        elif method == "md5":
+            findings.append((rule["line"], STATUS_BAD, "Méthode md5 : préférer scram-sha-256"))
+        if rule["type"] == "local" or not rule["address"]:
+            continue
+        network = _network(rule)
+        if network is not None and network.prefixlen == 0:
+            findings.append((rule["line"], STATUS_BAD, f"Accès ouvert à toutes les adresses ({rule['address']})"))
+        if rule["type"] in ("host", "hostnossl") and not (network is not None and network.is_loopback):
+            findings.append((rule["line"], STATUS_BAD, f"Connexions {rule['type']} sans TLS obligatoire : utiliser hostssl"))
+        if "all" in rule["user"] and "all" in rule["database"] and method != "cert" and not (network is not None and network.is_loopback):
+            findings.append((rule["line"], STATUS_BAD, "Tous les utilisateurs sur toutes les bases depuis le réseau"))
+    return findings
+
+def iter_hosts(path, hba_path=None):
+    """Lit un fichier d'hôtes et produit (nom, dsn, pg_hba.conf).
+
+    Une ligne par instance : "nom<TAB>dsn<TAB>pg_hba.conf", "nom<TAB>dsn" ou
+    simplement le dsn (ou une URI postgresql://). Le pg_hba.conf d'une
+    instance ne sert que si la vue pg_hba_file_rules est illisible ; sans
+    troisième colonne, c'est hba_path.
+    """
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            name, dsn = (fields[0], fields[1]) if len(fields) > 1 else (line, line)
+            yield name, dsn, fields[2] if len(fields) > 2 and fields[2] else hba_path
+
+def _read_hba(hba_path, view_error):
+    """Règles du pg_hba.conf d'une instance quand la vue est illisible ; retourne (règles, erreur)."""
+    if hba_path is None:
+        return [], view_error
+    try:
+        with open(hba_path, 'r') as f:
+            return parse_pg_hba(f), None
+    except OSError as e:
+        return [], f"{view_error} ; {hba_path} : {e}"
+
+class PgFleet:
+    """Un pool de connexions par instance ; les audits de plusieurs instances tournent en parallèle.
+
+    connect_timeout borne l'établissement de la connexion, statement_timeout
+    chaque requête : un hôte injoignable ou lent ne bloque qu'un thread.
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, statement_timeout=STATEMENT_TIMEOUT, max_connections=2):
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 est requis pour auditer des instances PostgreSQL (pip install psycopg2-binary)")
+        self.connect_args = {"connect_timeout": connect_timeout, "options": f"-c statement_timeout={statement_timeout}",
+                             "application_name": "audit_conf_sql"}
+        self.max_connections = max_connections
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def _pool(self, dsn):
+        # Aucune connexion ouverte à la création : la première est établie par getconn
+        with self.lock:
+            if dsn not in self.pools:
+                self.pools[dsn] = pool.ThreadedConnectionPool(0, self.max_connections, dsn, **self.connect_args)
+            return self.pools[dsn]
+
+    def audit_host(self, name, dsn, hba_path=None):
+        """Audite une instance et retourne un dict sérialisable en JSON.
+
+        hba_path, le pg_hba.conf de cette instance, n'est lu que si la vue
+        pg_hba_file_rules est illisible.
+        """
+        start = datetime.datetime.now()
+        try:
+            connections = self._pool(dsn)
+            conn = connections.getconn()
+        except psycopg2.Error as e:
+            return {"host": name, "error": str(e).strip()}
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                results, penalty = evaluate_pg_settings(get_pg_settings(cursor))
+                hba_error = None
+                try:
+                    hba_rules = get_pg_hba_rules(cursor)
+                except psycopg2.Error as e:
+                    # Vue réservée aux superutilisateurs, ou serveur antérieur à PostgreSQL 10
+                    hba_rules, hba_error = _read_hba(hba_path, str(e).strip())
+        except psycopg2.Error as e:
+            connections.putconn(conn, close=True)
+            return {"host": name, "error": str(e).strip()}
+        connections.putconn(conn)
+        report = {
+            "host": name,
+            "score": len(PG_RECOMMENDATIONS) - penalty,
+            "max": len(PG_RECOMMENDATIONS),
+            "results": [{"setting": setting, "status": status, "value": value}
+                        for setting, status, value, message, action in results],
+            "hba": [{"line": line, "status": status, "message": message}
+                    for line, status, message in evaluate_pg_hba(hba_rules)],
+            "ms": round((datetime.datetime.now() - start).total_seconds() * 1000, 1),
+        }
+        if hba_error:
+            report["hba_error"] = hba_error
+        return report
+
+    def audit_hosts(self, hosts, workers=32):
+        """Produit les rapports des hôtes (nom, dsn[, pg_hba.conf]) dans leur ordre, au fur et à mesure."""
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(lambda host: self.audit_host(*host), hosts)
+
+    def close(self):
+        for connections in self.pools.values():
+            connections.closeall()
+        self.pools.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def print_pg_report(report):
+    if "error" in report:
+        console.print(f"[bold red]{report['host']} : {report['error']}[/bold red]")
+        return
+    messages = {name: (message, action) for name, (_, message, action) in PG_RECOMMENDATIONS.items()}
+    table = Table(title=f"État de la Configuration PostgreSQL - {report['host']}", show_header=True, header_style="bold magenta")
+    table.add_column("Paramètre", style="dim", width=26)
+    table.add_column("Status")
+    table.add_column("Message", width=45)
+    table.add_column("Ligne à ajouter / modifier")
+    labels = {STATUS_OK: "[bold green]Correcte[/bold green]", STATUS_BAD: "[bold yellow]Mal configurée[/bold yellow]",
+              STATUS_MISSING: "[bold red]Manquante[/bold red]"}
+    for result in report["results"]:
+        message, action = ("", "") if result["status"] == STATUS_OK else messages[result["setting"]]
+        table.add_row(result["setting"], labels[result["status"]], message, action)
+    console.print(table)
+    for finding in report["hba"]:
+        console.print(f"[bold yellow]pg_hba.conf ligne {finding['line']} : {finding['message']}[/bold yellow]")
+    if "hba_error" in report:
+        console.print(f"[bold red]pg_hba_file_rules illisible ({report['hba_error']}) : passer le fichier avec --hba[/bold red]")
+    console.print(f"\n[bold blue]Note finale : {report['score']}/{report['max']}[/bold blue]")
+
+def print_fleet_summary(reports):
+    table = Table(title="Audit PostgreSQL de la flotte", show_header=True, header_style="bold magenta")
+    table.add_column("Instance")
+    table.add_column("Note")
+    table.add_column("Paramètres à corriger")
+    table.add_column("Règles pg_hba")
+    for report in reports:
+        if "error" in report:
+            table.add_row(report["host"], "[bold red]erreur[/bold red]", report["error"].splitlines()[0], "")
+            continue
+        failing = [r["setting"] for r in report["results"] if r["status"] != STATUS_OK]
+        table.add_row(report["host"], f"{report['score']}/{report['max']}", ", ".join(failing), str(len(report["hba"])))
+    console.print(table)
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit de configuration Apache ou PostgreSQL")
+    parser.add_argument("--hosts", help="fichier d'instances PostgreSQL (une par ligne : \"nom<TAB>dsn[<TAB>pg_hba.conf]\" ou dsn)")
+    parser.add_argument("--hba", help="pg_hba.conf à analyser seul ; avec --hosts, celui des instances "
+                                      "sans troisième colonne quand pg_hba_file_rules est illisible")
+    parser.add_argument("-j", "--jobs", type=int, default=32, help="instances auditées en parallèle")
+    parser.add_argument("--connect-timeout", type=int, default=CONNECT_TIMEOUT, help="délai de connexion par hôte (s)")
+    parser.add_argument("--statement-timeout", type=int, default=STATEMENT_TIMEOUT, help="délai par requête (ms)")
+    parser.add_argument("-o", "--output", help="écrire les rapports en JSON Lines dans ce fichier")
+    args = parser.parse_args()
+
+    if not args.hosts:
+        if not args.hba:
+            check_apache_config()
+            return
+        with open(args.hba, 'r') as f:
+            findings = evaluate_pg_hba(parse_pg_hba(f))
+        for line, status, message in findings:
+            console.print(f"[bold yellow]{args.hba} ligne {line} : {message}[/bold yellow]")
+        return
+
+    if psycopg2 is None:
+        console.print("[bold red]psycopg2 n'est pas installé : impossible d'interroger les instances PostgreSQL.[/bold red]")
+        return
+    out = open(args.output, 'w') if args.output else None
+    reports = []
+    try:
+        with PgFleet(args.connect_timeout, args.statement_timeout) as fleet:
+            for report in fleet.audit_hosts(list(iter_hosts(args.hosts, args.hba)), args.jobs):
+                if out:
+                    out.write(json.dumps(report, ensure_ascii=False) + "\n")
+                reports.append(report)
+    finally:
+        if out:
+            out.close()
+    if len(reports) == 1:
+        print_pg_report(reports[0])
+    else:
+        print_fleet_summary(reports)
+
 if __name__ == "__main__":
-    check_apache_config()
+    main()
@@ -0,0 +1,73 @@
+import re
+import time
+
+# Moteur partagé par ssh_conf.py et apache2.py : le fichier est découpé une
+# seule fois en index directive -> lignes, puis chaque règle n'est évaluée
+# que sur les lignes qui commencent par sa directive.
+
+STATUS_OK = "ok"
+STATUS_BAD = "bad"
+STATUS_MISSING = "missing"
+
+# Extrait le nom de la directive au début d'un motif comme r"^\s*User\s+(\w+)"
+_KEYWORD_RE = re.compile(r"^\^(?:\\s\*)?(\w+)")
+
+def compile_rules(recommendations):
+    """Précompile une table RECOMMENDATIONS en liste de règles indexables."""
+    rules = []
+    for directive, (pattern, condition, message, action) in recommendations.items():
+        keyword = _KEYWORD_RE.match(pattern)
+        if not keyword:
+            raise ValueError(f"Impossible d'extraire la directive du motif {pattern!r}")
+        rules.append((directive, keyword.group(1), re.compile(pattern), condition, message, action))
+    return rules
+
+def index_lines(lines):
+    """Associe chaque premier mot de ligne à la liste des lignes qui le portent (dans l'ordre)."""
+    index = {}
+    for line in lines:
+        words = line.split(None, 1)
+        if not words or words[0].startswith("#"):
+            continue
+        index.setdefault(words[0], []).append(line)
+    return index
+
+def evaluate(rules, index):
+    """Évalue les règles compilées sur l'index et retourne (résultats, points perdus)."""
+    results = []
+    penalty = 0
+    for directive, keyword, pattern, condition, message, action in rules:
+        status, value = STATUS_MISSING, None
+        for line in index.get(keyword, ()):
+            match = pattern.match(line)
+            if match:
+                value = match.group(1)
+                status = STATUS_OK if condition(value) else STATUS_BAD
+                break
+        if status == STATUS_BAD:
+            penalty += 0.5
+        elif status == STATUS_MISSING:
+            penalty += 1
+        results.append((directive, status, value, message, action))
+    return results, penalty
+
+def audit_file(path, rules):
+    """Audite un fichier : une lecture, un découpage, une évaluation.
+
+    Retourne un dict avec les résultats, la note et les temps de parsing et
+    d'évaluation en millisecondes.
+    """
+    start = time.perf_counter()
+    with open(path, 'r', errors='replace') as file:
+        index = index_lines(file)
+    parsed = time.perf_counter()
+    results, penalty = evaluate(rules, index)
+    done = time.perf_counter()
+    return {
+        "path": path,
+        "results": results,
+        "score": len(rules) - penalty,
+        "max": len(rules),
+        "parse_ms": (parsed - start) * 1000,
+        "eval_ms": (done - parsed) * 1000,
+    }
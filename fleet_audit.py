@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from conf_engine import compile_rules, audit_file
+
+# Audit en masse de configurations collectées (une par hôte) avec le moteur de
+# conf_engine.py. Les résultats sont écrits au fil de l'eau en JSON Lines.
+#
+#   python fleet_audit.py ssh /srv/collecte/ssh --jobs 8 -o ssh.jsonl
+#   python fleet_audit.py apache --manifest hotes.txt
+
+# Nom de fichier attendu par type d'audit lors du parcours d'un répertoire
+FILE_NAMES = {
+    "ssh": "sshd_config",
+    "apache": "apache2.conf",
+}
+
+_RULES = {}
+# Lot de chaque tâche en vol, pour signaler ses hôtes si la tâche échoue
+_BATCHES = {}
+
+def _get_rules(kind):
+    # Les règles contiennent des lambdas (non picklables) : chaque worker les
+    # compile une seule fois à partir du module d'origine.
+    if kind not in _RULES:
+        if kind == "ssh":
+            from ssh_conf import RECOMMENDATIONS
+        else:
+            from apache2 import RECOMMENDATIONS
+        _RULES[kind] = compile_rules(RECOMMENDATIONS)
+    return _RULES[kind]
+
+def audit_host(kind, host, path):
+    """Audite la configuration d'un hôte et retourne un dict sérialisable en JSON."""
+    try:
+        report = audit_file(path, _get_rules(kind))
+    except Exception as e:
+        # Fichier illisible ou condition de règle qui échoue sur une valeur
+        # inattendue : l'hôte est signalé en erreur, le reste du parc continue
+        return {"host": host, "path": path, "kind": kind, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "host": host,
+        "path": path,
+        "kind": kind,
+        "score": report["score"],
+        "max": report["max"],
+        "results": [
+            {"rule": directive, "status": status, "value": value}
+            for directive, status, value, message, action in report["results"]
+        ],
+        "parse_ms": round(report["parse_ms"], 3),
+        "eval_ms": round(report["eval_ms"], 3),
+    }
+
+def _audit_batch(kind, batch):
+    return [audit_host(kind, host, path) for host, path in batch]
+
+def iter_directory(root, kind):
+    """Parcourt root et produit (hôte, chemin) ; l'hôte est le chemin relatif du dossier parent."""
+    name = FILE_NAMES[kind]
+    for dirpath, dirnames, filenames in os.walk(root):
+        if name in filenames:
+            yield os.path.relpath(dirpath, root), os.path.join(dirpath, name)
+
+def iter_manifest(manifest):
+    """Lit un manifeste : une ligne par hôte, "hôte<TAB>chemin" ou simplement "chemin"."""
+    with open(manifest, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "\t" in line:
+                host, path = line.split("\t", 1)
+            else:
+                host, path = line, line
+            yield host, path
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def run_fleet(kind, targets, out, jobs=None, batch_size=64):
+    """Répartit les cibles sur un pool de processus et écrit une ligne JSON par hôte.
+
+    Le nombre de lots en vol est borné pour que la mémoire ne dépende pas de la
+    taille du parc. Retourne le nombre d'hôtes audités.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    max_pending = jobs * 2
+    count = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        for batch in _batched(targets, batch_size):
+            future = pool.submit(_audit_batch, kind, batch)
+            _BATCHES[future] = batch
+            pending.add(future)
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                count += _write_results(done, out)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            count += _write_results(done, out)
+    return count
+
+def _write_results(futures, out):
+    count = 0
+    for future in futures:
+        try:
+            results = future.result()
+        except Exception as e:
+            # Le lot entier est perdu (worker tué, résultat non picklable) :
+            # une ligne d'erreur par hôte plutôt que l'arrêt de tout le parc
+            results = [{"host": host, "path": path, "error": f"{type(e).__name__}: {e}"}
+                       for host, path in _BATCHES.pop(future, [])]
+        else:
+            _BATCHES.pop(future, None)
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+    out.flush()
+    return count
+
+def _peak_rss_mb():
+    # ru_maxrss est en kilo-octets sous Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, children / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit SSH / Apache d'un parc de configurations collectées")
+    parser.add_argument("kind", choices=sorted(FILE_NAMES), help="type de configuration à auditer")
+    parser.add_argument("roots", nargs="*", help="répertoires contenant une configuration par hôte")
+    parser.add_argument("--manifest", help="fichier listant les configurations (hôte<TAB>chemin)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="nombre de processus (défaut : nombre de CPU)")
+    parser.add_argument("--batch-size", type=int, default=64, help="nombre de fichiers par tâche envoyée au pool")
+    parser.add_argument("-o", "--output", help="fichier JSON Lines de sortie (défaut : sortie standard)")
+    args = parser.parse_args()
+
+    if not args.roots and not args.manifest:
+        parser.error("indiquer au moins un répertoire ou --manifest")
+
+    def targets():
+        for root in args.roots:
+            yield from iter_directory(root, args.kind)
+        if args.manifest:
+            yield from iter_manifest(args.manifest)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        count = run_fleet(args.kind, targets(), out, jobs=args.jobs, batch_size=args.batch_size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    own_rss, worker_rss = _peak_rss_mb()
+    rate = count / elapsed if elapsed else 0
+    print(f"{count} hôtes audités en {elapsed:.2f} s ({rate:.0f} fichiers/s), "
+          f"RSS max : {own_rss:.1f} Mo (principal), {worker_rss:.1f} Mo (workers)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
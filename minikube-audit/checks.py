@@ -0,0 +1,105 @@
+from snapshot import object_key
+
+# Vérifications par objet : chaque evaluate_<type> ne regarde qu'un objet et
+# retourne ses constats (liste de {"rule", "message"}). Les audits du menu et
+# la réévaluation incrémentale s'appuient sur les mêmes fonctions.
+
+def _finding(rule, message):
+    return {"rule": rule, "message": message}
+
+def pod_images(pod):
+    spec = pod.get("spec") or {}
+    return [c.get("image", "") for c in (spec.get("initContainers") or []) + (spec.get("containers") or [])]
+
+def evaluate_pod(pod):
+    findings = []
+    spec = pod.get("spec") or {}
+    for field in ("hostNetwork", "hostPID", "hostIPC"):
+        if spec.get(field):
+            findings.append(_finding("host-namespace", f"{field} activé"))
+    for container in (spec.get("initContainers") or []) + (spec.get("containers") or []):
+        name = container.get("name", "")
+        if (container.get("securityContext") or {}).get("privileged"):
+            findings.append(_finding("privileged", f"conteneur {name} privilégié"))
+        image = container.get("image", "")
+        tag = image.rsplit("/", 1)[-1]
+        if "@" not in tag and (":" not in tag or tag.endswith(":latest")):
+            findings.append(_finding("image-latest", f"conteneur {name} : image {image} non versionnée"))
+    return findings
+
+def evaluate_secret(secret):
+    if secret.get("type") == "Opaque":
+        return [_finding("opaque-secret", "secret Opaque (non chiffré, seulement encodé en base64)")]
+    return []
+
+def _evaluate_rules(role):
+    findings = []
+    for rule in role.get("rules") or []:
+        verbs = rule.get("verbs") or []
+        resources = rule.get("resources") or []
+        if "*" in verbs and "*" in resources:
+            findings.append(_finding("wildcard-rule", "tous les verbes sur toutes les ressources"))
+        elif "*" in verbs or "*" in resources:
+            findings.append(_finding("wildcard-rule", f"joker dans la règle {sorted(verbs)} sur {sorted(resources)}"))
+    return findings
+
+def evaluate_role(role):
+    return _evaluate_rules(role)
+
+def evaluate_clusterrole(role):
+    return _evaluate_rules(role)
+
+def _evaluate_binding(binding):
+    role_ref = binding.get("roleRef") or {}
+    if role_ref.get("kind") == "ClusterRole" and role_ref.get("name") == "cluster-admin":
+        subjects = ", ".join(f"{s.get('kind')}/{s.get('name')}" for s in binding.get("subjects") or [])
+        return [_finding("cluster-admin-binding", f"cluster-admin accordé à {subjects or 'aucun sujet'}")]
+    return []
+
+def evaluate_rolebinding(binding):
+    return _evaluate_binding(binding)
+
+def evaluate_clusterrolebinding(binding):
+    return _evaluate_binding(binding)
+
+def evaluate_networkpolicy(policy):
+    return []
+
+def evaluate_namespace(namespace):
+    return []
+
+EVALUATORS = {
+    "pods": evaluate_pod,
+    "secrets": evaluate_secret,
+    "roles": evaluate_role,
+    "clusterroles": evaluate_clusterrole,
+    "rolebindings": evaluate_rolebinding,
+    "clusterrolebindings": evaluate_clusterrolebinding,
+    "networkpolicies": evaluate_networkpolicy,
+    "namespaces": evaluate_namespace,
+}
+
+def evaluate_object(kind, obj):
+    evaluator = EVALUATORS.get(kind)
+    return evaluator(obj) if evaluator else []
+
+def evaluate_snapshot(snapshot):
+    """Index {(type, namespace, nom): constats} des objets qui ont au moins un constat."""
+    index = {}
+    for kind, objects in snapshot["kinds"].items():
+        for obj in objects:
+            findings = evaluate_object(kind, obj)
+            if findings:
+                index[object_key(kind, obj)] = findings
+    return index
+
+def evaluate_namespace_coverage(pods, policies):
+    """Constat d'un namespace d'après son nombre de pods et de NetworkPolicies."""
+    if pods and not policies:
+        return [_finding("no-network-policy", "des pods mais aucune NetworkPolicy")]
+    return []
+
+def namespaces_without_network_policy(policies, pod_namespaces):
+    """Namespaces qui ont des pods mais aucune NetworkPolicy (constat inter-objets)."""
+    covered = {(p.get("metadata") or {}).get("namespace") for p in policies}
+    return sorted(ns for ns in set(pod_namespaces) - covered if ns)
@@ -0,0 +1,142 @@
+import os
+import ssl
+import json
+import urllib.parse
+import urllib.request
+import urllib.error
+
+# Accès direct à l'API Kubernetes (par défaut à travers `kubectl proxy`) pour
+# lister les ressources par pages : chaque page est traitée dès qu'elle
+# arrive, la mémoire ne dépend que de la taille d'une page.
+
+API_URL_ENV = "KUBE_API_URL"
+API_TOKEN_ENV = "KUBE_TOKEN"
+DEFAULT_API_URL = "http://127.0.0.1:8001"
+DEFAULT_PAGE_SIZE = 500
+# Reprises d'une liste complète dont le jeton continue a expiré
+LIST_RETRIES = 3
+
+API_PATHS = {
+    "pods": "/api/v1/pods",
+    "secrets": "/api/v1/secrets",
+    "namespaces": "/api/v1/namespaces",
+    "roles": "/apis/rbac.authorization.k8s.io/v1/roles",
+    "clusterroles": "/apis/rbac.authorization.k8s.io/v1/clusterroles",
+    "rolebindings": "/apis/rbac.authorization.k8s.io/v1/rolebindings",
+    "clusterrolebindings": "/apis/rbac.authorization.k8s.io/v1/clusterrolebindings",
+    "networkpolicies": "/apis/networking.k8s.io/v1/networkpolicies",
+}
+
+class KubeAPIError(Exception):
+    def __init__(self, status, msg, body=None):
+        super().__init__(f"{status}: {msg}")
+        self.status = status
+        # Objet Status renvoyé par l'API, quand il y en a un
+        self.body = body or {}
+
+def ssl_context(verify=True, ca_file=None):
+    """Contexte TLS : certificat et nom d'hôte vérifiés, sauf verify=False (cluster de test)."""
+    context = ssl.create_default_context(cafile=ca_file)
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+class KubeAPI:
+    def __init__(self, base_url=None, token=None, verify=True, ca_file=None, timeout=30, page_size=DEFAULT_PAGE_SIZE):
+        self.base_url = (base_url or os.environ.get(API_URL_ENV) or DEFAULT_API_URL).rstrip("/")
+        self.page_size = page_size
+        self.token = token or os.environ.get(API_TOKEN_ENV)
+        self.timeout = timeout
+        self.context = ssl_context(verify, ca_file) if self.base_url.startswith("https:") else None
+
+    def request(self, path, params=None, timeout=None):
+        """Ouvre une requête GET et retourne la réponse (à fermer par l'appelant)."""
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        headers = {"Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        try:
+            return urllib.request.urlopen(urllib.request.Request(url, headers=headers),
+                                          timeout=timeout or self.timeout, context=self.context)
+        except urllib.error.HTTPError as e:
+            try:
+                body = json.load(e)
+            except ValueError:
+                body = {}
+            raise KubeAPIError(e.code, body.get("message", e.reason), body) from None
+
+    def get(self, path, params=None):
+        with self.request(path, params) as response:
+            return json.load(response)
+
+    def list_pages(self, kind, limit=None, inconsistent=True):
+        """Produit (objets, metadata de la liste) page par page en suivant le jeton continue.
+
+        Si le jeton continue expire (410), l'API propose un jeton pour finir la
+        liste sur un état plus récent : il est suivi si inconsistent est vrai,
+        car reprendre du début dupliquerait les objets déjà traités par l'appelant.
+        """
+        path = API_PATHS[kind]
+        token = None
+        while True:
+            try:
+                page = self.get(path, {"limit": limit or self.page_size, "continue": token})
+            except KubeAPIError as e:
+                token = (e.body.get("metadata") or {}).get("continue") if token and e.status == 410 else None
+                if not (token and inconsistent):
+                    raise
+                continue
+            metadata = page.get("metadata") or {}
+            yield page.get("items") or [], metadata
+            token = metadata.get("continue")
+            if not token:
+                return
+
+    def iter_objects(self, kind, limit=None):
+        """Objets d'un type un par un ; une seule page est en mémoire à la fois."""
+        for objects, _ in self.list_pages(kind, limit):
+            yield from objects
+
+    def list_all(self, kind, limit=None):
+        return list(self.iter_objects(kind, limit))
+
+    def list_with_version(self, kind, limit=None):
+        """Liste complète et resourceVersion de la liste, point de départ d'un watch.
+
+        La liste doit être cohérente avec la version : si le jeton continue
+        expire, elle est reprise du début (au plus LIST_RETRIES fois).
+        """
+        for attempt in range(LIST_RETRIES + 1):
+            objects = []
+            version = None
+            try:
+                for page, metadata in self.list_pages(kind, limit, inconsistent=False):
+                    objects.extend(page)
+                    version = metadata.get("resourceVersion", version)
+            except KubeAPIError as e:
+                if e.status != 410 or attempt == LIST_RETRIES:
+                    raise
+                continue
+            return objects, version
+
+    def watch(self, kind, resource_version, timeout_seconds=300):
+        """Produit (type d'événement, objet) depuis resource_version jusqu'à la fin du watch.
+
+        Le serveur ferme le flux après timeout_seconds ; l'appelant relance alors
+        le watch depuis le dernier resourceVersion vu. Une version trop ancienne
+        (410 Gone) lève KubeAPIError : il faut relister.
+        """
+        params = {"watch": "1", "resourceVersion": resource_version,
+                  "allowWatchBookmarks": "true", "timeoutSeconds": timeout_seconds}
+        with self.request(API_PATHS[kind], params, timeout=timeout_seconds + 30) as response:
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "ERROR":
+                    status = event.get("object") or {}
+                    raise KubeAPIError(status.get("code", 500), status.get("message", "erreur du watch"), status)
+                yield event.get("type"), event.get("object") or {}
@@ -1,5 +1,19 @@
 import os
+import sys
+import argparse
 import subprocess
+from datetime import datetime
+from collections import Counter
+
+# advisory_db.py est partagé à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from advisory_db import open_default, parse_image, ECOSYSTEM_IMAGE
+
+from snapshot import KINDS, collect, save, load, items, object_key
+from checks import evaluate_object, evaluate_secret, pod_images, namespaces_without_network_policy
+from kube_api import KubeAPI, DEFAULT_API_URL, DEFAULT_PAGE_SIZE, API_TOKEN_ENV
+from watcher import WATCHED_KINDS, watch_cluster
+from rbac_graph import RBACGraph, format_subject
 
 # Fonction pour vérifier si kubectl est configuré
 def check_kubectl():
@@ -9,44 +23,171 @@ def check_kubectl():
         print("Erreur : kubectl n'est pas installé ou configuré.")
         exit(1)
 
+# Instantané chargé (--snapshot) ou collecté (--save) au démarrage ; sinon
+# chaque audit collecte les types dont il a besoin
+_session_snapshot = None
+# API paginée (--api) : les pods et les secrets sont alors lus en flux, page par page
+_api = None
+
+# Types lus en flux avec --api ; les autres, peu nombreux, passent par un instantané
+STREAMED_KINDS = {"pods", "secrets"}
+
+def get_snapshot(kinds):
+    if _session_snapshot is not None:
+        return _session_snapshot
+    snapshot = collect(kinds, api=_api)
+    for kind, error in snapshot["errors"].items():
+        print(f"Erreur lors de la récupération des {kind} : {error}")
+    return snapshot
+
+def stream_objects(kind, snapshot=None):
+    """Objets d'un type : depuis l'instantané s'il le contient, sinon en flux sur l'API ou via kubectl."""
+    if snapshot is not None and kind in snapshot["kinds"]:
+        return iter(items(snapshot, kind))
+    if _session_snapshot is None and _api is not None:
+        return _api.iter_objects(kind)
+    return iter(items(get_snapshot([kind]), kind))
+
+def _print_table(headers, rows):
+    widths = [max([len(h)] + [len(str(row[i])) for row in rows]) for i, h in enumerate(headers)]
+    print("   ".join(h.ljust(w) for h, w in zip(headers, widths)).rstrip())
+    for row in rows:
+        print("   ".join(str(value).ljust(w) for value, w in zip(row, widths)).rstrip())
+
+def _print_findings(snapshot, kind):
+    for obj in items(snapshot, kind):
+        _print_object_findings(kind, obj)
+
+def _print_object_findings(kind, obj):
+    _, namespace, name = object_key(kind, obj)
+    for finding in evaluate_object(kind, obj):
+        print(f"  ! {namespace + '/' if namespace else ''}{name} : {finding['message']}")
+
+# Colonnes fixes : les lignes sont affichées au fil des pages, sans connaître toute la liste
+_POD_ROW = "{:<20} {:<50} {:<7} {:<10} {}"
+
 # Fonction pour lister les pods en cours d'exécution
-def audit_pods():
+def audit_pods(snapshot=None):
+    """Affiche les pods au fil de l'eau ; retourne les agrégats utiles aux autres audits.
+
+    {"images": {image: nombre de pods}, "namespaces": namespaces ayant des pods}
+    """
     print("\n=== Pods en cours d'exécution ===")
-    result = subprocess.run(["kubectl", "get", "pods", "--all-namespaces"], capture_output=True, text=True)
-    print(result.stdout)
+    print(_POD_ROW.format("NAMESPACE", "NAME", "READY", "STATUS", "RESTARTS"))
+    images = Counter()
+    namespaces = set()
+    count = 0
+    for pod in stream_objects("pods", snapshot):
+        metadata = pod.get("metadata") or {}
+        statuses = (pod.get("status") or {}).get("containerStatuses") or []
+        ready = f"{sum(1 for c in statuses if c.get('ready'))}/{len(statuses)}"
+        restarts = sum(c.get("restartCount", 0) for c in statuses)
+        print(_POD_ROW.format(metadata.get("namespace", ""), metadata.get("name", ""), ready,
+                              (pod.get("status") or {}).get("phase", ""), restarts))
+        _print_object_findings("pods", pod)
+        images.update(set(pod_images(pod)))
+        namespaces.add(metadata.get("namespace", ""))
+        count += 1
+    print(f"{count} pods")
+    return {"images": images, "namespaces": namespaces}
 
 # Fonction pour vérifier les secrets non chiffrés
-def audit_secrets():
+def audit_secrets(snapshot=None):
     print("\n=== Secrets non chiffrés ===")
-    command = "kubectl get secrets --all-namespaces -o jsonpath='{range .items[*]}{.metadata.name}{\"\\t\"}{.type}{\"\\n\"}{end}' | grep 'Opaque'"
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    print(result.stdout)
+    total = opaque = 0
+    for secret in stream_objects("secrets", snapshot):
+        total += 1
+        if evaluate_secret(secret):
+            opaque += 1
+            print(f"{(secret.get('metadata') or {}).get('name', '')}\t{secret.get('type')}")
+    print(f"{opaque} secrets Opaque sur {total}")
 
 # Fonction pour vérifier les RBAC (rôles et permissions)
-def audit_rbac():
+def audit_rbac(snapshot=None):
+    snapshot = snapshot or get_snapshot(["roles", "clusterroles", "rolebindings", "clusterrolebindings"])
     print("\n=== Rôles et rôles liés au cluster ===")
-    subprocess.run(["kubectl", "get", "roles", "--all-namespaces"])
-    subprocess.run(["kubectl", "get", "clusterroles"])
+    _print_table(["NAMESPACE", "NAME"], [object_key("roles", r)[1:] for r in items(snapshot, "roles")])
+    print()
+    _print_table(["NAME"], [(object_key("clusterroles", r)[2],) for r in items(snapshot, "clusterroles")])
+    for kind in ("roles", "clusterroles", "rolebindings", "clusterrolebindings"):
+        _print_findings(snapshot, kind)
+
+    # Permissions effectives : sujet -> binding -> rôle, wildcards compris
+    graph = RBACGraph(snapshot)
+    for title, grants in (("Sujets équivalents à cluster-admin", graph.cluster_admin_equivalents()),
+                          ("Sujets pouvant lire les secrets de tout le cluster", graph.who_can("get", "secrets"))):
+        print(f"\n=== {title} ===")
+        for subject, bindings in sorted(grants.items()):
+            print(f"{format_subject(subject)}\tvia {', '.join(f'{kind}/{name}' for kind, _, name in sorted(bindings))}")
 
 # Fonction pour vérifier les NetworkPolicies
-def audit_network_policies():
+def audit_network_policies(snapshot=None, pod_namespaces=None):
+    snapshot = snapshot or get_snapshot(["networkpolicies"])
     print("\n=== NetworkPolicies configurées ===")
-    subprocess.run(["kubectl", "get", "networkpolicies", "--all-namespaces"])
+    _print_table(["NAMESPACE", "NAME"], [object_key("networkpolicies", p)[1:] for p in items(snapshot, "networkpolicies")])
+    if pod_namespaces is None:
+        pod_namespaces = {(pod.get("metadata") or {}).get("namespace") for pod in stream_objects("pods", snapshot)}
+    for namespace in namespaces_without_network_policy(items(snapshot, "networkpolicies"), pod_namespaces):
+        print(f"  ! namespace {namespace} : des pods mais aucune NetworkPolicy")
 
 # Fonction pour vérifier les images des pods
-def audit_pod_images():
+def audit_pod_images(snapshot=None, images=None):
     print("\n=== Images des pods et leurs versions ===")
-    command = "kubectl get pods --all-namespaces -o jsonpath='{range .items[*]}{.spec.containers[*].image}{\"\\n\"}{end}'"
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    print(result.stdout)
+    if images is None:
+        # Agrégation au fil des pages : seules les images distinctes restent en mémoire
+        images = Counter()
+        for pod in stream_objects("pods", snapshot):
+            images.update(set(pod_images(pod)))
+    _print_table(["IMAGE", "PODS"], sorted(images.items()))
+
+    # Recherche des avis connus pour toutes les images en une seule requête
+    images = sorted(images)
+    db = open_default()
+    if db is None:
+        print("Base d'avis absente : lancer `python advisory_db.py build <flux>` pour vérifier les images.")
+        return
+    with db:
+        queries = [(ECOSYSTEM_IMAGE, *parse_image(image)) for image in images]
+        vulnerable = [(image, advisories) for image, advisories in zip(images, db.lookup_many(queries)) if advisories]
+    print("=== Images avec des vulnérabilités connues ===")
+    if not vulnerable:
+        print("Aucune image vulnérable trouvée (les images sans tag ou en latest ne sont pas vérifiées).")
+    for image, advisories in vulnerable:
+        for advisory in advisories:
+            fixed = f", corrigé en {advisory['fixed']}" if advisory["fixed"] else ""
+            print(f"{image} : {advisory['advisory_id'] or ''} {advisory['title'] or ''}{fixed}")
 
-# Fonction pour exécuter toutes les vérifications
+# Fonction pour exécuter toutes les vérifications : un seul instantané, et un
+# seul passage sur les pods dont les agrégats servent aux autres audits
 def full_audit():
-    audit_pods()
-    audit_secrets()
-    audit_rbac()
-    audit_network_policies()
-    audit_pod_images()
+    if _session_snapshot is None and _api is not None:
+        snapshot = get_snapshot([kind for kind in KINDS if kind not in STREAMED_KINDS])
+    else:
+        snapshot = get_snapshot(KINDS)
+    pods = audit_pods(snapshot)
+    audit_secrets(snapshot)
+    audit_rbac(snapshot)
+    audit_network_policies(snapshot, pods["namespaces"])
+    audit_pod_images(snapshot, pods["images"])
+
+# Audit continu : liste initiale puis suivi des modifications via l'API
+def watch_audit(api, kinds=WATCHED_KINDS):
+    def on_change(event_type, kind, key, added, removed):
+        _, namespace, name = key
+        label = f"{datetime.now():%H:%M:%S} {kind} {namespace + '/' if namespace else ''}{name}"
+        for finding in added:
+            print(f"{label} ! {finding['message']}")
+        for finding in removed:
+            print(f"{label} résolu : {finding['message']}")
+
+    def on_error(kind, message):
+        print(f"{datetime.now():%H:%M:%S} Erreur du watch des {kind} : {message}")
+
+    print(f"Surveillance des {', '.join(kinds)} sur {api.base_url} (Ctrl+C pour arrêter)")
+    try:
+        watch_cluster(api, kinds, on_change, on_error)
+    except KeyboardInterrupt:
+        print("\nSurveillance arrêtée.")
 
 # Menu interactif
 def show_menu():
@@ -84,5 +225,34 @@ def show_menu():
 
 # Point d'entrée du script
 if __name__ == "__main__":
-    check_kubectl()
-    show_menu()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Mini Audit - Outil d'audit Kubernetes pour Minikube")
+    parser.add_argument("--snapshot", help="rejouer un instantané enregistré au lieu d'interroger le cluster")
+    parser.add_argument("--save", help="collecter un instantané complet du cluster et l'enregistrer dans ce fichier")
+    parser.add_argument("--full", action="store_true", help="exécuter l'audit complet sans passer par le menu")
+    parser.add_argument("--api", nargs="?", const=DEFAULT_API_URL, metavar="URL",
+                        help=f"lire l'API par pages (défaut : kubectl proxy sur {DEFAULT_API_URL}) au lieu de kubectl")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="objets par page avec --api")
+    parser.add_argument("--ca-file", help=f"certificat de l'autorité du cluster pour une URL https (jeton dans ${API_TOKEN_ENV})")
+    parser.add_argument("--insecure", action="store_true", help="ne pas vérifier le certificat de l'API (cluster de test uniquement)")
+    parser.add_argument("--watch", action="store_true",
+                        help="audit continu : suivre les modifications du cluster via l'API (implique --api)")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch_audit(KubeAPI(args.api or DEFAULT_API_URL, verify=not args.insecure, ca_file=args.ca_file, page_size=args.page_size))
+        sys.exit(0)
+    if args.snapshot:
+        _session_snapshot = load(args.snapshot)
+    else:
+        if args.api:
+            _api = KubeAPI(args.api, verify=not args.insecure, ca_file=args.ca_file, page_size=args.page_size)
+        else:
+            check_kubectl()
+        if args.save:
+            _session_snapshot = get_snapshot(KINDS)
+            save(_session_snapshot, args.save)
+            print(f"Instantané enregistré dans {args.save}")
+    if args.full:
+        full_audit()
+    else:
+        show_menu()
\ No newline at end of file
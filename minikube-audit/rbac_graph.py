@@ -0,0 +1,249 @@
+import sys
+import time
+import random
+import argparse
+from collections import defaultdict
+
+from snapshot import collect, load, items
+
+# Graphe RBAC : sujet -> binding -> rôle -> règles, construit une fois à partir
+# de l'instantané. Les permissions effectives sont dépliées dans un index
+# {(portée, verbe, groupe d'API, ressource): {sujet: bindings}} ; une question
+# comme « qui peut lire les secrets du namespace X » se résout alors en un
+# nombre fixe de lectures de dictionnaire (combinaisons avec les jokers), sans
+# reparcourir les bindings.
+
+ANY = "*"
+# Portée d'une permission : un namespace, ou CLUSTER pour tout le cluster
+CLUSTER = "*"
+
+RBAC_KINDS = ["roles", "clusterroles", "rolebindings", "clusterrolebindings"]
+
+def subject_key(subject, binding_namespace=""):
+    """Identifiant d'un sujet : (type, namespace, nom) ; seuls les ServiceAccounts ont un namespace."""
+    kind = subject.get("kind", "")
+    namespace = ""
+    if kind == "ServiceAccount":
+        namespace = subject.get("namespace") or binding_namespace
+    return kind, namespace, subject.get("name", "")
+
+def implied_groups(subject):
+    """Groupes dont un sujet hérite implicitement des droits."""
+    kind, namespace, _ = subject
+    if kind == "ServiceAccount":
+        return [("Group", "", "system:serviceaccounts"), ("Group", "", f"system:serviceaccounts:{namespace}"),
+                ("Group", "", "system:authenticated")]
+    if kind == "User":
+        return [("Group", "", "system:authenticated")]
+    return []
+
+def format_subject(subject):
+    kind, namespace, name = subject
+    return f"{kind}/{namespace + '/' if namespace else ''}{name}"
+
+def _rule_keys(rule):
+    """Clés (verbe, groupe, ressource) accordées par une règle sur un type entier.
+
+    Les règles limitées à des resourceNames ne donnent pas accès à tout le type
+    et les nonResourceURLs ne portent pas sur des ressources : elles sont ignorées.
+    """
+    if rule.get("resourceNames"):
+        return []
+    return [(verb, group, resource)
+            for verb in rule.get("verbs") or []
+            for group in rule.get("apiGroups") or [""]
+            for resource in rule.get("resources") or []]
+
+class RBACGraph:
+    def __init__(self, snapshot):
+        # Rôle -> règles ; clés ("Role", namespace, nom) ou ("ClusterRole", "", nom)
+        self.roles = {}
+        for role in items(snapshot, "roles"):
+            metadata = role.get("metadata") or {}
+            self.roles[("Role", metadata.get("namespace", ""), metadata.get("name", ""))] = role.get("rules") or []
+        for role in items(snapshot, "clusterroles"):
+            self.roles[("ClusterRole", "", (role.get("metadata") or {}).get("name", ""))] = role.get("rules") or []
+
+        # Binding -> (rôle, portée, sujets) et sujet -> bindings
+        self.bindings = {}
+        self.subject_bindings = defaultdict(set)
+        for kind, binding_kind in (("rolebindings", "RoleBinding"), ("clusterrolebindings", "ClusterRoleBinding")):
+            for binding in items(snapshot, kind):
+                metadata = binding.get("metadata") or {}
+                namespace = metadata.get("namespace", "") if binding_kind == "RoleBinding" else ""
+                key = (binding_kind, namespace, metadata.get("name", ""))
+                role_ref = binding.get("roleRef") or {}
+                role_kind = role_ref.get("kind", "")
+                role = (role_kind, namespace if role_kind == "Role" else "", role_ref.get("name", ""))
+                subjects = [subject_key(s, namespace) for s in binding.get("subjects") or []]
+                # Un ClusterRole lié par un RoleBinding ne vaut que dans le namespace du binding
+                scope = namespace if binding_kind == "RoleBinding" else CLUSTER
+                self.bindings[key] = (role, scope, subjects)
+                for subject in subjects:
+                    self.subject_bindings[subject].add(key)
+
+        # Index des permissions effectives, déplié une fois par règle de rôle lié
+        self.index = defaultdict(lambda: defaultdict(set))
+        self.subject_permissions = defaultdict(set)
+        expanded = {}
+        for binding, (role, scope, subjects) in self.bindings.items():
+            if role not in expanded:
+                expanded[role] = {key for rule in self.roles.get(role, []) for key in _rule_keys(rule)}
+            for verb, group, resource in expanded[role]:
+                grants = self.index[(scope, verb, group, resource)]
+                for subject in subjects:
+                    grants[subject].add(binding)
+                    self.subject_permissions[subject].add((scope, verb, group, resource))
+
+    def _lookup(self, scopes, verb, resource, group):
+        found = defaultdict(set)
+        for scope in scopes:
+            for v in {verb, ANY}:
+                for g in {group, ANY}:
+                    for r in {resource, ANY}:
+                        for subject, bindings in self.index.get((scope, v, g, r), {}).items():
+                            found[subject] |= bindings
+        return found
+
+    def who_can(self, verb, resource, namespace=None, group=""):
+        """{sujet: bindings} des sujets qui peuvent faire verb sur resource.
+
+        Avec namespace, les droits du namespace et ceux du cluster comptent ;
+        sans namespace, seulement les droits sur tout le cluster.
+        """
+        scopes = {namespace, CLUSTER} if namespace else {CLUSTER}
+        return dict(self._lookup(scopes, verb, resource, group))
+
+    def can(self, subject, verb, resource, namespace=None, group=""):
+        """Le sujet (ou un groupe dont il hérite) peut-il faire verb sur resource ?"""
+        grants = self.who_can(verb, resource, namespace, group)
+        return any(s in grants for s in [subject] + implied_groups(subject))
+
+    def cluster_admin_equivalents(self, kind=None):
+        """{sujet: bindings} des sujets qui ont tous les verbes sur toutes les ressources du cluster."""
+        grants = self.index.get((CLUSTER, ANY, ANY, ANY), {})
+        return {subject: bindings for subject, bindings in grants.items() if kind is None or subject[0] == kind}
+
+    def permissions(self, subject):
+        """Clés (portée, verbe, groupe, ressource) accordées directement au sujet."""
+        return self.subject_permissions.get(subject, set())
+
+    def explain(self, subject, binding):
+        """Chemin sujet -> binding -> rôle -> règles pour un binding retourné par une requête."""
+        role, scope, _ = self.bindings[binding]
+        return {"subject": subject, "binding": binding, "role": role, "scope": scope, "rules": self.roles.get(role, [])}
+
+def naive_who_can(snapshot, verb, resource, namespace=None, group=""):
+    """Référence sans index : reparcourt tous les bindings et leurs règles à chaque question."""
+    roles = {}
+    for role in items(snapshot, "roles"):
+        metadata = role.get("metadata") or {}
+        roles[("Role", metadata.get("namespace", ""), metadata.get("name", ""))] = role.get("rules") or []
+    for role in items(snapshot, "clusterroles"):
+        roles[("ClusterRole", "", (role.get("metadata") or {}).get("name", ""))] = role.get("rules") or []
+    found = set()
+    for kind in ("rolebindings", "clusterrolebindings"):
+        for binding in items(snapshot, kind):
+            binding_ns = (binding.get("metadata") or {}).get("namespace", "") if kind == "rolebindings" else ""
+            if binding_ns and binding_ns != namespace:
+                continue
+            role_ref = binding.get("roleRef") or {}
+            role = (role_ref.get("kind", ""), binding_ns if role_ref.get("kind") == "Role" else "", role_ref.get("name", ""))
+            for v, g, r in (key for rule in roles.get(role, []) for key in _rule_keys(rule)):
+                if v in (verb, ANY) and g in (group, ANY) and r in (resource, ANY):
+                    found.update(subject_key(s, binding_ns) for s in binding.get("subjects") or [])
+                    break
+    return found
+
+def synthetic_snapshot(namespaces=1000, accounts=10, roles=5, bindings=5, clusterroles=200, seed=0):
+    """Instantané RBAC synthétique : roles et bindings par namespace, plus des ClusterRoles partagés."""
+    rng = random.Random(seed)
+    verbs = ["get", "list", "watch", "create", "update", "delete"]
+    resources = ["pods", "secrets", "configmaps", "services", "deployments", "jobs", "pods/exec"]
+
+    def rule():
+        if rng.random() < 0.02:
+            return {"apiGroups": ["*"], "resources": ["*"], "verbs": ["*"]}
+        return {"apiGroups": [""], "resources": rng.sample(resources, 2), "verbs": rng.sample(verbs, 3)}
+
+    snapshot = {"kinds": {"roles": [], "clusterroles": [], "rolebindings": [], "clusterrolebindings": []}}
+    for i in range(clusterroles):
+        snapshot["kinds"]["clusterroles"].append({"metadata": {"name": f"cr-{i}"}, "rules": [rule() for _ in range(3)]})
+    for n in range(namespaces):
+        ns = f"ns-{n}"
+        for i in range(roles):
+            snapshot["kinds"]["roles"].append({"metadata": {"namespace": ns, "name": f"role-{i}"},
+                                               "rules": [rule() for _ in range(3)]})
+        for i in range(bindings):
+            if rng.random() < 0.5:
+                role_ref = {"kind": "Role", "name": f"role-{rng.randrange(roles)}"}
+            else:
+                role_ref = {"kind": "ClusterRole", "name": f"cr-{rng.randrange(clusterroles)}"}
+            subjects = [{"kind": "ServiceAccount", "name": f"sa-{rng.randrange(accounts)}", "namespace": ns}
+                        for _ in range(rng.randint(1, 3))]
+            snapshot["kinds"]["rolebindings"].append({"metadata": {"namespace": ns, "name": f"rb-{i}"},
+                                                      "roleRef": role_ref, "subjects": subjects})
+    for i in range(namespaces // 10):
+        ns = f"ns-{rng.randrange(namespaces)}"
+        snapshot["kinds"]["clusterrolebindings"].append({
+            "metadata": {"name": f"crb-{i}"},
+            "roleRef": {"kind": "ClusterRole", "name": f"cr-{rng.randrange(clusterroles)}"},
+            "subjects": [{"kind": "ServiceAccount", "name": f"sa-{rng.randrange(accounts)}", "namespace": ns}]})
+    return snapshot
+
+def benchmark(namespaces=1000, queries=10_000, naive_queries=50):
+    """Construit un graphe sur un RBAC synthétique et compare les requêtes indexées au parcours naïf."""
+    snapshot = synthetic_snapshot(namespaces)
+    count = sum(len(objects) for objects in snapshot["kinds"].values())
+    print(f"RBAC synthétique : {count} objets dont "
+          f"{len(snapshot['kinds']['rolebindings']) + len(snapshot['kinds']['clusterrolebindings'])} bindings")
+
+    start = time.perf_counter()
+    graph = RBACGraph(snapshot)
+    print(f"Construction du graphe : {time.perf_counter() - start:.2f} s, {len(graph.index)} clés de permission")
+
+    rng = random.Random(1)
+    questions = [(rng.choice(["get", "list", "delete"]), rng.choice(["secrets", "pods", "configmaps"]),
+                  f"ns-{rng.randrange(namespaces)}") for _ in range(queries)]
+    start = time.perf_counter()
+    for verb, resource, namespace in questions:
+        graph.who_can(verb, resource, namespace)
+    elapsed = time.perf_counter() - start
+    print(f"{queries} requêtes indexées : {elapsed * 1000:.0f} ms ({elapsed / queries * 1e6:.0f} µs/requête)")
+
+    start = time.perf_counter()
+    for verb, resource, namespace in questions[:naive_queries]:
+        assert naive_who_can(snapshot, verb, resource, namespace) == set(graph.who_can(verb, resource, namespace))
+    elapsed = time.perf_counter() - start
+    print(f"{naive_queries} requêtes naïves : {elapsed * 1000:.0f} ms ({elapsed / naive_queries * 1e3:.1f} ms/requête)")
+    print(f"{len(graph.cluster_admin_equivalents())} sujets équivalents à cluster-admin")
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse des permissions RBAC effectives")
+    parser.add_argument("--snapshot", help="instantané enregistré (défaut : collecte via kubectl)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    who_parser = sub.add_parser("who-can", help="sujets qui peuvent faire un verbe sur une ressource")
+    who_parser.add_argument("verb")
+    who_parser.add_argument("resource")
+    who_parser.add_argument("-n", "--namespace", help="namespace (défaut : droits sur tout le cluster)")
+    who_parser.add_argument("--group", default="", help="groupe d'API de la ressource (défaut : groupe core)")
+    sub.add_parser("admins", help="sujets équivalents à cluster-admin")
+    sub.add_parser("benchmark", help="RBAC synthétique de 1000 namespaces, 10k requêtes")
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        benchmark()
+        return
+    snapshot = load(args.snapshot) if args.snapshot else collect(RBAC_KINDS)
+    for kind, error in snapshot["errors"].items():
+        print(f"Erreur lors de la récupération des {kind} : {error}", file=sys.stderr)
+    graph = RBACGraph(snapshot)
+    if args.command == "who-can":
+        grants = graph.who_can(args.verb, args.resource, args.namespace, args.group)
+    else:
+        grants = graph.cluster_admin_equivalents()
+    for subject, bindings in sorted(grants.items()):
+        print(f"{format_subject(subject)}\tvia {', '.join(f'{k}/{n}' for k, _, n in sorted(bindings))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Instantané du cluster : toutes les ressources utiles aux audits sont listées
+# en JSON en un seul passage (un `kubectl get` par type, lancés en parallèle),
+# puis chaque audit est évalué sur cet instantané. Un instantané enregistré
+# peut être rejoué sans cluster.
+
+KINDS = [
+    "pods",
+    "secrets",
+    "roles",
+    "clusterroles",
+    "rolebindings",
+    "clusterrolebindings",
+    "networkpolicies",
+    "namespaces",
+]
+
+# Champ "kind" des objets -> nom du type dans l'instantané
+KIND_NAMES = {
+    "Pod": "pods",
+    "Secret": "secrets",
+    "Role": "roles",
+    "ClusterRole": "clusterroles",
+    "RoleBinding": "rolebindings",
+    "ClusterRoleBinding": "clusterrolebindings",
+    "NetworkPolicy": "networkpolicies",
+    "Namespace": "namespaces",
+}
+
+# Types sans namespace : la clé d'un objet n'a pas de namespace
+CLUSTER_SCOPED = {"clusterroles", "clusterrolebindings", "namespaces"}
+
+def object_key(kind, obj):
+    """Identifiant d'un objet dans l'instantané : (type, namespace, nom)."""
+    metadata = obj.get("metadata") or {}
+    return kind, metadata.get("namespace", ""), metadata.get("name", "")
+
+# Champs des Secrets qui contiennent les valeurs : jamais gardés dans l'instantané,
+# les audits n'utilisent que les métadonnées et le type
+SECRET_VALUE_FIELDS = ("data", "stringData")
+
+def strip_secret_values(obj):
+    for field in SECRET_VALUE_FIELDS:
+        obj.pop(field, None)
+    return obj
+
+def _kubectl_list(kind, timeout):
+    command = ["kubectl", "get", kind, "-o", "json"]
+    if kind not in CLUSTER_SCOPED:
+        command.append("--all-namespaces")
+    result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"kubectl get {kind} a échoué")
+    return json.loads(result.stdout).get("items", [])
+
+def collect(kinds=KINDS, timeout=60, api=None):
+    """Liste les types demandés en parallèle et retourne l'instantané.
+
+    Avec api (kube_api.KubeAPI), les listes sont lues page par page sur l'API
+    au lieu de lancer kubectl. Un type qui ne peut pas être listé (droits, API
+    absente) est noté dans "errors" sans empêcher les autres.
+    """
+    source = api.base_url if api is not None else "kubectl"
+    snapshot = {"collected_at": time.time(), "source": source, "kinds": {}, "errors": {}}
+    with ThreadPoolExecutor(max_workers=max(len(kinds), 1)) as pool:
+        if api is not None:
+            futures = {kind: pool.submit(api.list_all, kind) for kind in kinds}
+        else:
+            futures = {kind: pool.submit(_kubectl_list, kind, timeout) for kind in kinds}
+        for kind, future in futures.items():
+            try:
+                objects = future.result()
+                if kind == "secrets":
+                    objects = [strip_secret_values(obj) for obj in objects]
+                snapshot["kinds"][kind] = objects
+            except Exception as e:
+                snapshot["kinds"][kind] = []
+                snapshot["errors"][kind] = str(e)
+    return snapshot
+
+def save(snapshot, path):
+    with open(path + ".tmp", "w") as f:
+        json.dump(snapshot, f)
+    # Remplacement atomique : un instantané n'est jamais à moitié écrit
+    os.replace(path + ".tmp", path)
+
+def load(path):
+    """Instantané enregistré par save(), ou une liste `kubectl get ... -o json` de types mélangés."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    if "kinds" in data:
+        return data
+    snapshot = {"collected_at": None, "source": path, "kinds": {}, "errors": {}}
+    for item in data.get("items", []):
+        kind = KIND_NAMES.get(item.get("kind"))
+        if kind == "secrets":
+            strip_secret_values(item)
+        if kind:
+            snapshot["kinds"].setdefault(kind, []).append(item)
+    return snapshot
+
+def items(snapshot, kind):
+    return snapshot["kinds"].get(kind, [])
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Les modules de minikube-audit et le faux serveur sont importés directement
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from fake_kube_api import FakeKubeAPI
+
+@pytest.fixture
+def fake_api():
+    server = FakeKubeAPI().start()
+    yield server
+    server.stop()
@@ -0,0 +1,170 @@
+import json
+import time
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from kube_api import API_PATHS
+
+# Faux serveur d'API Kubernetes pour les tests : listes paginées (limit /
+# continue, jetons expirés) et watch (resourceVersion, BOOKMARK, 410 Gone)
+# sur un serveur HTTP local lancé dans un thread.
+
+KIND_BY_PATH = {path: kind for kind, path in API_PATHS.items()}
+
+class FakeKubeAPI:
+    def __init__(self):
+        self.objects = {kind: {} for kind in API_PATHS}
+        self.version = 1
+        self.requests = []          # (type, paramètres) de chaque requête reçue
+        self.expired_tokens = set()  # jetons continue qui répondent 410
+        self.inconsistent_continue = True
+        self.events = []            # (version, type, événement) dans l'ordre
+        self.compacted = 0          # un watch depuis une version antérieure reçoit 410
+        self.lock = threading.Condition()
+        self.server = None
+
+    # --- état du cluster -------------------------------------------------
+
+    def _stamp(self, obj):
+        self.version += 1
+        obj.setdefault("metadata", {})["resourceVersion"] = str(self.version)
+        return obj
+
+    def _event(self, kind, event_type, obj):
+        self.events.append((self.version, kind, {"type": event_type, "object": obj}))
+        self.lock.notify_all()
+
+    def add(self, kind, obj, event="ADDED"):
+        with self.lock:
+            metadata = obj.setdefault("metadata", {})
+            self.objects[kind][(metadata.get("namespace", ""), metadata["name"])] = self._stamp(obj)
+            self._event(kind, event, obj)
+        return obj
+
+    def modify(self, kind, obj):
+        return self.add(kind, obj, "MODIFIED")
+
+    def delete(self, kind, obj, record=True):
+        """Supprime un objet ; record=False simule une suppression manquée pendant une coupure."""
+        with self.lock:
+            metadata = obj.get("metadata") or {}
+            obj = self.objects[kind].pop((metadata.get("namespace", ""), metadata["name"]))
+            self._stamp(obj)
+            if record:
+                self._event(kind, "DELETED", obj)
+
+    def bookmark(self, kind):
+        with self.lock:
+            self.version += 1
+            self._event(kind, "BOOKMARK", {"kind": "Bookmark", "metadata": {"resourceVersion": str(self.version)}})
+
+    def compact(self):
+        """Oublie l'historique : tout watch depuis une version passée reçoit 410 Gone."""
+        with self.lock:
+            self.version += 1
+            self.compacted = self.version
+            self.events.clear()
+
+    def watch_requests(self, kind):
+        return [params for request, watched, params in self.requests if request == "watch" and watched == kind]
+
+    # --- HTTP -------------------------------------------------------------
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                params = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+                kind = KIND_BY_PATH.get(url.path)
+                if kind is None:
+                    return fake._send(self, 404, {"kind": "Status", "code": 404, "message": "not found"})
+                if params.get("watch"):
+                    fake._watch(self, kind, params)
+                else:
+                    fake._list(self, kind, params)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        server, self.server = self.server, None
+        server.shutdown()
+        server.server_close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def _send(self, handler, code, body):
+        data = json.dumps(body).encode()
+        handler.send_response(code)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _list(self, handler, kind, params):
+        token = params.get("continue")
+        with self.lock:
+            self.requests.append(("list", kind, params))
+            if token in self.expired_tokens:
+                body = {"kind": "Status", "code": 410, "reason": "Expired",
+                        "message": "The provided continue parameter is too old"}
+                if self.inconsistent_continue:
+                    # Jeton qui reprend au même endroit, sur l'état courant
+                    body["metadata"] = {"continue": f"{self.version}:{token.split(':')[1]}:inconsistent"}
+                return self._send(handler, 410, body)
+            version, offset = (token.split(":")[:2] if token else (str(self.version), "0"))
+            objects = [obj for key, obj in sorted(self.objects[kind].items())]
+            offset = int(offset)
+            limit = int(params.get("limit") or len(objects) or 1)
+            page = objects[offset:offset + limit]
+            metadata = {"resourceVersion": version}
+            if offset + limit < len(objects):
+                metadata["continue"] = f"{version}:{offset + limit}"
+        self._send(handler, 200, {"kind": "List", "items": page, "metadata": metadata})
+
+    def _watch(self, handler, kind, params):
+        version = int(params.get("resourceVersion") or 0)
+        deadline = time.monotonic() + float(params.get("timeoutSeconds") or 1)
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.end_headers()
+        with self.lock:
+            self.requests.append(("watch", kind, params))
+            if version < self.compacted:
+                # Comme l'API : le flux s'ouvre puis renvoie un événement ERROR
+                events = [{"type": "ERROR", "object": {"kind": "Status", "code": 410, "reason": "Expired",
+                                                       "message": f"too old resource version: {version}"}}]
+                return self._write_events(handler, events)
+        sent = version
+        while True:
+            with self.lock:
+                pending = [(v, event) for v, watched, event in self.events if watched == kind and v > sent]
+                if not pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self.server is None:
+                        return
+                    self.lock.wait(min(remaining, 0.1))
+                    continue
+            sent = pending[-1][0]
+            if not self._write_events(handler, [event for _, event in pending]):
+                return
+
+    def _write_events(self, handler, events):
+        try:
+            for event in events:
+                handler.wfile.write((json.dumps(event) + "\n").encode())
+            handler.wfile.flush()
+            return True
+        except OSError:
+            return False
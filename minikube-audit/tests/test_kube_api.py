@@ -0,0 +1,102 @@
+import ssl
+import importlib.util
+import os
+
+import pytest
+
+from kube_api import KubeAPI, KubeAPIError, ssl_context
+
+def pod(i, image="nginx:1.25", namespace=None):
+    return {"metadata": {"namespace": namespace or f"ns{i % 3}", "name": f"pod-{i:05d}"},
+            "spec": {"containers": [{"name": "c", "image": image}]},
+            "status": {"phase": "Running", "containerStatuses": [{"ready": True, "restartCount": 0}]}}
+
+def list_requests(fake_api):
+    return [params for request, _, params in fake_api.requests if request == "list"]
+
+def test_pagination_follows_continue(fake_api):
+    for i in range(250):
+        fake_api.add("pods", pod(i))
+    api = KubeAPI(fake_api.url, page_size=100)
+    pages = [objects for objects, _ in api.list_pages("pods")]
+    assert [len(objects) for objects in pages] == [100, 100, 50]
+    names = [obj["metadata"]["name"] for objects in pages for obj in objects]
+    assert sorted(names) == [f"pod-{i:05d}" for i in range(250)]
+    requests = list_requests(fake_api)
+    assert [r.get("limit") for r in requests] == ["100"] * 3
+    assert "continue" not in requests[0] and all("continue" in r for r in requests[1:])
+
+def test_iter_objects_fetches_pages_lazily(fake_api):
+    for i in range(30):
+        fake_api.add("pods", pod(i))
+    objects = KubeAPI(fake_api.url, page_size=10).iter_objects("pods")
+    next(objects)
+    assert len(list_requests(fake_api)) == 1
+    assert len(list(objects)) == 29
+    assert len(list_requests(fake_api)) == 3
+
+def test_expired_continue_finishes_with_inconsistent_token(fake_api):
+    for i in range(25):
+        fake_api.add("pods", pod(i))
+    api = KubeAPI(fake_api.url, page_size=10)
+    first_token = f"{fake_api.version}:10"
+    fake_api.expired_tokens.add(first_token)
+    names = [obj["metadata"]["name"] for obj in api.iter_objects("pods")]
+    # Aucun objet perdu ni dupliqué malgré l'expiration
+    assert sorted(names) == [f"pod-{i:05d}" for i in range(25)]
+
+def test_expired_continue_without_token_raises(fake_api):
+    for i in range(25):
+        fake_api.add("pods", pod(i))
+    fake_api.inconsistent_continue = False
+    fake_api.expired_tokens.add(f"{fake_api.version}:10")
+    with pytest.raises(KubeAPIError) as error:
+        list(KubeAPI(fake_api.url, page_size=10).iter_objects("pods"))
+    assert error.value.status == 410
+
+def test_list_with_version_relists_after_expiry(fake_api):
+    for i in range(25):
+        fake_api.add("pods", pod(i))
+    version = fake_api.version
+    fake_api.expired_tokens.add(f"{version}:10")
+    # La première liste expire ; la seconde part d'une nouvelle version
+    fake_api.add("pods", pod(99))
+    fake_api.expired_tokens.discard(f"{fake_api.version}:10")
+    objects, list_version = KubeAPI(fake_api.url, page_size=10).list_with_version("pods")
+    assert len(objects) == 26
+    assert list_version == str(fake_api.version)
+
+def test_http_error_raises_kube_api_error(fake_api):
+    with pytest.raises(KubeAPIError) as error:
+        KubeAPI(fake_api.url).get("/api/v1/inconnu")
+    assert error.value.status == 404
+    assert error.value.body["message"] == "not found"
+
+def test_ssl_context_verifies_by_default():
+    context = ssl_context()
+    assert context.verify_mode == ssl.CERT_REQUIRED and context.check_hostname
+    insecure = ssl_context(verify=False)
+    assert insecure.verify_mode == ssl.CERT_NONE and not insecure.check_hostname
+    assert KubeAPI("https://cluster:6443", verify=False).context.verify_mode == ssl.CERT_NONE
+    assert KubeAPI("http://127.0.0.1:8001").context is None
+
+def load_cli():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "minikube-audit.py")
+    spec = importlib.util.spec_from_file_location("minikube_audit", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_streamed_aggregation(fake_api, capsys):
+    images = ["nginx:1.25", "redis:7", "nginx:1.25", "postgres"]
+    for i in range(40):
+        fake_api.add("pods", pod(i, images[i % len(images)]))
+    cli = load_cli()
+    cli._api = KubeAPI(fake_api.url, page_size=7)
+    summary = cli.audit_pods()
+    assert summary["images"] == {"nginx:1.25": 20, "redis:7": 10, "postgres": 10}
+    assert summary["namespaces"] == {"ns0", "ns1", "ns2"}
+    assert len(list_requests(fake_api)) == 6
+    output = capsys.readouterr().out
+    assert "40 pods" in output
+    assert output.count("image postgres non versionnée") == 10
@@ -0,0 +1,24 @@
+import json
+
+from kube_api import KubeAPI
+from snapshot import collect, save, load, items
+
+def secret(name):
+    return {"kind": "Secret", "metadata": {"namespace": "default", "name": name}, "type": "Opaque",
+            "data": {"password": "c2VjcmV0"}, "stringData": {"token": "secret"}}
+
+def test_collect_and_save_drop_secret_values(fake_api, tmp_path):
+    fake_api.add("secrets", secret("db"))
+    snapshot = collect(["secrets"], api=KubeAPI(fake_api.url))
+    [stored] = items(snapshot, "secrets")
+    assert "data" not in stored and "stringData" not in stored
+    assert stored["type"] == "Opaque" and stored["metadata"]["name"] == "db"
+    path = str(tmp_path / "snapshot.json")
+    save(snapshot, path)
+    assert "c2VjcmV0" not in open(path).read()
+
+def test_load_kubectl_list_drops_secret_values(tmp_path):
+    path = tmp_path / "list.json"
+    path.write_text(json.dumps({"items": [secret("db")]}))
+    [stored] = items(load(str(path)), "secrets")
+    assert "data" not in stored and "stringData" not in stored
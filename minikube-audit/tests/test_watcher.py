@@ -0,0 +1,158 @@
+import time
+import threading
+
+from kube_api import KubeAPI
+from watcher import FindingsIndex, watch_cluster
+
+def pod(name, privileged=False, namespace="default"):
+    return {"metadata": {"namespace": namespace, "name": name},
+            "spec": {"containers": [{"name": "c", "image": "nginx:1.25",
+                                     "securityContext": {"privileged": privileged}}]}}
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+class Watch:
+    """watch_cluster dans un thread, avec les changements et erreurs enregistrés."""
+
+    def __init__(self, fake_api, kinds=("pods",), timeout_seconds=1):
+        self.changes = []
+        self.errors = []
+        self.stop = threading.Event()
+        self.result = {}
+        api = KubeAPI(fake_api.url)
+
+        def run():
+            self.result["index"] = watch_cluster(
+                api, list(kinds), on_change=lambda *change: self.changes.append(change),
+                on_error=lambda *error: self.errors.append(error), stop=self.stop, timeout_seconds=timeout_seconds)
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def findings(self, name):
+        return [(event, [f["rule"] for f in added], [f["rule"] for f in removed])
+                for event, kind, key, added, removed in self.changes if key[2] == name]
+
+    def close(self):
+        self.stop.set()
+        self.thread.join(5)
+        return self.result["index"]
+
+def test_initial_list_then_only_changed_objects(fake_api):
+    fake_api.add("pods", pod("ok"))
+    fake_api.add("pods", pod("bad", privileged=True))
+    watch = Watch(fake_api)
+    assert wait_for(lambda: watch.findings("bad"))
+    assert watch.findings("bad") == [("RESYNC", ["privileged"], [])]
+
+    fake_api.modify("pods", pod("ok", privileged=True))
+    assert wait_for(lambda: watch.findings("ok"))
+    fake_api.delete("pods", pod("bad"))
+    assert wait_for(lambda: len(watch.findings("bad")) == 2)
+    index = watch.close()
+
+    assert watch.findings("ok") == [("MODIFIED", ["privileged"], [])]
+    assert watch.findings("bad")[1] == ("DELETED", [], ["privileged"])
+    assert set(index.findings) == {("pods", "default", "ok")}
+    assert len([r for r in fake_api.requests if r[0] == "list"]) == 1
+    assert not watch.errors
+
+def test_watch_resumes_from_last_resource_version(fake_api):
+    fake_api.add("pods", pod("a"))
+    watch = Watch(fake_api, timeout_seconds=1)
+    assert wait_for(lambda: fake_api.watch_requests("pods"))
+    fake_api.modify("pods", pod("a", privileged=True))
+    last_version = fake_api.version
+    # Le serveur ferme le flux après timeoutSeconds ; le watch repart de la dernière version vue
+    assert wait_for(lambda: len(fake_api.watch_requests("pods")) >= 2)
+    watch.close()
+    assert fake_api.watch_requests("pods")[1]["resourceVersion"] == str(last_version)
+    assert len([r for r in fake_api.requests if r[0] == "list"]) == 1
+
+def test_bookmark_advances_version_without_change(fake_api):
+    fake_api.add("pods", pod("a"))
+    watch = Watch(fake_api, timeout_seconds=1)
+    assert wait_for(lambda: fake_api.watch_requests("pods"))
+    fake_api.bookmark("pods")
+    bookmark_version = fake_api.version
+    assert wait_for(lambda: len(fake_api.watch_requests("pods")) >= 2)
+    watch.close()
+    assert fake_api.watch_requests("pods")[1]["resourceVersion"] == str(bookmark_version)
+    assert all(event != "BOOKMARK" for event, *_ in watch.changes)
+
+def test_gone_relists_and_reconciles_index(fake_api):
+    fake_api.add("pods", pod("stays", privileged=True))
+    fake_api.add("pods", pod("vanishes", privileged=True))
+    watch = Watch(fake_api, timeout_seconds=1)
+    assert wait_for(lambda: fake_api.watch_requests("pods"))
+    # Suppression manquée pendant une coupure, puis historique compacté : 410 au prochain watch
+    fake_api.delete("pods", pod("vanishes"), record=False)
+    fake_api.add("pods", pod("new", privileged=True), event=None)
+    fake_api.compact()
+    assert wait_for(lambda: len([r for r in fake_api.requests if r[0] == "list"]) == 2)
+    assert wait_for(lambda: len(watch.findings("vanishes")) == 2)
+    index = watch.close()
+
+    assert watch.findings("vanishes")[1] == ("RESYNC", [], ["privileged"])
+    assert watch.findings("new") == [("RESYNC", ["privileged"], [])]
+    assert watch.findings("stays") == [("RESYNC", ["privileged"], [])]
+    assert set(index.findings) == {("pods", "default", "stays"), ("pods", "default", "new")}
+    assert not watch.errors
+
+def test_findings_index_resync_scoped_to_kind():
+    index = FindingsIndex()
+    index.update("pods", pod("p", privileged=True))
+    index.update("secrets", {"metadata": {"namespace": "default", "name": "s"}, "type": "Opaque"})
+    changes = index.resync("pods", [])
+    assert [(key, removed) for key, added, removed in changes] == [(("pods", "default", "p"), [{"rule": "privileged", "message": "conteneur c privilégié"}])]
+    assert set(index.findings) == {("secrets", "default", "s")}
+    # Réévaluer un objet inchangé ne produit aucun changement
+    key, added, removed = index.update("secrets", {"metadata": {"namespace": "default", "name": "s"}, "type": "Opaque"})
+    assert added == [] and removed == []
+
+def policy(name, namespace):
+    return {"metadata": {"namespace": namespace, "name": name}, "spec": {"podSelector": {}}}
+
+def namespace_changes(changes):
+    return [(key[2], [f["rule"] for f in added], [f["rule"] for f in removed])
+            for key, added, removed in changes if key[0] == "namespaces" and (added or removed)]
+
+def test_network_policy_coverage_follows_events():
+    index = FindingsIndex()
+    # Tant que les NetworkPolicies ne sont pas listées, aucun namespace n'est jugé
+    assert namespace_changes(index.apply("RESYNC", "pods", [pod("a", namespace="web"), pod("b", namespace="db")])) == []
+    changes = index.apply("RESYNC", "networkpolicies", [policy("deny", "db")])
+    assert namespace_changes(changes) == [("web", ["no-network-policy"], [])]
+
+    assert namespace_changes(index.apply("ADDED", "networkpolicies", policy("deny", "web"))) == [
+        ("web", [], ["no-network-policy"])]
+    assert namespace_changes(index.apply("DELETED", "networkpolicies", policy("deny", "db"))) == [
+        ("db", ["no-network-policy"], [])]
+    # Un MODIFIED ne compte pas le pod deux fois
+    index.apply("MODIFIED", "pods", pod("b", privileged=True, namespace="db"))
+    assert namespace_changes(index.apply("DELETED", "pods", pod("b", namespace="db"))) == [
+        ("db", [], ["no-network-policy"])]
+    assert namespace_changes(index.apply("ADDED", "pods", pod("c", namespace="new"))) == [
+        ("new", ["no-network-policy"], [])]
+    # Une nouvelle liste sans le pod (suppression manquée) résout aussi le constat
+    assert namespace_changes(index.apply("RESYNC", "pods", [pod("a", namespace="web")])) == [
+        ("new", [], ["no-network-policy"])]
+    assert ("namespaces", "", "web") not in index.findings
+
+def test_watch_reports_namespace_without_policy(fake_api):
+    fake_api.add("pods", pod("app", namespace="web"))
+    fake_api.add("networkpolicies", policy("deny", "db"))
+    watch = Watch(fake_api, kinds=("pods", "networkpolicies"))
+    web = lambda: [(e, a, r) for e, k, key, a, r in watch.changes if key == ("namespaces", "", "web")]
+    assert wait_for(lambda: web())
+    fake_api.add("networkpolicies", policy("deny", "web"))
+    assert wait_for(lambda: len(web()) == 2)
+    index = watch.close()
+    assert [(e, [f["rule"] for f in a], [f["rule"] for f in r]) for e, a, r in web()] == [
+        ("RESYNC", ["no-network-policy"], []), ("ADDED", [], ["no-network-policy"])]
+    assert ("namespaces", "", "web") not in index.findings
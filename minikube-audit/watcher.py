@@ -0,0 +1,159 @@
+import queue
+import threading
+from collections import Counter
+
+from snapshot import object_key
+from checks import evaluate_object, evaluate_namespace_coverage
+from kube_api import KubeAPIError
+
+# Audit continu : une liste initiale par type, puis un watch (resourceVersion)
+# qui ne transmet que les objets modifiés. Seuls ces objets sont réévalués et
+# l'index des constats est mis à jour en place, sans relister le cluster.
+
+WATCHED_KINDS = ["pods", "secrets", "roles", "networkpolicies"]
+
+# Durée d'un watch côté serveur avant relance depuis le dernier resourceVersion
+WATCH_TIMEOUT = 300
+# Attente avant de réessayer après une erreur réseau ou d'API
+RETRY_DELAY = 5
+
+# Types comptés par namespace pour le constat inter-objets « des pods mais
+# aucune NetworkPolicy », porté par la clé du namespace
+COUNTED_KINDS = ("pods", "networkpolicies")
+
+class FindingsIndex:
+    """Index {(type, namespace, nom): constats} tenu à jour objet par objet.
+
+    Chaque mise à jour retourne (clé, constats apparus, constats disparus).
+    Les pods et NetworkPolicies sont aussi comptés par namespace : le constat
+    du namespace est recalculé pour ceux dont les comptes ont changé, une fois
+    les deux types listés.
+    """
+
+    def __init__(self):
+        self.findings = {}
+        self.counted = {}   # clé d'un pod ou d'une NetworkPolicy -> namespace
+        self.counts = {kind: Counter() for kind in COUNTED_KINDS}
+        self.listed = set()
+        self._dirty = set()
+
+    def _count(self, key, present):
+        kind, namespace, _ = key
+        if kind not in self.counts:
+            return
+        old = self.counted.pop(key, None)
+        if old is not None:
+            self.counts[kind][old] -= 1
+            self._dirty.add(old)
+        if present:
+            self.counted[key] = namespace
+            self.counts[kind][namespace] += 1
+            self._dirty.add(namespace)
+
+    def _replace(self, key, findings):
+        old = self.findings.pop(key, [])
+        if findings:
+            self.findings[key] = findings
+        return key, [f for f in findings if f not in old], [f for f in old if f not in findings]
+
+    def update(self, kind, obj):
+        key = object_key(kind, obj)
+        self._count(key, True)
+        return self._replace(key, evaluate_object(kind, obj))
+
+    def remove(self, kind, obj):
+        key = object_key(kind, obj)
+        self._count(key, False)
+        return self._replace(key, [])
+
+    def resync(self, kind, objects):
+        """Remplace tous les objets d'un type (liste initiale, ou nouvelle liste après un 410)."""
+        seen = set()
+        changes = []
+        for obj in objects:
+            seen.add(object_key(kind, obj))
+            changes.append(self.update(kind, obj))
+        stale = {key for key in list(self.findings) + list(self.counted) if key[0] == kind and key not in seen}
+        for key in sorted(stale):
+            self._count(key, False)
+            changes.append(self._replace(key, []))
+        return changes
+
+    def namespace_changes(self):
+        """Constats des namespaces dont les comptes ont changé depuis le dernier appel."""
+        if not self.listed.issuperset(COUNTED_KINDS):
+            # Sans la liste des deux types, un namespace paraîtrait sans NetworkPolicy à tort
+            return []
+        changes = []
+        for namespace in sorted(self._dirty):
+            findings = evaluate_namespace_coverage(self.counts["pods"][namespace],
+                                                   self.counts["networkpolicies"][namespace])
+            changes.append(self._replace(("namespaces", "", namespace), findings))
+        self._dirty.clear()
+        return changes
+
+    def apply(self, event_type, kind, payload):
+        """Applique un événement (RESYNC, ADDED, MODIFIED, DELETED) ; retourne tous les changements."""
+        if event_type == "RESYNC":
+            changes = self.resync(kind, payload)
+            self.listed.add(kind)
+        elif event_type == "DELETED":
+            changes = [self.remove(kind, payload)]
+        else:
+            changes = [self.update(kind, payload)]
+        return changes + self.namespace_changes()
+
+def _follow(api, kind, events, stop, timeout_seconds):
+    """Liste puis suit un type ; tout passe par la file events, lue par un seul thread."""
+    version = None
+    while not stop.is_set():
+        try:
+            if version is None:
+                objects, version = api.list_with_version(kind)
+                events.put(("RESYNC", kind, objects))
+            for event_type, obj in api.watch(kind, version, timeout_seconds):
+                version = (obj.get("metadata") or {}).get("resourceVersion", version)
+                if event_type != "BOOKMARK":
+                    events.put((event_type, kind, obj))
+                if stop.is_set():
+                    return
+        except KubeAPIError as e:
+            if e.status == 410:
+                # resourceVersion expiré : on reliste, l'index est réconcilié par RESYNC
+                version = None
+                continue
+            events.put(("ERROR", kind, str(e)))
+            stop.wait(RETRY_DELAY)
+        except (OSError, ValueError) as e:
+            events.put(("ERROR", kind, str(e)))
+            stop.wait(RETRY_DELAY)
+
+def watch_cluster(api, kinds=WATCHED_KINDS, on_change=None, on_error=None, stop=None, timeout_seconds=WATCH_TIMEOUT):
+    """Suit les types demandés jusqu'à ce que stop soit positionné ; retourne l'index final.
+
+    on_change(type d'événement, type, clé, apparus, disparus) est appelé pour
+    chaque objet dont les constats changent, on_error(type, message) pour
+    chaque erreur (le watch est relancé après RETRY_DELAY).
+    """
+    stop = stop or threading.Event()
+    events = queue.Queue()
+    index = FindingsIndex()
+    for kind in kinds:
+        threading.Thread(target=_follow, args=(api, kind, events, stop, timeout_seconds), daemon=True).start()
+
+    while not stop.is_set():
+        try:
+            event_type, kind, payload = events.get(timeout=1)
+        except queue.Empty:
+            continue
+        if event_type == "ERROR":
+            if on_error:
+                on_error(kind, payload)
+            continue
+        changes = index.apply(event_type, kind, payload)
+        if on_change:
+            for key, added, removed in changes:
+                if added or removed:
+                    # key[0] : le constat d'un namespace change sur un événement de pod ou de NetworkPolicy
+                    on_change(event_type, key[0], key, added, removed)
+    return index
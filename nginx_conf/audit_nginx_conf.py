@@ -1,192 +1,333 @@
-import re
-
-def check_autoindex(config):
-    if re.search(r"\bautoindex\s+on\b", config):
-        return "Warning: Directory listing (autoindex) is enabled, which can expose files."
-    return None
-
-def check_server_tokens(config):
-    if not re.search(r"\bserver_tokens\s+off\b", config):
-        return "Warning: 'server_tokens off;' is missing. It is recommended to hide the NGINX version."
-    return None
-
-def check_ssl_protocols(config):
-    weak_protocols = ["SSLv2", "SSLv3", "TLSv1", "TLSv1.1"]
-    match = re.search(r"\bssl_protocols\s+([^;]+);", config)
-    if match:
-        protocols = match.group(1).strip().split()
-        for protocol in protocols:
-            if protocol in weak_protocols:
-                return f"Warning: Weak SSL protocol found: {protocol}. It is recommended to use TLS 1.2 or higher."
-    else:
-        return "Warning: 'ssl_protocols' not configured. Specify SSL protocols to avoid default settings."
-    return None
+import argparse
+
+from nginx_parser import Visitor, HeaderTree, NginxParseError, run_visitors
+from nginx_get_conf import resolve_includes
+
+#every check is a visitor fed by a single streaming pass over the configuration
+
+class AutoindexCheck(Visitor):
+    names = {"autoindex"}
+
+    def __init__(self):
+        self.enabled = False
+
+    def directive(self, directive, block):
+        if directive.name == "autoindex" and directive.args[:1] == ["on"]:
+            self.enabled = True
+
+    def finish(self):
+        if self.enabled:
+            return "Warning: Directory listing (autoindex) is enabled, which can expose files."
+        return None
+
+class ServerTokensCheck(Visitor):
+    names = {"server_tokens"}
+
+    def __init__(self):
+        self.disabled = False
+
+    def directive(self, directive, block):
+        if directive.name == "server_tokens" and directive.args[:1] == ["off"]:
+            self.disabled = True
+
+    def finish(self):
+        if not self.disabled:
+            return "Warning: 'server_tokens off;' is missing. It is recommended to hide the NGINX version."
+        return None
+
+class SslProtocolsCheck(Visitor):
+    names = {"ssl_protocols"}
+
+    weak_protocols = {"SSLv2", "SSLv3", "TLSv1", "TLSv1.1"}
+
+    def __init__(self):
+        self.configured = False
+        self.weak = None
+
+    def directive(self, directive, block):
+        if directive.name != "ssl_protocols":
+            return
+        self.configured = True
+        if self.weak is None:
+            self.weak = next((p for p in directive.args if p in self.weak_protocols), None)
+
+    def finish(self):
+        if not self.configured:
+            return "Warning: 'ssl_protocols' not configured. Specify SSL protocols to avoid default settings."
+        if self.weak:
+            return f"Warning: Weak SSL protocol found: {self.weak}. It is recommended to use TLS 1.2 or higher."
+        return None
+
+class SslCiphersCheck(Visitor):
+    names = {"ssl_ciphers"}
 
-def check_ssl_ciphers(config):
     weak_ciphers = ["RC4", "DES", "MD5"]
-    match = re.search(r"\bssl_ciphers\s+([^;]+);", config)
-    if match:
-        ciphers = match.group(1).strip().split(":")
-        for cipher in ciphers:
-            for weak_cipher in weak_ciphers:
-                if weak_cipher in cipher:
-                    return f"Warning: Weak SSL cipher found: {cipher}. Consider using stronger cipher suites."
-    else:
-        return "Warning: 'ssl_ciphers' not configured. Specify SSL ciphers to avoid weak default settings."
-    return None
-
-def check_client_max_body_size(config):
-    match = re.search(r"\bclient_max_body_size\s+([^;]+);", config)
-    if match:
-        size = match.group(1).strip()
-        return f"Notice: 'client_max_body_size' set to {size}. Verify that this is appropriate for your server."
-    return None
-
-def check_http_redirect(config):
-    if not re.search(r"return\s+301\s+https://\$host\$request_uri;", config):
-        return "Warning: HTTP to HTTPS redirection is missing. Redirect HTTP traffic to HTTPS for better security."
-    return None
-
-def check_x_frame_options(config):
-    if not re.search(r"add_header\s+X-Frame-Options", config):
-        return "Warning: 'X-Frame-Options' header is missing. Add it to prevent clickjacking attacks."
-    return None
-
-def check_x_content_type_options(config):
-    if not re.search(r"add_header\s+X-Content-Type-Options", config):
-        return "Warning: 'X-Content-Type-Options' header is missing. Add it to prevent MIME-sniffing attacks."
-    return None
-
-def check_content_security_policy(config):
-    if not re.search(r"add_header\s+Content-Security-Policy", config):
-        return "Warning: 'Content-Security-Policy' header is missing. Add it to mitigate XSS attacks."
-    return None
 
-def analyze_nginx_conf(file_path):
-    with open(file_path, 'r') as file:
-        config = file.read()
-
-def check_valid_referers_is_not_none(config):
-    if not re.search(r"valid_referers none blocked server_names", config):
-        return "Warning: 'valid_referers' is not set to 'none blocked server_names'."
-
-def check_alias_traversal(config):
-    alias_patterns = re.findall(r"location\s+(.*?)\s*\{\s*alias\s+(.*?);", config, re.DOTALL)
-    for location, alias_path in alias_patterns:
-        # Check if the location path does not end with '/' and the alias path does not end with '/'
-        if not location.endswith('/') and not alias_path.endswith('/'):
+    def __init__(self):
+        self.configured = False
+        self.weak = None
+
+    def directive(self, directive, block):
+        if directive.name != "ssl_ciphers":
+            return
+        self.configured = True
+        if self.weak is None:
+            for cipher in " ".join(directive.args).split(":"):
+                if any(weak_cipher in cipher for weak_cipher in self.weak_ciphers):
+                    self.weak = cipher
+                    break
+
+    def finish(self):
+        if not self.configured:
+            return "Warning: 'ssl_ciphers' not configured. Specify SSL ciphers to avoid weak default settings."
+        if self.weak:
+            return f"Warning: Weak SSL cipher found: {self.weak}. Consider using stronger cipher suites."
+        return None
+
+class ClientMaxBodySizeCheck(Visitor):
+    names = {"client_max_body_size"}
+
+    def __init__(self):
+        self.size = None
+
+    def directive(self, directive, block):
+        if directive.name == "client_max_body_size" and self.size is None:
+            self.size = " ".join(directive.args)
+
+    def finish(self):
+        if self.size is not None:
+            return f"Notice: 'client_max_body_size' set to {self.size}. Verify that this is appropriate for your server."
+        return None
+
+class HttpRedirectCheck(Visitor):
+    names = {"return"}
+
+    def __init__(self):
+        self.found = False
+
+    def directive(self, directive, block):
+        if directive.name == "return" and directive.args == ["301", "https://$host$request_uri"]:
+            self.found = True
+
+    def finish(self):
+        if not self.found:
+            return "Warning: HTTP to HTTPS redirection is missing. Redirect HTTP traffic to HTTPS for better security."
+        return None
+
+class HeaderPresenceCheck(Visitor):
+    names = {"add_header"}
+
+    def __init__(self, header, message):
+        self.header = header.lower()
+        self.message = message
+        self.found = False
+
+    def directive(self, directive, block):
+        if directive.name == "add_header" and directive.args and directive.args[0].lower() == self.header:
+            self.found = True
+
+    def finish(self):
+        if not self.found:
+            return self.message
+        return None
+
+class ValidReferersCheck(Visitor):
+    names = {"valid_referers"}
+
+    def __init__(self):
+        self.found = False
+
+    def directive(self, directive, block):
+        if directive.name == "valid_referers" and directive.args[:3] == ["none", "blocked", "server_names"]:
+            self.found = True
+
+    def finish(self):
+        if not self.found:
+            return "Warning: 'valid_referers' is not set to 'none blocked server_names'."
+        return None
+
+def _is_regex_location(block):
+    return block.name == "location" and block.args[:1] in (["~"], ["~*"])
+
+def _enclosing_location(block):
+    while block is not None and block.name != "location":
+        block = block.parent
+    return block
+
+class AliasTraversalCheck(Visitor):
+    names = {"alias"}
+
+    def __init__(self):
+        self.found = False
+
+    def directive(self, directive, block):
+        if directive.name != "alias" or block.name != "location" or not directive.args:
+            return
+        if _is_regex_location(block) or not block.args:
+            return
+        location = block.args[-1]
+        # A prefixed location without a trailing '/' aliased to a directory allows '/prefix../'
+        if not location.endswith('/') and directive.args[0].endswith('/'):
+            self.found = True
+
+    def finish(self):
+        if self.found:
             return (
                 "Warning: Path traversal vulnerability detected in alias configuration.\n"
                 "Using alias in a prefixed location that doesn't end with a directory separator could lead "
                 "to a path traversal vulnerability.\n"
                 "Help URL: https://github.com/yandex/gixy/blob/master/docs/en/plugins/aliastraversal.md"
             )
-    return None
+        return None
+
+class HostSpoofingCheck(Visitor):
+    names = {"proxy_set_header"}
 
-def check_host_spoofing(config):
-    if re.search(r"host", config):
-        if re.search(r"proxy_set_header\s+Host", config):
+    def __init__(self):
+        self.found = False
+
+    def directive(self, directive, block):
+        if directive.name != "proxy_set_header" or len(directive.args) < 2:
+            return
+        if directive.args[0].lower() == "host" and ("$http_" in directive.args[1] or "$arg_" in directive.args[1]):
+            self.found = True
+
+    def finish(self):
+        if self.found:
             return "Warning: Host header spoofing detected. Ensure that the Host header is not set from user input."
-    return None
+        return None
 
-def check_http_splitting(config):
+class HttpSplittingCheck(Visitor):
+    names = {"set", "rewrite", "return", "add_header", "proxy_set_header", "proxy_pass"}
+    # Variables which may contain a decoded '\n' or '\r'
+    unsafe_variables = ("$uri", "$document_uri")
 
-    # Patterns to match directives that may be vulnerable to HTTP splitting
-    vulnerable_directives = [
-        r"rewrite\s+.+\s+http://\$host\$uri",
-        r"return\s+301\s+http://\$host\$uri",
-        r"proxy_set_header\s+\"X-Original-Uri\"\s+\$uri",
-        r"proxy_pass\s+http://[^;]+",
-        r"location\s+~\s+/proxy/.*\{\s+set\s+\$path\s+\$\w+;\s+proxy_pass\s+http://[^;]+"
-    ]
-    
-    # Check each pattern for potential vulnerabilities
-    for pattern in vulnerable_directives:
-        if re.search(pattern, config, re.DOTALL):
+    def __init__(self):
+        self.found = False
+        self.tainted = set()
+
+    def directive(self, directive, block):
+        location = _enclosing_location(block)
+        if directive.name == "set" and len(directive.args) == 2 and location is not None \
+                and _is_regex_location(location) and directive.args[1].startswith("$"):
+            self.tainted.add(directive.args[0])
+            return
+        for arg in directive.args:
+            if any(variable in arg for variable in self.unsafe_variables) \
+                    or any(variable in arg for variable in self.tainted):
+                self.found = True
+
+    def finish(self):
+        if self.found:
             return (
                 "Warning: Possible HTTP Splitting vulnerability detected.\n"
                 "Using variables that may contain '\\n' or '\\r' in directives like 'rewrite', 'return', "
-                "'add_header', 'proxy_set_header', or 'proxy_pass' can lead to HTTP injection.\n" 
+                "'add_header', 'proxy_set_header', or 'proxy_pass' can lead to HTTP injection.\n"
             )
-    return None
+        return None
 
-def check_ssrf(config):
-    # Patterns to detect risky `proxy_pass` configurations with variables in the URL scheme, host, or path
-    ssrf_patterns = [
-        r"location\s+~\s+/proxy/\(.*?\)\s*\{[^}]*?proxy_pass\s+\$[a-zA-Z]+://\$[a-zA-Z]+/\$[a-zA-Z]+;",
-        r"location\s+/proxy/\s*\{\s*proxy_pass\s+\$arg_[a-zA-Z]+;"
-    ]
-    
-    # Check each pattern to see if any risky configurations are present
-    for pattern in ssrf_patterns:
-        if re.search(pattern, config, re.DOTALL):
+class SsrfCheck(Visitor):
+    names = {"proxy_pass"}
+
+    def __init__(self):
+        self.found = False
+
+    def directive(self, directive, block):
+        # proxy_pass whose scheme/host comes from a variable, or from a query argument
+        if directive.name == "proxy_pass" and directive.args:
+            target = directive.args[0]
+            if target.startswith("$") or "$arg_" in target:
+                self.found = True
+
+    def finish(self):
+        if self.found:
             return (
                 "Warning: Possible SSRF (Server-Side Request Forgery) vulnerability detected.\n"
                 "The configuration may allow an attacker to create arbitrary requests from the vulnerable server.\n"
             )
-    return None
-
-def check_add_header_redefinition(config):
-    server_blocks = re.findall(r"server\s*{([^}]+)}", config, re.DOTALL)
-    
-    for server_block in server_blocks:
-        # Find headers in the server block
-        server_headers = set(re.findall(r"add_header\s+([^\s]+)\s+[^;]+;", server_block, re.IGNORECASE))
-        
-        # Look for nested location or if blocks within the server block
-        nested_blocks = re.findall(r"(location\s+/.*?{|if\s+[^}]*{)([^}]+)}", server_block, re.DOTALL)
-        
-        for _, nested_block_content in nested_blocks:
-            nested_headers = set(re.findall(r"add_header\s+([^\s]+)\s+[^;]+;", nested_block_content, re.IGNORECASE))
-            
-            # Check if nested headers redefine headers from the server block
-            overridden_headers = server_headers & nested_headers
-            if overridden_headers:
-                return (
-                    f"Warning: Nested 'add_header' directive detected, which may replace parent headers: "
-                    f"{', '.join(overridden_headers)}.\n"
-                    "Using 'add_header' in a nested context replaces all headers from the parent level.\n"
-                )
-    return None
-
-def check_add_header_multiline(config):
-    # Match any multi-line 'add_header' or 'more_set_headers' directive that uses line breaks or tabs
-    multiline_header_pattern = re.compile(
-        r"(add_header|more_set_headers)\s+[^;]*?\n\s+",
-        re.MULTILINE
-    )
-    
-    if multiline_header_pattern.search(config):
-        return (
-            "Warning: Multi-line 'add_header' directive detected. Multi-line headers are deprecated (RFC 7230), "
-            "and some clients (e.g., Internet Explorer and Edge) may not support them.\n"
-        )
-    return None
-    
-def main():
-    # Run each check function and collect any warnings or notices
-    config = analyze_nginx_conf("path/to/your/nginx.conf")
-    
-    report = []
-    checks = [
-        check_autoindex,
-        check_server_tokens,
-        check_ssl_protocols,
-        check_ssl_ciphers,
-        check_client_max_body_size,
-        check_http_redirect,
-        check_x_frame_options,
-        check_x_content_type_options,
-        check_content_security_policy,
-        check_valid_referers_is_not_none,
-        check_alias_traversal,
-        check_host_spoofing,        
+        return None
+
+class AddHeaderRedefinitionCheck(HeaderTree):
+    def finish(self):
+        self.resolve()
+        dropped = set()
+        for name in ("server", "location", "if"):
+            for node in self.index[name]:
+                if node.headers and node.parent is not None:
+                    dropped |= node.parent.inherited - node.headers
+        if dropped:
+            return (
+                f"Warning: Nested 'add_header' directive detected, which may replace parent headers: "
+                f"{', '.join(sorted(dropped))}.\n"
+                "Using 'add_header' in a nested context replaces all headers from the parent level.\n"
+            )
+        return None
+
+class AddHeaderMultilineCheck(Visitor):
+    names = {"add_header", "more_set_headers"}
+
+    def __init__(self):
+        self.found = False
+
+    def directive(self, directive, block):
+        if directive.name in ("add_header", "more_set_headers") and directive.end_line > directive.line:
+            self.found = True
+
+    def finish(self):
+        if self.found:
+            return (
+                "Warning: Multi-line 'add_header' directive detected. Multi-line headers are deprecated (RFC 7230), "
+                "and some clients (e.g., Internet Explorer and Edge) may not support them.\n"
+            )
+        return None
+
+def build_checks():
+    #fresh visitors for each analysis, they keep state during the pass
+    return [
+        AutoindexCheck(),
+        ServerTokensCheck(),
+        SslProtocolsCheck(),
+        SslCiphersCheck(),
+        ClientMaxBodySizeCheck(),
+        HttpRedirectCheck(),
+        HeaderPresenceCheck("X-Frame-Options", "Warning: 'X-Frame-Options' header is missing. Add it to prevent clickjacking attacks."),
+        HeaderPresenceCheck("X-Content-Type-Options", "Warning: 'X-Content-Type-Options' header is missing. Add it to prevent MIME-sniffing attacks."),
+        HeaderPresenceCheck("Content-Security-Policy", "Warning: 'Content-Security-Policy' header is missing. Add it to mitigate XSS attacks."),
+        ValidReferersCheck(),
+        AliasTraversalCheck(),
+        HostSpoofingCheck(),
+        HttpSplittingCheck(),
+        SsrfCheck(),
+        AddHeaderRedefinitionCheck(),
+        AddHeaderMultilineCheck(),
     ]
-    
-    for check in checks:
-        result = check(config)
-        if result:
-            report.append(result)
+
+def analyze_nginx_conf(file_path):
+    #stream nginx.conf and its includes once through every check and return the report
+    config = resolve_includes(file_path)
+    try:
+        report = run_visitors(config, build_checks())
+    except NginxParseError as e:
+        if e.line is None:
+            raise
+        path, line = config.locate(e.line)
+        raise NginxParseError(f"{path}:{line}: {e.reason}") from None
+    for error in config.errors:
+        report.append(f"Notice: included file could not be read: {error}")
+    for path, line, target in config.cycles:
+        report.append(f"Warning: include cycle ignored at {path}:{line} (includes {target} again).")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze an NGINX configuration file")
+    parser.add_argument("conf", nargs="?", default="/etc/nginx/nginx.conf", help="path to nginx.conf")
+    args = parser.parse_args()
+
+    try:
+        report = analyze_nginx_conf(args.conf)
+    except (OSError, NginxParseError) as e:
+        print(f"Error: {e}")
+        return
 
     # Report the findings
     if report:
@@ -196,4 +337,5 @@ def main():
     else:
         print("No issues found. The configuration appears secure.")
 
-# Usage: analyze_nginx_conf("path/to/your/nginx.conf")
+if __name__ == "__main__":
+    main()
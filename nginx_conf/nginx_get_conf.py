@@ -2,43 +2,208 @@
 import os
 import re
 import sys
+import glob
+import bisect
+import threading
 import subprocess
-import argparse
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from nginx_parser import iter_tokens, NginxParseError
 
 def get_nginx_conf():
     #get the path of the nginx.conf file
-    p = subprocess.Popen(['nginx', '-V'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        p = subprocess.Popen(['nginx', '-V'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except FileNotFoundError:
+        print('Error: nginx not found')
+        sys.exit(1)
     out, err = p.communicate()
     if p.returncode != 0:
         print('Error: nginx not found')
         sys.exit(1)
-    m = re.search(r'--conf-path=(\S+)', out)
+    #nginx -V prints the configure arguments on stderr
+    m = re.search(r'--conf-path=(\S+)', out + err)
     if m:
         conf_path = m.group(1)
     else:
         conf_path = '/etc/nginx/nginx.conf'
     return conf_path
 
+#realpath -> ((mtime, inode, size), line offsets, includes), reused while the file is
+#unchanged; only the structure is kept, the lines are read again from disk when
+#the merged view is iterated, and the oldest entries are dropped past the limit
+_FILE_CACHE = OrderedDict()
+_FILE_CACHE_SIZE = 256
+_CACHE_LOCK = threading.Lock()
+
+def _scan_conf(path, offsets):
+    #lines of the file in binary mode, recording the offset of each line
+    with open(path, 'rb') as f:
+        offset = 0
+        for raw in f:
+            offsets.append(offset)
+            offset += len(raw)
+            yield raw.decode('utf-8', 'replace')
+
+def read_conf(path):
+    #scan a configuration file once and remember its include directives,
+    #as (line index, column after the ';', pattern), wherever they are on the line
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_ino, st.st_size)
+    with _CACHE_LOCK:
+        cached = _FILE_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            _FILE_CACHE.move_to_end(path)
+            return cached
+    offsets = array('q')
+    includes = []
+    words = []
+    lines = _scan_conf(path, offsets)
+    try:
+        for kind, value, line, end in iter_tokens(lines):
+            if kind != 'punct':
+                words.append(value)
+                continue
+            if value == ';' and len(words) == 2 and words[0] == 'include':
+                includes.append((line - 1, end, words[1]))
+            words = []
+    except NginxParseError:
+        #reported with its real location when the merged view is parsed
+        for _ in lines:
+            pass
+    entry = (key, offsets, includes)
+    with _CACHE_LOCK:
+        _FILE_CACHE[path] = entry
+        _FILE_CACHE.move_to_end(path)
+        while len(_FILE_CACHE) > _FILE_CACHE_SIZE:
+            _FILE_CACHE.popitem(last=False)
+    return entry
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _FILE_CACHE.clear()
+
+def expand_include(pattern, base_dir):
+    #relative includes are resolved from the directory of the main nginx.conf, like nginx does
+    if not os.path.isabs(pattern):
+        pattern = os.path.join(base_dir, pattern)
+    if glob.has_magic(pattern):
+        return [os.path.realpath(p) for p in sorted(glob.glob(pattern))]
+    return [os.path.realpath(pattern)]
+
+class MergedConfig:
+    #merged view of nginx.conf with its includes spliced in place, right after
+    #the ';' of the include directive; iterating streams the lines of every file
+    #from disk, locate() maps a line of the merged view back to (file, line)
+    def __init__(self, conf_path, files, errors):
+        #files: path -> (line offsets, [(line index, column, included paths)])
+        self.conf_path = conf_path
+        self.files = files
+        self.errors = errors
+        self.cycles = []
+        self.segments = []
+        self._starts = []
+        self._size = 0
+        self._splice(conf_path, [])
+
+    def _add_segment(self, path, first, count, begin=0, end=None):
+        #count whole lines from first, or a single line cut to [begin:end]
+        if count <= 0:
+            return
+        self._starts.append(self._size + 1)
+        self.segments.append((self._size + 1, path, first + 1, count, begin, end))
+        self._size += count
+
+    def _splice(self, path, stack):
+        if path not in self.files:
+            return
+        offsets, includes = self.files[path]
+        stack.append(path)
+        line, col = 0, 0
+        for index, end, targets in includes:
+            if index > line and col:
+                #rest of the line of the previous include
+                self._add_segment(path, line, 1, col)
+                line, col = line + 1, 0
+            self._add_segment(path, line, index - line)
+            #the include directive itself is kept in the view, the parser sees a harmless directive
+            self._add_segment(path, index, 1, col, end)
+            line, col = index, end
+            for target in targets:
+                if target in stack:
+                    self.cycles.append((path, index + 1, target))
+                    continue
+                self._splice(target, stack)
+        if col:
+            self._add_segment(path, line, 1, col)
+            line += 1
+        self._add_segment(path, line, len(offsets) - line)
+        stack.pop()
+
+    def __iter__(self):
+        handles = {}
+        try:
+            for start, path, first, count, begin, end in self.segments:
+                f = handles.get(path)
+                if f is None:
+                    f = handles[path] = open(path, 'rb')
+                f.seek(self.files[path][0][first - 1])
+                if begin or end is not None:
+                    yield f.readline().decode('utf-8', 'replace')[begin:end]
+                    continue
+                for _ in range(count):
+                    yield f.readline().decode('utf-8', 'replace')
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def locate(self, line):
+        #(file, line) of a line number of the merged view
+        i = bisect.bisect_right(self._starts, line) - 1
+        if i < 0:
+            return self.conf_path, line
+        start, path, first, count, begin, end = self.segments[i]
+        return path, first + line - start
+
+def resolve_includes(conf_path, workers=8):
+    #scan nginx.conf and every included file concurrently, each file only once,
+    #glob patterns are expanded here once and kept in the merged view
+    conf_path = os.path.realpath(conf_path)
+    base_dir = os.path.dirname(conf_path)
+    files = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(read_conf, conf_path): conf_path}
+        seen = {conf_path}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    key, offsets, includes = future.result()
+                except OSError as e:
+                    errors.append(f"{path}: {e}")
+                    continue
+                expanded = []
+                for index, end, pattern in includes:
+                    targets = expand_include(pattern, base_dir)
+                    expanded.append((index, end, targets))
+                    for target in targets:
+                        if target not in seen:
+                            seen.add(target)
+                            pending[pool.submit(read_conf, target)] = target
+                files[path] = (offsets, expanded)
+    return MergedConfig(conf_path, files, errors)
+
 def get_included_files(conf_path):
     #get the path of the included files
-    included_files = []
-    with open(conf_path) as f:
-        for line in f:
-            m = re.search(r'include\s+(\S+)', line)
-            if m:
-                included_files.append(m.group(1))
-    return included_files
+    return [pattern for index, end, pattern in read_conf(os.path.realpath(conf_path))[2]]
 
 def get_all_files(conf_path):
-    #get all the configuration files
-    all_files = []
-    all_files.append(conf_path)
-    included_files = get_included_files(conf_path)
-    for file in included_files:
-        if not file.startswith('/'):
-            file = os.path.join(os.path.dirname(conf_path), file)
-        all_files.extend(get_all_files(file))
-    return all_files
+    #get all the configuration files, each one only once
+    return list(resolve_includes(conf_path).files)
 
 def save_files(all_files):
     #save all the configuration files
@@ -0,0 +1,222 @@
+#streaming tokenizer and block parser for nginx configuration files
+import re
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<comment>\#[^\n]*)
+      | (?P<quoted>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<unterminated>["'])
+      | (?P<punct>[{};])
+      | (?P<word>(?:\$\{[^}]*\}|[^\s{};"'\#])(?:\$\{[^}]*\}|[^\s{};])*)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+
+class NginxParseError(ValueError):
+    def __init__(self, reason, line=None):
+        super().__init__(f"{reason} at line {line}" if line is not None else reason)
+        self.reason = reason
+        self.line = line
+
+class Directive:
+    __slots__ = ("name", "args", "line", "end_line")
+
+    def __init__(self, name, args, line, end_line):
+        self.name = name
+        self.args = args
+        self.line = line
+        self.end_line = end_line
+
+class Block:
+    #only the open blocks are kept alive, so memory follows the nesting depth
+    __slots__ = ("name", "args", "line", "parent", "depth")
+
+    def __init__(self, name, args, line, parent):
+        self.name = name
+        self.args = args
+        self.line = line
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+
+class Visitor:
+    #base class for the checks, every hook is optional
+    #names: directive names the visitor wants, None means all of them
+    names = None
+
+    def enter_block(self, block):
+        pass
+
+    def directive(self, directive, block):
+        pass
+
+    def exit_block(self, block):
+        pass
+
+    def finish(self):
+        return None
+
+class Node:
+    #node of the header tree, only contexts where add_header is allowed are kept
+    __slots__ = ("name", "args", "line", "parent", "children", "headers", "inherited")
+
+    def __init__(self, name, args, line, parent):
+        self.name = name
+        self.args = args
+        self.line = line
+        self.parent = parent
+        self.children = []
+        self.headers = set()
+        self.inherited = None
+        if parent is not None:
+            parent.children.append(self)
+
+class HeaderTree(Visitor):
+    #builds the main -> http -> server -> location -> if tree during the pass
+    contexts = ("main", "http", "server", "location", "if")
+    names = {"add_header"}
+
+    def __init__(self):
+        self.root = None
+        self.index = {name: [] for name in self.contexts}
+        self.stack = []
+
+    def enter_block(self, block):
+        if block.name in self.contexts:
+            node = Node(block.name, block.args, block.line, self.stack[-1] if self.stack else None)
+            self.index[block.name].append(node)
+            if self.root is None:
+                self.root = node
+        else:
+            #other blocks (map, upstream, types...) are not header contexts
+            node = None
+        self.stack.append(node)
+
+    def directive(self, directive, block):
+        node = self.stack[-1]
+        if node is not None and directive.args:
+            node.headers.add(directive.args[0].lower())
+
+    def exit_block(self, block):
+        self.stack.pop()
+
+    def resolve(self):
+        #effective headers computed once top-down: a level with its own
+        #add_header does not inherit any header from the levels above
+        if self.root is None:
+            return
+        todo = [self.root]
+        while todo:
+            node = todo.pop()
+            parent = node.parent.inherited if node.parent is not None else frozenset()
+            node.inherited = frozenset(node.headers) if node.headers else parent
+            todo.extend(node.children)
+
+def iter_tokens(lines):
+    #yield (kind, value, line, end) from any iterable of lines, one line at a time,
+    #end is the column just after the token on its line
+    pending = ""
+    start = 1
+    line_no = 0
+    for line_no, line in enumerate(lines, 1):
+        #text spans several lines when it continues a quoted string; the merged
+        #view of the includes may also yield pieces of lines without a newline
+        multiline = bool(pending)
+        if pending:
+            text = pending + line
+            pending = ""
+        else:
+            text = line
+            start = line_no
+        pos = 0
+        end = len(text)
+        while pos < end:
+            m = _TOKEN_RE.match(text, pos)
+            if m is None:
+                #trailing whitespace
+                break
+            kind = m.lastgroup
+            if kind == "unterminated":
+                #quoted string spanning several lines, wait for the rest
+                pending = text[pos:]
+                start += text.count("\n", 0, pos)
+                break
+            if kind != "comment":
+                value = m.group(kind)
+                if kind == "quoted":
+                    value = _ESCAPE_RE.sub(r"\1", value[1:-1])
+                if multiline:
+                    token_end = m.end(kind)
+                    yield (kind, value, start + text.count("\n", 0, m.start(kind)),
+                           token_end - text.rfind("\n", 0, token_end) - 1)
+                else:
+                    yield kind, value, start, m.end(kind)
+            pos = m.end()
+    if pending:
+        raise NginxParseError("unterminated quoted string", start)
+
+def iter_events(lines):
+    #yield ("enter", block), ("directive", directive, block) and ("exit", block)
+    root = Block("main", [], 0, None)
+    stack = [root]
+    words = []
+    first_line = 0
+    yield "enter", root
+    for kind, value, line, end in iter_tokens(lines):
+        if kind != "punct":
+            if not words:
+                first_line = line
+            words.append(value)
+        elif value == ";":
+            if not words:
+                continue
+            yield "directive", Directive(words[0], words[1:], first_line, line), stack[-1]
+            words = []
+        elif value == "{":
+            if not words:
+                raise NginxParseError("unexpected '{'", line)
+            block = Block(words[0], words[1:], first_line, stack[-1])
+            stack.append(block)
+            words = []
+            yield "enter", block
+        else:
+            if words:
+                raise NginxParseError("missing ';' before '}'", line)
+            if len(stack) == 1:
+                raise NginxParseError("unexpected '}'", line)
+            yield "exit", stack.pop()
+    if words or len(stack) > 1:
+        raise NginxParseError("unexpected end of file, missing ';' or '}'")
+    yield "exit", root
+
+def _overrides(visitor, hook):
+    return getattr(type(visitor), hook) is not getattr(Visitor, hook)
+
+def run_visitors(lines, visitors):
+    #single pass over the file, each event is only sent to the visitors that handle it
+    by_name = {}
+    catch_all = []
+    for visitor in visitors:
+        if not _overrides(visitor, "directive"):
+            continue
+        if visitor.names is None:
+            catch_all.append(visitor.directive)
+        else:
+            for name in visitor.names:
+                by_name.setdefault(name, []).append(visitor.directive)
+    enter = [visitor.enter_block for visitor in visitors if _overrides(visitor, "enter_block")]
+    exit = [visitor.exit_block for visitor in visitors if _overrides(visitor, "exit_block")]
+
+    for event in iter_events(lines):
+        if event[0] == "directive":
+            for handler in by_name.get(event[1].name, ()):
+                handler(event[1], event[2])
+            for handler in catch_all:
+                handler(event[1], event[2])
+        elif event[0] == "enter":
+            for handler in enter:
+                handler(event[1])
+        else:
+            for handler in exit:
+                handler(event[1])
+    return [result for result in (visitor.finish() for visitor in visitors) if result]
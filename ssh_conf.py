@@ -1,12 +1,21 @@
-import re, os
+import os
 from rich.console import Console
 from rich.text import Text
 from rich.table import Table
+from conf_engine import compile_rules, audit_file, STATUS_OK, STATUS_BAD
 
 console = Console()
 
 SSH_CONFIG_PATH = "/etc/ssh/sshd_config"
 
+# Durée sshd (ex. 60, 30s, 2m) en secondes ; sans unité, ce sont des secondes
+_TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def _seconds(val):
+    if val[-1].isdigit():
+        return int(val)
+    return int(val[:-1]) * _TIME_UNITS[val[-1].lower()]
+
 RECOMMENDATIONS = {
     "PermitRootLogin": (r"^PermitRootLogin\s+(\w+)", lambda val: val.lower() == "no", "Désactiver le login root", "PermitRootLogin no"),
     "Protocol": (r"^Protocol\s+(\d+)", lambda proto: proto == "2", "Utiliser uniquement la version 2 du protocole SSH", "Protocol 2"),
@@ -17,7 +26,7 @@ RECOMMENDATIONS = {
     "PermitEmptyPasswords": (r"^PermitEmptyPasswords\s+(\w+)", lambda val: val.lower() == "no", "Refuser les connexions pour les comptes sans pwd", "PermitEmptyPasswords no"),
     "AllowTcpForwarding": (r"^AllowTcpForwarding\s+(\w+)", lambda val: val.lower() == "no", "Désactiver le transfert TCP", "AllowTcpForwarding no"),
     "X11Forwarding": (r"^X11Forwarding\s+(\w+)", lambda val: val.lower() == "no", "Désactiver le transfert X11", "X11Forwarding no"),
-    "LoginGraceTime": (r"^LoginGraceTime\s+(\d+[smhd]?)", lambda val: int(val[:-1]) <= 60 if val[-1].isdigit() else True, "Limiter le temps d'attente de connexion", "LoginGraceTime 60s"),
+    "LoginGraceTime": (r"^LoginGraceTime\s+(\d+[smhd]?)", lambda val: 0 < _seconds(val) <= 60, "Limiter le temps d'attente de connexion", "LoginGraceTime 60s"),
     "MaxSessions": (r"^MaxSessions\s+(\d+)", lambda val: int(val) <= 10, "Limiter le nombre de sessions simultanées", "MaxSessions 10"),
     "MaxStartups": (r"^MaxStartups\s+(.+)", lambda val: val == "10:30:60", "Limiter les connexions simultanées", "MaxStartups 10:30:60"),
     "Ciphers": (r"^Ciphers\s+(.+)", lambda val: "aes256-ctr,aes192-ctr,aes128-ctr" in val, "Utiliser des ciphers modernes et sécurisés pour SSH", "Ciphers aes256-ctr,aes192-ctr,aes128-ctr"),
@@ -25,13 +34,14 @@ RECOMMENDATIONS = {
 
 }
 
+RULES = compile_rules(RECOMMENDATIONS)
+
 def check_ssh_config():
     if not os.path.exists(SSH_CONFIG_PATH):
         console.print(f"[bold red]Le fichier {SSH_CONFIG_PATH} n'existe pas.[/bold red]")
         return
 
-    with open(SSH_CONFIG_PATH, 'r') as file:
-        ssh_config = file.readlines()
+    report = audit_file(SSH_CONFIG_PATH, RULES)
 
     table = Table(title="État de la Configuration SSH", show_header=True, header_style="bold magenta")
     table.add_column("Nom de la règle", style="dim", width=22)
@@ -39,29 +49,19 @@ def check_ssh_config():
     table.add_column("Message", width=55)
     table.add_column("Ligne à ajouter / modifier")
 
-    secure_count = 0
-
-    for directive, (pattern, condition, message, action) in RECOMMENDATIONS.items():
-        found = False
-        for line in ssh_config:
-            match = re.match(pattern, line)
-            if match:
-                value = match.group(1)
-                if condition(value):
-                    table.add_row(directive, "[bold green]Correcte[/bold green]", "", "")
-                else:
-                    table.add_row(directive, "[bold yellow]Mal configurée[/bold yellow]", message, action)
-                    secure_count += 0.5
-                found = True
-                break
-        if not found:
+    for directive, status, value, message, action in report["results"]:
+        if status == STATUS_OK:
+            table.add_row(directive, "[bold green]Correcte[/bold green]", "", "")
+        elif status == STATUS_BAD:
+            table.add_row(directive, "[bold yellow]Mal configurée[/bold yellow]", message, action)
+        else:
             table.add_row(directive, "[bold red]Manquante[/bold red]", message, action)
-            secure_count += 1
 
     console.print(table)
 
     # Afficher la note finale
-    console.print(f"\n[bold blue]Note finale : {len(RECOMMENDATIONS) - secure_count}/{len(RECOMMENDATIONS)}[/bold blue]")
+    console.print(f"\n[bold blue]Note finale : {report['score']}/{report['max']}[/bold blue]")
+    console.print(f"[dim]Parsing : {report['parse_ms']:.2f} ms, évaluation : {report['eval_ms']:.2f} ms[/dim]")
 
 if __name__ == "__main__":
     check_ssh_config()
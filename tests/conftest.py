@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Les scripts d'audit sont des modules à la racine du dépôt ; ceux de
+# DockerAudit/checker et nginx_conf s'importent entre eux par leur nom de module
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "DockerAudit", "checker"))
+sys.path.insert(0, os.path.join(ROOT, "nginx_conf"))
+
+# Faux démon Docker (tests de docker_api), importé depuis ce dossier
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_docker_api import FakeDockerAPI
+
+@pytest.fixture
+def fake_docker(tmp_path):
+    server = FakeDockerAPI(str(tmp_path / "docker.sock")).start()
+    yield server
+    server.stop()
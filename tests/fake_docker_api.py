@@ -0,0 +1,80 @@
+import json
+import threading
+import socketserver
+
+# Faux démon Docker pour les tests : réponses HTTP/1.1 préparées, servies sur
+# une socket unix depuis un thread. Chaque route donne (statut, corps, mode) :
+#   "length"  Content-Length et keep-alive
+#   "chunked" Transfer-Encoding: chunked, en plusieurs morceaux
+#   "close"   Connection: close
+#   "hang"    en-têtes et début du corps, puis plus rien jusqu'à la fermeture par le client
+
+class FakeDockerAPI:
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.routes = {}
+        self.requests = []       # (connexion, méthode, chemin)
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.closed = threading.Event()  # une connexion a été fermée par le client
+        self.server = None
+
+    def route(self, path, body, status=200, mode="length"):
+        self.routes[path] = (status, body, mode)
+
+    def start(self):
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                with fake.lock:
+                    fake.connections += 1
+                    connection = fake.connections
+                while True:
+                    request_line = self.rfile.readline()
+                    if not request_line:
+                        fake.closed.set()
+                        return
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    method, path = request_line.decode().split()[:2]
+                    fake.requests.append((connection, method, path))
+                    if not fake._respond(self, path):
+                        return
+
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _respond(self, handler, path):
+        # Retourne False si la connexion ne doit plus servir
+        status, body, mode = self.routes.get(path, (404, {"message": f"page not found: {path}"}, "length"))
+        data = json.dumps(body).encode()
+        head = f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+        out = handler.wfile
+        if mode == "chunked":
+            out.write((head + "Transfer-Encoding: chunked\r\n\r\n").encode())
+            for i in range(0, len(data), 7):
+                piece = data[i:i + 7]
+                out.write(f"{len(piece):x}\r\n".encode() + piece + b"\r\n")
+            out.write(b"0\r\n\r\n")
+        elif mode == "hang":
+            out.write((head + f"Content-Length: {len(data)}\r\n\r\n").encode() + data[:len(data) // 2])
+            out.flush()
+            # Attend que le client abandonne et ferme la connexion
+            while handler.rfile.read(1):
+                pass
+            self.closed.set()
+            return False
+        elif mode == "close":
+            out.write((head + "Connection: close\r\n\r\n").encode() + data)
+            return False
+        else:
+            out.write((head + f"Content-Length: {len(data)}\r\n\r\n").encode() + data)
+        out.flush()
+        return True
@@ -0,0 +1,40 @@
+import pytest
+
+from advisory_db import version_key, build, AdvisoryDB, ECOSYSTEM_IMAGE
+
+@pytest.mark.parametrize("lower, higher", [
+    ("1.0-dev", "1.0-alpha1"),
+    ("1.0-alpha1", "1.0-beta"),
+    ("1.0-beta2", "1.0-rc1"),
+    ("1.0-rc1", "1.0"),
+    ("1.0", "1.0-pl1"),
+    ("1.0-pl1", "1.0.1"),
+    ("1.9", "1.10"),
+    ("1.25.3-alpine", "1.25.4"),
+    ("1.25.2", "1.25.3-alpine"),
+])
+def test_version_order(lower, higher):
+    assert version_key(lower) < version_key(higher)
+
+@pytest.mark.parametrize("variant, base", [
+    ("1.25.3-alpine", "1.25.3"),
+    ("1.25.3-alpine3.18", "1.25.3"),
+    ("8.2-bookworm", "8.2"),
+    ("v1.2.3-slim", "1.2.3"),
+    ("1.0-rc1-alpine", "1.0-rc1"),
+])
+def test_variant_equals_base_version(variant, base):
+    assert version_key(variant) == version_key(base)
+
+def test_lookup_image_variants(tmp_path):
+    db_path = str(tmp_path / "advisories.sqlite")
+    build(db_path, [
+        {"ecosystem": ECOSYSTEM_IMAGE, "package": "nginx", "fixed": "1.25.3", "id": "FIXED"},
+        {"ecosystem": ECOSYSTEM_IMAGE, "package": "nginx", "introduced": "1.25.3", "fixed": "1.25.5", "id": "INTRODUCED"},
+    ])
+    with AdvisoryDB(db_path) as db:
+        ids = [[a["advisory_id"] for a in found]
+               for found in db.lookup_many([(ECOSYSTEM_IMAGE, "nginx", v)
+                                            for v in ("1.25.2-alpine", "1.25.3-alpine", "1.25.5-alpine")])]
+    # Corrigé en 1.25.3 : la variante -alpine aussi ; introduit en 1.25.3 : la variante est concernée
+    assert ids == [["FIXED"], ["INTRODUCED"], []]
@@ -0,0 +1,193 @@
+import time
+import threading
+
+import pytest
+
+import audit_conf_sql_enzo as audit
+
+from conf_engine import STATUS_OK, STATUS_BAD, STATUS_MISSING
+
+# Instance PostgreSQL simulée : un curseur qui répond aux deux requêtes de
+# l'audit, un pool qui compte les connexions. Aucun serveur n'est nécessaire,
+# mais les tests du pool ont besoin de psycopg2 (exceptions, module pool) ;
+# l'analyse de pg_hba.conf et du fichier d'hôtes est testée sans.
+
+psycopg2 = audit.psycopg2
+
+SETTINGS = {"ssl": "on", "password_encryption": "md5", "listen_addresses": "*", "log_connections": "on"}
+HBA_ROWS = [(1, "local", ["all"], ["all"], None, None, "peer", None),
+            (2, "host", ["all"], ["all"], "0.0.0.0", "0.0.0.0", "trust", None)]
+
+class FakeCursor:
+    def __init__(self, server):
+        self.server = server
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, query, params=None):
+        self.server["queries"].append(query)
+        time.sleep(self.server.get("latency", 0))
+        if "pg_settings" in query:
+            self.rows = [(name, value) for name, value in SETTINGS.items() if name in params[0]]
+        elif self.server.get("hba_denied"):
+            raise psycopg2.errors.InsufficientPrivilege("permission denied for view pg_hba_file_rules")
+        else:
+            self.rows = list(HBA_ROWS)
+
+    def fetchall(self):
+        return self.rows
+
+class FakeConnection:
+    autocommit = False
+
+    def __init__(self, server):
+        self.server = server
+
+    def cursor(self):
+        return FakeCursor(self.server)
+
+class FakePool:
+    created = []
+
+    def __init__(self, minconn, maxconn, dsn, **kwargs):
+        self.dsn = dsn
+        self.kwargs = kwargs
+        self.server = SERVERS[dsn]
+        FakePool.created.append(self)
+
+    def getconn(self):
+        if self.server.get("down"):
+            raise psycopg2.OperationalError("connection refused")
+        self.server["connections"] += 1
+        return FakeConnection(self.server)
+
+    def putconn(self, conn, close=False):
+        pass
+
+    def closeall(self):
+        self.server["closed"] = True
+
+SERVERS = {}
+
+@pytest.fixture
+def servers(monkeypatch):
+    if psycopg2 is None:
+        pytest.skip("psycopg2 absent")
+    SERVERS.clear()
+    FakePool.created = []
+    monkeypatch.setattr(audit.pool, "ThreadedConnectionPool", FakePool)
+
+    def add(dsn, **options):
+        SERVERS[dsn] = {"queries": [], "connections": 0, **options}
+        return SERVERS[dsn]
+    return add
+
+def test_settings_read_in_one_query(servers):
+    server = servers("host=a")
+    with audit.PgFleet() as fleet:
+        report = fleet.audit_host("a", "host=a")
+    assert sum("pg_settings" in q for q in server["queries"]) == 1
+    statuses = {r["setting"]: r["status"] for r in report["results"]}
+    assert statuses["ssl"] == STATUS_OK
+    assert statuses["password_encryption"] == STATUS_BAD
+    assert statuses["logging_collector"] == STATUS_MISSING
+    assert report["score"] == len(audit.PG_RECOMMENDATIONS) - 0.5 * 2 - 1 * (len(audit.PG_RECOMMENDATIONS) - len(SETTINGS))
+    assert any("trust" in finding["message"] for finding in report["hba"])
+    assert server["closed"]
+
+def test_timeouts_passed_to_each_pool(servers):
+    servers("host=a")
+    with audit.PgFleet(connect_timeout=3, statement_timeout=1500) as fleet:
+        fleet.audit_host("a", "host=a")
+        fleet.audit_host("a", "host=a")
+    assert len(FakePool.created) == 1
+    assert FakePool.created[0].kwargs["connect_timeout"] == 3
+    assert "statement_timeout=1500" in FakePool.created[0].kwargs["options"]
+
+def test_hosts_audited_concurrently_in_order(servers):
+    hosts = [(f"h{i}", f"host=h{i}") for i in range(40)]
+    for name, dsn in hosts:
+        servers(dsn, latency=0.05)
+    start = time.perf_counter()
+    with audit.PgFleet() as fleet:
+        reports = list(fleet.audit_hosts(hosts, workers=20))
+    elapsed = time.perf_counter() - start
+    assert [r["host"] for r in reports] == [name for name, _ in hosts]
+    # En série : 40 hôtes x 2 requêtes x 50 ms = 4 s
+    assert elapsed < 1.5
+
+def test_unreachable_host_reported_without_stopping(servers):
+    servers("host=up")
+    servers("host=down", down=True)
+    with audit.PgFleet() as fleet:
+        reports = list(fleet.audit_hosts([("down", "host=down"), ("up", "host=up")]))
+    assert "connection refused" in reports[0]["error"]
+    assert "score" in reports[1]
+
+def test_hba_file_fallback_is_per_host(servers, tmp_path):
+    hba = tmp_path / "pg_hba.conf"
+    hba.write_text("hostssl app app 10.0.0.0/8 password\n")
+    servers("host=a", hba_denied=True)
+    servers("host=b", hba_denied=True)
+    with audit.PgFleet() as fleet:
+        with_file, without_file = fleet.audit_hosts([("a", "host=a", str(hba)), ("b", "host=b")])
+    assert [f["message"] for f in with_file["hba"]] == ["Méthode password : mot de passe envoyé en clair"]
+    assert "hba_error" not in with_file
+    assert without_file["hba"] == []
+    assert "permission denied" in without_file["hba_error"]
+
+def test_iter_hosts_columns(tmp_path):
+    hosts = tmp_path / "hosts.txt"
+    hosts.write_text("# commentaire\nhost=a\nb\thost=b\nc\thost=c\t/etc/c/pg_hba.conf\n")
+    assert list(audit.iter_hosts(str(hosts), "/defaut")) == [
+        ("host=a", "host=a", "/defaut"),
+        ("b", "host=b", "/defaut"),
+        ("c", "host=c", "/etc/c/pg_hba.conf"),
+    ]
+
+def test_parse_pg_hba_forms():
+    rules = audit.parse_pg_hba([
+        "# TYPE DATABASE USER ADDRESS METHOD\n",
+        "local all postgres peer\n",
+        "host app,stats app 192.168.1.0 255.255.255.0 scram-sha-256  # masque séparé\n",
+        "hostssl all all \\\n",
+        "    10.0.0.0/8 \\\n",
+        "    cert clientcert=verify-full\n",
+        "include_if_exists autre.conf\n",
+    ])
+    assert [(r["line"], r["type"], r["address"], r["netmask"], r["method"]) for r in rules] == [
+        (2, "local", None, None, "peer"),
+        (3, "host", "192.168.1.0", "255.255.255.0", "scram-sha-256"),
+        (4, "hostssl", "10.0.0.0/8", None, "cert"),
+    ]
+    assert rules[1]["database"] == ["app", "stats"]
+
+def test_parse_pg_hba_malformed_lines_reported():
+    rules = audit.parse_pg_hba(["host all\n", "hots all all 0.0.0.0/0 md5\n", "local all all\n"])
+    assert [rule["error"] is not None for rule in rules] == [True, True, True]
+    findings = audit.evaluate_pg_hba(rules)
+    assert [line for line, status, message in findings] == [1, 2, 3]
+    assert all(message.startswith("Ligne invalide") for _, _, message in findings)
+
+def test_evaluate_pg_hba():
+    rules = audit.parse_pg_hba([
+        "host all all 127.0.0.1/32 scram-sha-256\n",
+        "host all all 0.0.0.0/0 md5\n",
+        "hostssl app app 10.0.0.0/8 scram-sha-256\n",
+        "host all all ::/0 reject\n",
+    ])
+    messages = {}
+    for line, status, message in audit.evaluate_pg_hba(rules):
+        messages.setdefault(line, []).append(message)
+    assert 1 not in messages and 3 not in messages and 4 not in messages
+    assert len(messages[2]) == 4
+
+def test_fleet_requires_psycopg2(monkeypatch):
+    monkeypatch.setattr(audit, "psycopg2", None)
+    with pytest.raises(RuntimeError, match="psycopg2"):
+        audit.PgFleet()
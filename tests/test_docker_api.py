@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+import docker_api
+from docker_api import DockerClient, DockerAPIError
+
+CONTAINERS = [{"Id": "a1"}, {"Id": "b2"}, {"Id": "gone"}]
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+async def server_saw_close(fake_docker):
+    return await asyncio.get_running_loop().run_in_executor(None, fake_docker.closed.wait, 2)
+
+def test_keep_alive_reuses_one_connection(fake_docker):
+    fake_docker.route("/version", {"Version": "27.3.1"})
+
+    async def scenario():
+        async with DockerClient(fake_docker.socket_path) as client:
+            return [await client.version() for _ in range(3)]
+
+    assert run(scenario()) == [{"Version": "27.3.1"}] * 3
+    assert fake_docker.connections == 1
+    assert [connection for connection, _, _ in fake_docker.requests] == [1, 1, 1]
+
+def test_connection_close_opens_a_new_connection(fake_docker):
+    fake_docker.route("/info", {"Name": "host"}, mode="close")
+
+    async def scenario():
+        async with DockerClient(fake_docker.socket_path) as client:
+            await client.info()
+            await client.info()
+
+    run(scenario())
+    assert fake_docker.connections == 2
+
+def test_chunked_body(fake_docker):
+    info = {"Name": "host", "SecurityOptions": ["name=seccomp,profile=builtin", "name=rootless"]}
+    fake_docker.route("/info", info, mode="chunked")
+
+    async def scenario():
+        async with DockerClient(fake_docker.socket_path) as client:
+            return await client.info(), await client.info()
+
+    assert run(scenario()) == (info, info)
+    # Le corps chunked est lu jusqu'au bout : la connexion reste réutilisable
+    assert fake_docker.connections == 1
+
+def test_inspect_all_skips_removed_container(fake_docker):
+    fake_docker.route("/containers/json?all=1", CONTAINERS)
+    fake_docker.route("/containers/a1/json", {"Id": "a1"})
+    fake_docker.route("/containers/b2/json", {"Id": "b2"}, mode="chunked")
+    fake_docker.route("/containers/gone/json", {"message": "No such container: gone"}, status=404)
+
+    async def scenario():
+        async with DockerClient(fake_docker.socket_path) as client:
+            return await client.inspect_all()
+
+    assert sorted(c["Id"] for c in run(scenario())) == ["a1", "b2"]
+
+def test_other_errors_are_raised(fake_docker):
+    fake_docker.route("/containers/json?all=1", [{"Id": "a1"}])
+    fake_docker.route("/containers/a1/json", {"message": "server error"}, status=500)
+
+    async def scenario():
+        async with DockerClient(fake_docker.socket_path) as client:
+            return await client.inspect_all()
+
+    with pytest.raises(DockerAPIError) as error:
+        run(scenario())
+    assert error.value.status == 500
+
+def test_timeout_closes_the_connection(fake_docker):
+    fake_docker.route("/info", {"Name": "host", "Padding": "x" * 100}, mode="hang")
+    fake_docker.route("/version", {"Version": "27.3.1"})
+
+    async def scenario():
+        async with DockerClient(fake_docker.socket_path, timeout=0.2) as client:
+            with pytest.raises(asyncio.TimeoutError) as error:
+                await client.info()
+            # La connexion à moitié lue est fermée tout de suite (pas seulement quand elle
+            # est libérée : la trace de l'erreur la garde en vie) et n'est pas retournée au pool
+            assert client._idle == []
+            assert await server_saw_close(fake_docker)
+            del error
+            return await client.version()
+
+    assert run(scenario()) == {"Version": "27.3.1"}
+    assert fake_docker.connections == 2
+
+def test_cancel_closes_the_connection(fake_docker):
+    fake_docker.route("/info", {"Name": "host", "Padding": "x" * 100}, mode="hang")
+
+    async def scenario():
+        async with DockerClient(fake_docker.socket_path, timeout=10) as client:
+            task = asyncio.create_task(client.info())
+            while not fake_docker.requests:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError) as error:
+                await task
+            assert client._idle == []
+            assert await server_saw_close(fake_docker)
+            del error
+
+    run(scenario())
+
+def test_engine_state_from_docker_host(fake_docker, monkeypatch):
+    fake_docker.route("/containers/json?all=1", [{"Id": "a1"}])
+    fake_docker.route("/containers/a1/json", {"Id": "a1", "HostConfig": {"Privileged": True}})
+    fake_docker.route("/info", {"Name": "host"})
+    fake_docker.route("/version", {"Version": "27.3.1"})
+    monkeypatch.setenv("DOCKER_HOST", "unix://" + fake_docker.socket_path)
+    state = docker_api.engine_state(refresh=True)
+    assert state["version"] == {"Version": "27.3.1"}
+    assert state["containers"][0]["HostConfig"]["Privileged"] is True
+    monkeypatch.setattr(docker_api, "_state", None)
@@ -0,0 +1,36 @@
+from nginx_parser import iter_tokens, iter_events
+from nginx_get_conf import resolve_includes
+from audit_nginx_conf import analyze_nginx_conf
+
+MULTILINE = 'server {\n    add_header X "a\nb"; autoindex on;\n}\n'
+
+def directives(lines):
+    return [(event[1].name, event[1].args, event[1].line)
+            for event in iter_events(lines) if event[0] == "directive"]
+
+def test_tokens_after_multiline_quoted_string():
+    tokens = list(iter_tokens(MULTILINE.splitlines(keepends=True)))
+    assert [(kind, value, line) for kind, value, line, end in tokens[4:]] == [
+        ("quoted", "a\nb", 2), ("punct", ";", 3), ("word", "autoindex", 3),
+        ("word", "on", 3), ("punct", ";", 3), ("punct", "}", 4)]
+    # Colonnes sur la ligne de fermeture de la chaîne : b"; autoindex on;
+    assert [end for kind, value, line, end in tokens[5:9]] == [3, 13, 16, 17]
+
+def test_directive_after_multiline_quoted_string():
+    assert directives(MULTILINE.splitlines(keepends=True)) == [
+        ("add_header", ["X", "a\nb"], 2), ("autoindex", ["on"], 3)]
+
+def test_audit_reports_directive_after_multiline_value(tmp_path):
+    conf = tmp_path / "nginx.conf"
+    conf.write_text("http {\n" + MULTILINE + "}\n")
+    report = analyze_nginx_conf(str(conf))
+    assert any("autoindex" in item for item in report)
+
+def test_include_after_multiline_quoted_string(tmp_path):
+    (tmp_path / "extra.conf").write_text("autoindex on;\n")
+    conf = tmp_path / "nginx.conf"
+    conf.write_text('http {\n    add_header X "a\nb"; include extra.conf; server_tokens off;\n}\n')
+    config = resolve_includes(str(conf))
+    assert directives(config) == [("add_header", ["X", "a\nb"], 2), ("include", ["extra.conf"], 3),
+                                  ("autoindex", ["on"], 4), ("server_tokens", ["off"], 5)]
+    assert config.locate(5) == (str(conf.resolve()), 3)
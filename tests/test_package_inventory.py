@@ -0,0 +1,45 @@
+import pytest
+
+import package_inventory
+import docker_checker
+
+@pytest.fixture
+def packages(monkeypatch):
+    inventory = {}
+    monkeypatch.setattr(package_inventory, "installed_packages", lambda: inventory)
+    return inventory
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("1.0", "1.0", 0),
+    ("1.0~rc1", "1.0", -1),
+    ("1.10", "1.9", 1),
+    ("1:1.0", "2.0", 1),
+    ("1.0-2", "1.0-10", -1),
+])
+def test_compare_versions(a, b, expected):
+    assert package_inventory.compare_versions(a, b) == expected
+
+def test_version_at_least_ignores_packaging_epoch(packages):
+    packages.update({"docker-ce": "5:24.0.7-1~ubuntu.22.04~jammy", "containerd.io": "1.7.22-1"})
+    assert package_inventory.version_at_least("docker-ce", "25.0.2") is False
+    assert package_inventory.version_at_least("docker-ce", "24.0.7") is True
+    # Un minimum avec époque compare les époques
+    assert package_inventory.version_at_least("docker-ce", "4:99") is True
+    assert package_inventory.version_at_least("containerd.io", "1.6.28") is True
+    assert package_inventory.version_at_least("absent", "1.0") is False
+
+def test_outdated_packages(packages):
+    packages.update({"docker-ce": "3:24.0.7-1.el9", "containerd.io": "1.7.22-3.1.el9"})
+    assert docker_checker.outdated_packages() == [["docker-ce", "3:24.0.7-1.el9", "25.0.2"]]
+    assert docker_checker.check_package_versions() is False
+    packages["docker-ce"] = "3:27.3.1-1.el9"
+    assert docker_checker.check_package_versions() is True
+    # Un paquet absent n'est pas une version trop ancienne
+    del packages["containerd.io"]
+    assert docker_checker.outdated_packages() == []
+
+def test_unknown_inventory(monkeypatch):
+    monkeypatch.setattr(package_inventory, "installed_packages", lambda: None)
+    assert package_inventory.version_at_least("docker-ce", "25.0.2") is None
+    assert docker_checker.outdated_packages() is None
+    assert docker_checker.check_package_versions() is None
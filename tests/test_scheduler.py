@@ -0,0 +1,36 @@
+import time
+
+from scheduler import Scheduler, STATUS_OK, STATUS_ERROR, STATUS_TIMEOUT
+
+def fail():
+    time.sleep(0.1)
+    raise RuntimeError("socket absente")
+
+def test_failed_dependency_does_not_wait_for_timeout():
+    scheduler = Scheduler(default_timeout=2)
+    scheduler.add("engine", fail, report=False)
+    # Beaucoup de dépendantes : certaines n'ont pas encore vu l'erreur quand leur résultat est demandé
+    for i in range(200):
+        scheduler.add(f"check{i}", lambda engine: True, deps=["engine"])
+    start = time.perf_counter()
+    results = scheduler.run()["results"]
+    assert time.perf_counter() - start < 1
+    assert {result["status"] for result in results.values()} == {STATUS_ERROR}
+    assert "socket absente" in results["check0"]["error"]
+
+def test_timeout_counts_from_task_start():
+    scheduler = Scheduler(default_timeout=0.5)
+    scheduler.add("slow_data", lambda: time.sleep(0.4) or 1, report=False)
+    scheduler.add("check", lambda data: time.sleep(0.3) or data + 1, deps=["slow_data"])
+    report = scheduler.run()
+    assert report["results"]["check"] == {"status": STATUS_OK, "value": 2}
+
+def test_timed_out_task_and_dependents():
+    scheduler = Scheduler(default_timeout=0.2)
+    scheduler.add("hang", lambda: time.sleep(5))
+    scheduler.add("after", lambda value: value, deps=["hang"])
+    start = time.perf_counter()
+    results = scheduler.run()["results"]
+    assert time.perf_counter() - start < 1
+    assert results["hang"]["status"] == STATUS_TIMEOUT
+    assert results["after"]["status"] == STATUS_TIMEOUT
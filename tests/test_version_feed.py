@@ -0,0 +1,96 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import version_feed
+
+PAGE = "<html><body><h2>Docker Engine</h2><h3 id='27.3.1'>27.3.1</h3>" + "<p>notes</p>" * 5000 + "</body></html>"
+ETAG = '"v1"'
+LAST_MODIFIED = "Tue, 01 Oct 2024 10:00:00 GMT"
+
+@pytest.fixture
+def release_notes():
+    """Serveur HTTP local des release notes : enregistre les en-têtes de chaque requête."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            requests_seen.append(dict(self.headers))
+            if self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                self.send_response(304)
+                self.end_headers()
+                return
+            data = PAGE.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", ETAG)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    version_feed._memo.clear()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", requests_seen
+    version_feed._memo.clear()
+    server.shutdown()
+    server.server_close()
+
+def test_fetch_then_cache_within_ttl(release_notes, tmp_path):
+    url, seen = release_notes
+    cache = str(tmp_path / "versions.json")
+    assert version_feed.latest_docker_version(url, cache_path=cache) == "27.3.1"
+    version_feed._memo.clear()
+    assert version_feed.latest_docker_version(url, cache_path=cache) == "27.3.1"
+    assert len(seen) == 1
+    entry = json.load(open(cache))
+    assert entry["etag"] == ETAG and entry["last_modified"] == LAST_MODIFIED
+
+def test_expired_ttl_revalidates_with_304(release_notes, tmp_path):
+    url, seen = release_notes
+    cache = tmp_path / "versions.json"
+    cache.write_text(json.dumps({"url": url, "version": "27.3.1", "etag": ETAG,
+                                 "last_modified": LAST_MODIFIED, "fetched_at": 0}))
+    assert version_feed.latest_docker_version(url, cache_path=str(cache), ttl=60) == "27.3.1"
+    assert seen[0]["If-None-Match"] == ETAG
+    assert seen[0]["If-Modified-Since"] == LAST_MODIFIED
+    # Le 304 renouvelle la date du cache : l'appel suivant ne touche pas le réseau
+    assert json.loads(cache.read_text())["fetched_at"] > 0
+    version_feed._memo.clear()
+    version_feed.latest_docker_version(url, cache_path=str(cache), ttl=60)
+    assert len(seen) == 1
+
+def test_expired_ttl_without_validators_refetches(release_notes, tmp_path):
+    url, seen = release_notes
+    cache = tmp_path / "versions.json"
+    cache.write_text(json.dumps({"url": url, "version": "20.10.0", "fetched_at": 0}))
+    assert version_feed.latest_docker_version(url, cache_path=str(cache), ttl=60) == "27.3.1"
+    assert "If-None-Match" not in seen[0]
+
+def test_offline_keeps_stale_cache(tmp_path):
+    cache = tmp_path / "versions.json"
+    url = "http://127.0.0.1:9/"
+    cache.write_text(json.dumps({"url": url, "version": "26.0.0", "fetched_at": 0}))
+    version_feed._memo.clear()
+    assert version_feed.latest_docker_version(url, cache_path=str(cache), ttl=60, timeout=1) == "26.0.0"
+
+@pytest.mark.parametrize("content, expected", [
+    ('{"docker": "27.3.1"}', "27.3.1"),
+    (PAGE, "27.3.1"),
+    ('["27.3.1"]', None),
+    ('{"docker": 27}', None),
+    ('{"engine": "27.3.1"}', None),
+])
+def test_offline_bundle(tmp_path, content, expected):
+    bundle = tmp_path / "bundle"
+    bundle.write_text(content)
+    assert version_feed.latest_docker_version("http://127.0.0.1:9/", cache_path=None, bundle=str(bundle)) == expected
+
+def test_missing_bundle(tmp_path):
+    assert version_feed.read_bundle(str(tmp_path / "absent.json")) is None
@@ -0,0 +1,27 @@
+import os
+
+from Audit_Wordpress_BOSQ_Mickael import audit_permissions
+
+def make(root, rel, mode):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+    os.chmod(path, mode)
+
+def test_each_path_reported_once_and_only_on_sensitive_paths(tmp_path):
+    root = str(tmp_path)
+    make(root, "index.php", 0o664)
+    make(root, "wp-admin/admin.php", 0o664)
+    make(root, "wp-admin/open.php", 0o777)
+    make(root, "wp-content/plugins/foo/foo.php", 0o666)
+    make(root, "wp-content/uploads/2024/shell.php", 0o755)
+    make(root, "wp-content/cache/page.html", 0o664)
+    os.chmod(os.path.join(root, "wp-content", "cache"), 0o775)
+    os.chmod(os.path.join(root, "wp-admin"), 0o775)
+    report = audit_permissions(root)
+    assert report == {
+        "world-writable": [("wp-admin/open.php", "777"), ("wp-content/plugins/foo/foo.php", "666")],
+        "uploads-php-executable": [("wp-content/uploads/2024/shell.php", "755")],
+        "files-644": [("index.php", "664"), ("wp-admin/admin.php", "664")],
+        "dirs-755": [("wp-admin", "775")],
+    }